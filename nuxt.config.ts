@@ -97,6 +97,13 @@ export default defineNuxtConfig({
   experimental: {
     componentIslands: true,
   },
+
+  // Dashboard artifacts written by scripts/publish_artifacts.py. Files are content-hashed,
+  // only the manifest needs revalidating.
+  routeRules: {
+    "/data/**": { headers: { "cache-control": "public, max-age=31536000, immutable" } },
+    "/data/manifest.json": { headers: { "cache-control": "public, max-age=300, must-revalidate" } },
+  },
   vite: {
     plugins: [tailwindcss()],
   },
@@ -1,21 +1,58 @@
 """
 Analytics and Reporting
 Generates progress snapshots and analytics data for the dashboard
-Run with: python analytics.py [--snapshot] [--all]
+Run with: python analytics.py [--snapshot] [--stats] [--report] [--cube] [--series] [--all]
 """
 
 import argparse
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Import our utilities
-from utils import get_supabase_client, print_step, safe_print
+from utils import (
+    get_supabase_client, print_step, safe_print, fetch_all_rows, save_state, load_state, safe_upsert
+)
+from profiling import add_profile_arguments, profile_main
+
+# Statuses tracked in progress snapshots
+TRACKED_STATUSES = ('On Track', 'At Risk', 'Monitor')
+
+# Student columns needed by statistics, the detailed report and the analytics cube
+STUDENT_REPORT_COLUMNS = ('id, username, program_id, cohort_id, status, current_season_id, '
+                          'expected_season_id, last_login, points')
 
 class ProgressAnalytics:
     """Handles progress snapshots and analytics generation"""
     
     def __init__(self, supabase_client):
         self.supabase = supabase_client
+        self._aggregates = None
+        # Student rows behind the aggregates, shared with the analytics cube
+        self.students = None
+    
+    def count_students(self, status=None):
+        """Count students server-side with an exact-count query (no student rows transferred)"""
+        query = self.supabase.table('students').select('id', count='exact')
+        if status:
+            query = query.eq('status', status)
+        response = query.limit(1).execute()
+        return response.count or 0
+    
+    def get_status_counts(self):
+        """
+        Get total and per-status student counts
+        Reuses the shared aggregates when they are already loaded, otherwise runs one
+        count query per status.
+        """
+        if self._aggregates is not None:
+            status_counts = self._aggregates["status_counts"]
+            return self._aggregates["total_students"], {
+                status: status_counts.get(status, 0) for status in TRACKED_STATUSES
+            }
+
+        total_students = self.count_students()
+        status_counts = {status: self.count_students(status) for status in TRACKED_STATUSES}
+        return total_students, status_counts
     
     def create_progress_snapshot(self):
         """Create a snapshot of current student progress statistics (max once per week)"""
@@ -38,19 +75,16 @@ class ProgressAnalytics:
                     print(f"   Next snapshot will be created in {7 - days_since_last} day(s).")
                     return True  # Not an error, just skipping
 
-            # Query student table and count statuses
-            students_response = self.supabase.table('students').select('status').execute()
-            students = students_response.data
+            # Count statuses in the database instead of downloading every student
+            total_students, status_counts = self.get_status_counts()
 
-            if not students:
+            if not total_students:
                 print("No student data found")
                 return False
             
-            # Calculate statistics
-            total_students = len(students)
-            on_track = sum(1 for s in students if s.get('status') == 'On Track')
-            at_risk = sum(1 for s in students if s.get('status') == 'At Risk')
-            monitor = sum(1 for s in students if s.get('status') == 'Monitor')
+            on_track = status_counts['On Track']
+            at_risk = status_counts['At Risk']
+            monitor = status_counts['Monitor']
             
             # Handle students with no status or other statuses
             untracked = total_students - (on_track + at_risk + monitor)
@@ -80,42 +114,84 @@ class ProgressAnalytics:
             print(f"Error creating progress snapshot: {e}")
             return False
     
+    def load_aggregates(self, refresh=False):
+        """
+        Load the student columns used by every report once and aggregate them in a single pass
+        The result is cached on the instance so snapshot, statistics and report share one read.
+        """
+        if self._aggregates is not None and not refresh:
+            return self._aggregates
+
+        # Paged: a single select is capped at the API's row limit
+        students = fetch_all_rows(self.supabase, 'students', STUDENT_REPORT_COLUMNS)
+        self.students = students
+
+        # Get season names for better reporting
+        seasons_response = self.supabase.table('seasons').select('id, name').execute()
+        season_names = {s['id']: s['name'] for s in seasons_response.data}
+
+        status_counts = {}
+        season_alignment = {"aligned": 0, "misaligned": 0, "unknown": 0}
+        season_distribution = {}
+        active_students = 0
+        students_with_points = 0
+
+        for student in students:
+            status = student.get('status', 'Unknown')
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+            # Check season alignment
+            current_season = student.get('current_season_id')
+            expected_season = student.get('expected_season_id')
+
+            if current_season and expected_season:
+                if current_season == expected_season:
+                    season_alignment["aligned"] += 1
+                else:
+                    season_alignment["misaligned"] += 1
+            else:
+                season_alignment["unknown"] += 1
+
+            # Season distribution
+            if current_season:
+                season_name = season_names.get(current_season, f"Season {current_season}")
+                season_distribution[season_name] = season_distribution.get(season_name, 0) + 1
+
+            if student.get('last_login'):
+                active_students += 1
+
+            try:
+                if float(student.get('points') or 0) > 0:
+                    students_with_points += 1
+            except (TypeError, ValueError):
+                pass
+
+        self._aggregates = {
+            "total_students": len(students),
+            "status_counts": status_counts,
+            "season_alignment": season_alignment,
+            "season_distribution": season_distribution,
+            "active_students": active_students,
+            "students_with_points": students_with_points,
+        }
+        return self._aggregates
+    
     def get_latest_statistics(self):
         """Get the latest student statistics without creating a snapshot"""
         print_step("CURRENT STATISTICS", "Retrieving current student progress statistics")
         
         try:
-            # Get student status distribution
-            students_response = self.supabase.table('students') \
-                .select('status, current_season_id, expected_season_id').execute()
-            students = students_response.data
+            aggregates = self.load_aggregates()
+            total = aggregates["total_students"]
             
-            if not students:
+            if not total:
                 print("No student data found")
-                return
-            
-            # Status distribution
-            status_counts = {}
-            season_alignment = {"aligned": 0, "misaligned": 0, "unknown": 0}
-            
-            for student in students:
-                status = student.get('status', 'Unknown')
-                status_counts[status] = status_counts.get(status, 0) + 1
-                
-                # Check season alignment
-                current_season = student.get('current_season_id')
-                expected_season = student.get('expected_season_id')
-                
-                if current_season and expected_season:
-                    if current_season == expected_season:
-                        season_alignment["aligned"] += 1
-                    else:
-                        season_alignment["misaligned"] += 1
-                else:
-                    season_alignment["unknown"] += 1
+                return None, None
+            
+            status_counts = aggregates["status_counts"]
+            season_alignment = aggregates["season_alignment"]
             
             # Print statistics
-            total = len(students)
             print(f"Total Students: {total}")
             print("\nStatus Distribution:")
             for status, count in status_counts.items():
@@ -138,32 +214,16 @@ class ProgressAnalytics:
         print_step("DETAILED REPORT", "Generating comprehensive analytics report")
         
         try:
-            # Get comprehensive student data
-            students_response = self.supabase.table('students') \
-                .select('id, username, status, current_season_id, expected_season_id, last_login, points') \
-                .execute()
-            students = students_response.data
+            aggregates = self.load_aggregates()
+            total_students = aggregates["total_students"]
             
-            if not students:
+            if not total_students:
                 print("No student data found")
                 return False
             
-            # Get season names for better reporting
-            seasons_response = self.supabase.table('seasons').select('id, name').execute()
-            season_names = {s['id']: s['name'] for s in seasons_response.data}
-            
-            # Analyze data
-            total_students = len(students)
-            active_students = sum(1 for s in students if s.get('last_login'))
-            students_with_points = sum(1 for s in students if s.get('points', 0) > 0)
-            
-            # Season distribution
-            season_distribution = {}
-            for student in students:
-                current_season_id = student.get('current_season_id')
-                if current_season_id:
-                    season_name = season_names.get(current_season_id, f"Season {current_season_id}")
-                    season_distribution[season_name] = season_distribution.get(season_name, 0) + 1
+            active_students = aggregates["active_students"]
+            students_with_points = aggregates["students_with_points"]
+            season_distribution = aggregates["season_distribution"]
             
             # Print detailed report
             safe_print(f"\n[STATS] DETAILED ANALYTICS REPORT")
@@ -180,7 +240,7 @@ class ProgressAnalytics:
                 percentage = (count / total_students * 100) if total_students > 0 else 0
                 print(f"  {season}: {count} ({percentage:.1f}%)")
             
-            # Get status and season alignment
+            # Get status and season alignment (served from the same aggregates)
             status_counts, season_alignment = self.get_latest_statistics()
             
             return True
@@ -189,20 +249,344 @@ class ProgressAnalytics:
             print(f"Error generating detailed report: {e}")
             return False
 
+class CohortAnalyticsCube:
+    """
+    Precomputed per-cohort / per-program analytics
+    Students are grouped by (program, cohort, current season, expected season, status) with
+    vectorized group-bys; each cell holds counts plus mean/percentile season progress and
+    points. Cohort-level roll-ups are stored alongside, keyed "program_id:cohort_id", so
+    cohort views are a dictionary lookup on the saved file.
+    NumPy is imported by the methods that need it, so the other analytics commands start without it.
+    """
+
+    CUBE_FILE = 'analytics_cube.json'
+    DIMENSIONS = ('program_id', 'cohort_id', 'current_season_id', 'expected_season_id', 'status')
+    PERCENTILES = (25, 50, 75)
+
+    def __init__(self, supabase_client):
+        self.supabase = supabase_client
+
+    def _load_students(self, students=None):
+        """
+        Load students with the progress of their current season attached
+        students: rows already read by ProgressAnalytics.load_aggregates (read here when None)
+        """
+        import numpy as np
+
+        if students is None:
+            students = fetch_all_rows(
+                self.supabase, 'students',
+                'id, program_id, cohort_id, current_season_id, expected_season_id, status, points'
+            )
+        progress_rows = fetch_all_rows(
+            self.supabase, 'student_season_progress', 'student_id, season_id, progress_percentage'
+        )
+        progress = {
+            (row['student_id'], row['season_id']): row.get('progress_percentage')
+            for row in progress_rows
+        }
+
+        progress_values = np.full(len(students), np.nan)
+        points_values = np.full(len(students), np.nan)
+        for i, student in enumerate(students):
+            value = progress.get((student['id'], student.get('current_season_id')))
+            if value is not None:
+                progress_values[i] = float(value)
+            try:
+                points_values[i] = float(student.get('points'))
+            except (TypeError, ValueError):
+                pass
+
+        return students, progress_values, points_values
+
+    @staticmethod
+    def _factorize(values):
+        """Encode values as dense integer codes; returns (codes, uniques)"""
+        import numpy as np
+
+        index = {}
+        codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+        return codes, list(index)
+
+    @classmethod
+    def _percentiles(cls, groups, values, group_count):
+        """Per-group percentiles (linear interpolation) of the non-NaN values, vectorized"""
+        import numpy as np
+
+        result = np.full((group_count, len(cls.PERCENTILES)), np.nan)
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return result
+
+        groups = groups[valid]
+        values = values[valid]
+        order = np.lexsort((values, groups))
+        sorted_values = values[order]
+        sizes = np.bincount(groups, minlength=group_count)
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        has_values = sizes > 0
+
+        for j, q in enumerate(cls.PERCENTILES):
+            position = starts + (sizes - 1).clip(min=0) * (q / 100)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            lower = lower.clip(max=len(sorted_values) - 1)
+            upper = upper.clip(max=len(sorted_values) - 1)
+            fraction = position - np.floor(position)
+            interpolated = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+            result[has_values, j] = interpolated[has_values]
+        return result
+
+    @classmethod
+    def _group_stats(cls, key_codes, progress, points):
+        """
+        Group rows by the combined key columns and compute count/mean/percentiles
+        Returns: (unique key code rows, list of stats dicts)
+        """
+        import numpy as np
+
+        unique_keys, groups = np.unique(key_codes, axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        group_count = len(unique_keys)
+        counts = np.bincount(groups, minlength=group_count)
+
+        def mean(values):
+            valid = ~np.isnan(values)
+            n = np.bincount(groups[valid], minlength=group_count)
+            total = np.bincount(groups[valid], weights=values[valid], minlength=group_count)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+        progress_mean = mean(progress)
+        points_mean = mean(points)
+        progress_pct = cls._percentiles(groups, progress, group_count)
+        points_pct = cls._percentiles(groups, points, group_count)
+
+        def rounded(value):
+            return None if np.isnan(value) else round(float(value), 2)
+
+        stats = []
+        for g in range(group_count):
+            entry = {
+                'students': int(counts[g]),
+                'progress_mean': rounded(progress_mean[g]),
+                'points_mean': rounded(points_mean[g]),
+            }
+            for j, q in enumerate(cls.PERCENTILES):
+                entry[f'progress_p{q}'] = rounded(progress_pct[g, j])
+                entry[f'points_p{q}'] = rounded(points_pct[g, j])
+            stats.append(entry)
+        return unique_keys, stats
+
+    def build(self, students=None):
+        """
+        Build the cube and its cohort roll-ups from the current database state
+        students: optional student rows already read in this run, so totals match the other reports
+        """
+        import numpy as np
+
+        print_step("ANALYTICS CUBE", "Building per-cohort / per-program analytics cube")
+
+        students, progress, points = self._load_students(students)
+        if not students:
+            print("No student data found")
+            return None
+
+        codes = []
+        uniques = []
+        for dimension in self.DIMENSIONS:
+            dimension_codes, dimension_values = self._factorize([s.get(dimension) for s in students])
+            codes.append(dimension_codes)
+            uniques.append(dimension_values)
+        key_codes = np.column_stack(codes)
+
+        cells = []
+        unique_keys, stats = self._group_stats(key_codes, progress, points)
+        for key_row, entry in zip(unique_keys, stats):
+            cell = {dimension: uniques[d][key_row[d]] for d, dimension in enumerate(self.DIMENSIONS)}
+            cell.update(entry)
+            cells.append(cell)
+
+        # Cohort-level roll-up: (program, cohort) with the status breakdown
+        status_index = self.DIMENSIONS.index('status')
+        cohorts = {}
+        unique_keys, stats = self._group_stats(key_codes[:, :2], progress, points)
+        for key_row, entry in zip(unique_keys, stats):
+            program_id, cohort_id = uniques[0][key_row[0]], uniques[1][key_row[1]]
+            entry['status_counts'] = {}
+            cohorts[f"{program_id}:{cohort_id}"] = {'program_id': program_id, 'cohort_id': cohort_id, **entry}
+
+        for cell in cells:
+            entry = cohorts[f"{cell['program_id']}:{cell['cohort_id']}"]
+            status = cell[self.DIMENSIONS[status_index]] or 'Unknown'
+            entry['status_counts'][status] = entry['status_counts'].get(status, 0) + cell['students']
+
+        cube = {
+            'generated_at': datetime.now().isoformat(),
+            'dimensions': list(self.DIMENSIONS),
+            'total_students': len(students),
+            'cells': cells,
+            'cohorts': cohorts,
+        }
+
+        path = save_state(self.CUBE_FILE, cube)
+        safe_print(f"[OK] Built analytics cube: {len(cells)} cells, {len(cohorts)} cohorts -> {path}")
+        return cube
+
+    @classmethod
+    def load(cls):
+        """Load the last saved cube (None if it was never built)"""
+        return load_state(cls.CUBE_FILE)
+
+    @classmethod
+    def cohort_summary(cls, program_id, cohort_id, cube=None):
+        """Look up the precomputed summary of one cohort"""
+        cube = cube or cls.load()
+        if not cube:
+            return None
+        return cube['cohorts'].get(f"{program_id}:{cohort_id}")
+
+class SnapshotSeriesStore:
+    """
+    Daily per-cohort progress snapshots with automatic downsampling
+    One row per (program, cohort) is recorded per day in cohort_progress_snapshots. Daily
+    rows older than DAILY_RETENTION_DAYS are folded into one weekly row per cohort (averaged
+    over the days recorded that week) and deleted, so the table stays small while recent
+    trends keep daily resolution.
+    """
+
+    TABLE = 'cohort_progress_snapshots'
+    CONFLICT_COLUMNS = 'snapshot_date, granularity, program_id, cohort_id'
+    DAILY_RETENTION_DAYS = 90
+    COUNT_COLUMNS = ('total_students', 'on_track', 'at_risk', 'monitor')
+
+    def __init__(self, supabase_client):
+        self.supabase = supabase_client
+
+    def record_daily(self, cube, snapshot_date=None):
+        """Upsert today's per-cohort snapshot rows from an analytics cube"""
+        snapshot_date = (snapshot_date or datetime.now().date()).isoformat()
+
+        records = []
+        for cohort in cube['cohorts'].values():
+            status_counts = cohort['status_counts']
+            records.append({
+                'snapshot_date': snapshot_date,
+                'granularity': 'daily',
+                'program_id': cohort['program_id'],
+                'cohort_id': cohort['cohort_id'],
+                'total_students': cohort['students'],
+                'on_track': status_counts.get('On Track', 0),
+                'at_risk': status_counts.get('At Risk', 0),
+                'monitor': status_counts.get('Monitor', 0),
+                'avg_progress': cohort['progress_mean'],
+            })
+
+        # Re-running on the same day overwrites that day's rows
+        return safe_upsert(self.supabase, self.TABLE, records, on_conflict=self.CONFLICT_COLUMNS)
+
+    def downsample(self, today=None):
+        """Fold daily rows of complete weeks older than the retention window into weekly rows"""
+        today = today or datetime.now().date()
+        cutoff = today - timedelta(days=self.DAILY_RETENTION_DAYS)
+        # Only fold whole weeks so a week is never downsampled from partial data
+        cutoff -= timedelta(days=cutoff.weekday())
+
+        daily_rows = fetch_all_rows(
+            self.supabase, self.TABLE, order_by='id',
+            filters=lambda q: q.eq('granularity', 'daily').lt('snapshot_date', cutoff.isoformat())
+        )
+        if not daily_rows:
+            print("No daily snapshots to downsample")
+            return True
+
+        weeks = {}
+        for row in daily_rows:
+            day = datetime.fromisoformat(str(row['snapshot_date'])[:10]).date()
+            week_start = day - timedelta(days=day.weekday())
+            weeks.setdefault((week_start, row['program_id'], row['cohort_id']), []).append(row)
+
+        weekly_records = []
+        for (week_start, program_id, cohort_id), rows in weeks.items():
+            record = {
+                'snapshot_date': week_start.isoformat(),
+                'granularity': 'weekly',
+                'program_id': program_id,
+                'cohort_id': cohort_id,
+            }
+            for column in self.COUNT_COLUMNS:
+                record[column] = round(sum(r.get(column) or 0 for r in rows) / len(rows))
+            progress = [float(r['avg_progress']) for r in rows if r.get('avg_progress') is not None]
+            record['avg_progress'] = round(sum(progress) / len(progress), 2) if progress else None
+            weekly_records.append(record)
+
+        if not safe_upsert(self.supabase, self.TABLE, weekly_records, on_conflict=self.CONFLICT_COLUMNS):
+            return False
+
+        # Weekly rows are in place, drop the daily rows they replace
+        self.supabase.from_(self.TABLE).delete() \
+            .eq('granularity', 'daily').lt('snapshot_date', cutoff.isoformat()).execute()
+
+        safe_print(f"[OK] Downsampled {len(daily_rows)} daily snapshots into {len(weekly_records)} weekly rows")
+        return True
+
+    def update(self, cube):
+        """Record today's snapshot and apply the retention policy"""
+        print_step("SNAPSHOT SERIES", "Recording daily per-cohort snapshots")
+        try:
+            if not self.record_daily(cube):
+                return False
+            return self.downsample()
+        except Exception as e:
+            print(f"Error updating snapshot series: {e}")
+            return False
+
+def run_all_analytics(supabase, analytics=None):
+    """Run every analytics operation (snapshot, stats, report, cube, series)"""
+    print_step("ANALYTICS SUITE", "Running all analytics operations")
+    analytics = analytics or ProgressAnalytics(supabase)
+    success = True
+    
+    # Read the students table once and serve every operation from it
+    analytics.load_aggregates()
+    
+    # Run all operations
+    if not analytics.create_progress_snapshot():
+        success = False
+    
+    analytics.get_latest_statistics()
+    
+    if not analytics.generate_detailed_report():
+        success = False
+    
+    cube = CohortAnalyticsCube(supabase).build(students=analytics.students)
+    if not cube:
+        success = False
+    elif not SnapshotSeriesStore(supabase).update(cube):
+        # The series is a history for the charts: a missing table or failed write must not
+        # fail the analytics stage (and skip everything downstream of it)
+        print("Warning: Snapshot series not updated (non-fatal), see the error above")
+    
+    return success
+
 def main():
     """Main function with CLI argument parsing"""
     parser = argparse.ArgumentParser(description='Generate analytics and progress snapshots')
     parser.add_argument('--snapshot', action='store_true', help='Create a progress snapshot')
     parser.add_argument('--stats', action='store_true', help='Show current statistics')
     parser.add_argument('--report', action='store_true', help='Generate detailed report')
+    parser.add_argument('--cube', action='store_true', help='Build the per-cohort/per-program analytics cube')
+    parser.add_argument('--series', action='store_true',
+                        help='Record daily per-cohort snapshots (builds the cube) and downsample old ones')
     parser.add_argument('--all', action='store_true', help='Run all analytics operations')
     parser.add_argument('--service-role', action='store_true', default=False,
                        help='Use service role key for database access')
     
+    add_profile_arguments(parser)
     args = parser.parse_args()
     
     # If no specific flags are provided, show help
-    if not any([args.snapshot, args.stats, args.report, args.all]):
+    if not any([args.snapshot, args.stats, args.report, args.cube, args.series, args.all]):
         parser.print_help()
         return
     
@@ -215,16 +599,7 @@ def main():
         
         # Run requested operations
         if args.all:
-            print_step("ANALYTICS SUITE", "Running all analytics operations")
-            
-            # Run all operations
-            if not analytics.create_progress_snapshot():
-                success = False
-            
-            analytics.get_latest_statistics()
-            
-            if not analytics.generate_detailed_report():
-                success = False
+            success = run_all_analytics(supabase, analytics)
         else:
             if args.snapshot:
                 if not analytics.create_progress_snapshot():
@@ -236,6 +611,13 @@ def main():
             if args.report:
                 if not analytics.generate_detailed_report():
                     success = False
+            
+            if args.cube or args.series:
+                cube = CohortAnalyticsCube(supabase).build(students=analytics.students)
+                if not cube:
+                    success = False
+                elif args.series and not SnapshotSeriesStore(supabase).update(cube):
+                    success = False
         
         if success:
             print_step("COMPLETED", "Analytics operations completed successfully")
@@ -248,4 +630,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile_main('analytics', main)
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Attendance Event Store
+Append-only local store of attendance events (email, session_date, session_type)
+
+Events are de-duplicated on (email, session_date, session_type), so submitting the
+form twice for the same session counts once. Columns are kept as NumPy arrays sorted
+by session date, which makes lifetime totals, rolling-window counts and per-cohort
+counts single vectorized passes instead of re-reading the sheet.
+NumPy is imported by the methods that need it, so importing this module (update_attendance.py
+--help, the --file import) doesn't load it.
+"""
+
+import os
+from datetime import date, datetime
+
+from utils import get_state_dir
+
+EVENT_STORE_FILE = 'attendance_events.npz'
+
+# Attendance count columns on the students table, in type-code order
+SESSION_FIELDS = ('workshops_attended', 'standup_attended', 'mentoring_attended')
+FIELD_CODES = {field: code for code, field in enumerate(SESSION_FIELDS)}
+
+EPOCH = date(1970, 1, 1)
+
+# Day/month order the sheet's locale writes dates in (the "Session date" column and form
+# timestamps). Only this one is tried, since e.g. 03/04/2025 is valid either way round.
+# Set ATTENDANCE_DATE_FORMAT for a sheet in another locale, e.g. '%m/%d/%Y'.
+DEFAULT_SESSION_DATE_FORMAT = '%d/%m/%Y'
+
+# ISO dates are unambiguous (XLSX exports give them), so they are always accepted
+ISO_DATE_FORMATS = ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S')
+
+
+def session_date_formats(date_format=None):
+    """Formats parse_session_date tries: the sheet's date format (with and without a time), then ISO"""
+    date_format = date_format or os.getenv('ATTENDANCE_DATE_FORMAT') or DEFAULT_SESSION_DATE_FORMAT
+    return (date_format, f"{date_format} %H:%M:%S") + ISO_DATE_FORMATS
+
+
+def parse_session_date(value, date_format=None):
+    """Parse a session date (or form timestamp) to a date, or None if it can't be parsed"""
+    if not value:
+        return None
+
+    value = str(value).strip()
+    for fmt in session_date_formats(date_format):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+class AttendanceEventStore:
+    """Columnar, de-duplicated attendance event store persisted as a compressed .npz file"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_state_dir(), EVENT_STORE_FILE)
+        self.clear()
+        self.load()
+
+    def __len__(self):
+        return len(self.days)
+
+    def load(self):
+        """Load the store from disk (an absent file means an empty store)"""
+        import numpy as np
+
+        if not os.path.exists(self.path):
+            return
+
+        with np.load(self.path, allow_pickle=False) as data:
+            self.emails = [str(email) for email in data['emails']]
+            self.email_codes = data['email_codes'].astype(np.int32)
+            self.days = data['days'].astype(np.int32)
+            self.types = data['types'].astype(np.int8)
+
+        self.email_index = {email: code for code, email in enumerate(self.emails)}
+
+    def save(self):
+        """Atomically write the store to disk"""
+        import numpy as np
+
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            emails=np.array(self.emails, dtype=str),
+            email_codes=self.email_codes,
+            days=self.days,
+            types=self.types,
+        )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Drop all events (used before a full reconcile)"""
+        import numpy as np
+
+        self.emails = []
+        self.email_index = {}
+        self.email_codes = np.empty(0, dtype=np.int32)
+        self.days = np.empty(0, dtype=np.int32)
+        self.types = np.empty(0, dtype=np.int8)
+
+    def _email_code(self, email):
+        code = self.email_index.get(email)
+        if code is None:
+            code = len(self.emails)
+            self.emails.append(email)
+            self.email_index[email] = code
+        return code
+
+    def _keys(self, email_codes, days, types):
+        """Pack (email, day, type) into one int64 key per event"""
+        import numpy as np
+
+        return (email_codes.astype(np.int64) << 32) | (days.astype(np.int64) << 2) | types.astype(np.int64)
+
+    def append(self, events):
+        """
+        Append (email, session_date, field_name) events, skipping ones already stored
+        Returns: (number of new events, set of emails that got new events)
+        """
+        import numpy as np
+
+        email_codes, days, types = [], [], []
+        for email, session_date, field_name in events:
+            email_codes.append(self._email_code(email))
+            days.append((session_date - EPOCH).days)
+            types.append(FIELD_CODES[field_name])
+
+        if not email_codes:
+            return 0, set()
+
+        email_codes = np.array(email_codes, dtype=np.int32)
+        days = np.array(days, dtype=np.int32)
+        types = np.array(types, dtype=np.int8)
+
+        # De-duplicate within the batch and against what is already stored
+        keys = self._keys(email_codes, days, types)
+        _, first = np.unique(keys, return_index=True)
+        first.sort()
+        keep = first[~np.isin(keys[first], self._keys(self.email_codes, self.days, self.types))]
+
+        if len(keep) == 0:
+            return 0, set()
+
+        self.email_codes = np.concatenate([self.email_codes, email_codes[keep]])
+        self.days = np.concatenate([self.days, days[keep]])
+        self.types = np.concatenate([self.types, types[keep]])
+
+        # Keep the columns sorted by date so windows are a binary search away
+        order = np.argsort(self.days, kind='stable')
+        self.email_codes = self.email_codes[order]
+        self.days = self.days[order]
+        self.types = self.types[order]
+
+        touched = {self.emails[code] for code in np.unique(email_codes[keep])}
+        return len(keep), touched
+
+    def _count_matrix(self, email_codes, types):
+        """Count events into an (emails x session types) matrix"""
+        import numpy as np
+
+        width = len(SESSION_FIELDS)
+        flat = email_codes.astype(np.int64) * width + types
+        counts = np.bincount(flat, minlength=len(self.emails) * width)
+        return counts.reshape(len(self.emails), width)
+
+    def _since(self, window_days, end_date=None):
+        """Index of the first event inside the window ending on end_date"""
+        import numpy as np
+
+        end_day = ((end_date or date.today()) - EPOCH).days
+        return np.searchsorted(self.days, end_day - window_days + 1, side='left')
+
+    def totals(self, emails=None):
+        """
+        Lifetime attendance counts per email
+        Returns: dict of {email: {field_name: count}}
+        """
+        matrix = self._count_matrix(self.email_codes, self.types)
+        return self._matrix_to_dict(matrix, emails)
+
+    def window_counts(self, window_days, end_date=None, emails=None):
+        """Attendance counts per email over the last window_days days"""
+        start = self._since(window_days, end_date)
+        matrix = self._count_matrix(self.email_codes[start:], self.types[start:])
+        return self._matrix_to_dict(matrix, emails)
+
+    def _matrix_to_dict(self, matrix, emails=None):
+        codes = range(len(self.emails)) if emails is None else [
+            self.email_index[email] for email in emails if email in self.email_index
+        ]
+        result = {}
+        for code in codes:
+            row = matrix[code]
+            if row.any():
+                result[self.emails[code]] = {
+                    field: int(row[i]) for i, field in enumerate(SESSION_FIELDS) if row[i]
+                }
+        return result
+
+    def cohort_window_counts(self, email_to_cohort, windows=(7, 30, 90), end_date=None):
+        """
+        Attendance counts per cohort for several rolling windows in one pass
+        Every event is bucketed by the smallest window that contains it, counted once
+        with bincount, and the buckets are accumulated into the nested windows.
+        Returns: dict of {cohort: {window_days: {field_name: count}}}
+        """
+        import numpy as np
+
+        windows = sorted(windows)
+        cohorts = sorted({cohort for cohort in email_to_cohort.values() if cohort is not None}, key=str)
+        if not cohorts or not len(self):
+            return {}
+
+        cohort_codes = {cohort: code for code, cohort in enumerate(cohorts)}
+        email_cohort = np.array(
+            [cohort_codes.get(email_to_cohort.get(email), -1) for email in self.emails],
+            dtype=np.int64,
+        )
+
+        end_day = ((end_date or date.today()) - EPOCH).days
+        start = self._since(windows[-1], end_date)
+        event_cohorts = email_cohort[self.email_codes[start:]]
+        ages = end_day - self.days[start:]
+        buckets = np.searchsorted(np.array(windows), ages, side='right')
+        valid = (event_cohorts >= 0) & (ages >= 0) & (buckets < len(windows))
+
+        width = len(SESSION_FIELDS)
+        flat = (event_cohorts[valid] * len(windows) + buckets[valid]) * width + self.types[start:][valid]
+        counts = np.bincount(flat, minlength=len(cohorts) * len(windows) * width)
+        counts = counts.reshape(len(cohorts), len(windows), width).cumsum(axis=1)
+
+        return {
+            cohort: {
+                window: {field: int(counts[c, w, i]) for i, field in enumerate(SESSION_FIELDS)}
+                for w, window in enumerate(windows)
+            }
+            for cohort, c in cohort_codes.items()
+        }
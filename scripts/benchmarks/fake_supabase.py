@@ -0,0 +1,360 @@
+"""
+In-Memory Supabase Stand-In
+Implements the part of the supabase-py / PostgREST query builder the pipeline uses, on plain
+Python lists, so stages can be benchmarked without a database
+
+Supported: from_/table, select (with count='exact' and embedded relations such as
+'students!inner(program_id)'), eq, neq, in_, gt, gte, lt, lte, is_, order, limit, range,
+insert, upsert(on_conflict=...), update, delete and rpc (handlers registered with register_rpc).
+
+Every execute() counts as one round trip and can sleep for a configurable latency. Equality
+lookups and upsert conflicts use hash indexes, so per-row queries cost O(1) like an indexed
+column in Postgres rather than a full scan. Ordered full-table reads reuse the table's sorted
+order until it is written to, so paging through a table isn't quadratic (like a btree index).
+"""
+
+import re
+import threading
+import time
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+class FakeQuery:
+    """One PostgREST request being built; mirrors the chained supabase-py API"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.operation = 'select'
+        self.columns = None
+        self.count = None
+        self.filters = []
+        self.payload = None
+        self.on_conflict = None
+        self.order_by = []
+        self.limit_rows = None
+        self.offset = 0
+
+    # Reads
+    def select(self, columns='*', count=None):
+        self.columns = parse_columns(columns)
+        self.count = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(('eq', column, value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(('neq', column, value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(('in', column, set(values)))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(('gt', column, value))
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(('gte', column, value))
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(('lt', column, value))
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(('lte', column, value))
+        return self
+
+    def is_(self, column, value):
+        self.filters.append(('is', column, None if value in (None, 'null') else value))
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_rows = count
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit_rows = end - start + 1
+        return self
+
+    # Writes
+    def insert(self, payload):
+        self.operation = 'insert'
+        self.payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict=None):
+        self.operation = 'upsert'
+        self.payload = payload
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, payload):
+        self.operation = 'update'
+        self.payload = payload
+        return self
+
+    def delete(self):
+        self.operation = 'delete'
+        return self
+
+    def execute(self):
+        return self.db._execute(self)
+
+def parse_columns(columns):
+    """
+    Split a select string into plain columns and embedded relations
+    Returns: list of (name, None) for columns or (relation, (inner, [columns])) for embeds
+    """
+    parsed = []
+    for part in re.findall(r'[\w!*]+\s*\([^)]*\)|[^,\s()]+', columns):
+        match = re.fullmatch(r'(\w+)(!inner)?\s*\(([^)]*)\)', part)
+        if match:
+            inner_columns = [c.strip() for c in match.group(3).split(',') if c.strip()]
+            parsed.append((match.group(1), (bool(match.group(2)), inner_columns)))
+        else:
+            parsed.append((part, None))
+    return parsed
+
+def _matches(row, filters):
+    for op, column, value in filters:
+        actual = row.get(column)
+        if op == 'eq':
+            if actual != value:
+                return False
+        elif op == 'neq':
+            if actual == value:
+                return False
+        elif op == 'in':
+            if actual not in value:
+                return False
+        elif op == 'is':
+            if actual is not value and actual != value:
+                return False
+        else:
+            if actual is None:
+                return False
+            if op == 'gt' and not actual > value:
+                return False
+            if op == 'gte' and not actual >= value:
+                return False
+            if op == 'lt' and not actual < value:
+                return False
+            if op == 'lte' and not actual <= value:
+                return False
+    return True
+
+class FakeSupabase:
+    """
+    In-memory tables behind the supabase-py query interface
+    tables: {table name: list of row dicts}; rows without an id get one on insert.
+    defaults: {table name: {column: callable}} for columns the database would generate.
+    """
+
+    def __init__(self, tables=None, latency=0.0, defaults=None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.defaults = defaults or {}
+        self.rpcs = {}
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._sorted = {}
+        self._next_ids = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests = 0
+        self.rows_read = 0
+        self.rows_written = 0
+        self.calls = {}
+
+    def stats(self):
+        return {'requests': self.requests, 'rows_read': self.rows_read, 'rows_written': self.rows_written,
+                'calls': dict(self.calls)}
+
+    def from_(self, table):
+        return FakeQuery(self, table)
+
+    table = from_
+
+    def register_rpc(self, name, handler):
+        """handler(db, params) -> response data"""
+        self.rpcs[name] = handler
+
+    def rpc(self, name, params=None):
+        db = self
+
+        class RpcCall:
+            def execute(self):
+                db._round_trip(f"rpc:{name}")
+                if name not in db.rpcs:
+                    raise Exception(f"Could not find the function public.{name}")
+                return FakeResponse(db.rpcs[name](db, params or {}))
+
+        return RpcCall()
+
+    # Indexes: {(table, columns): {key: [rows]}}, kept up to date on writes
+    def _index(self, table, columns):
+        key = (table, columns)
+        index = self._indexes.get(key)
+        if index is None:
+            index = {}
+            for row in self.tables.get(table, []):
+                index.setdefault(tuple(row.get(c) for c in columns), []).append(row)
+            self._indexes[key] = index
+        return index
+
+    def _index_add(self, table, row):
+        self._drop_sorted(table)
+        for (index_table, columns), index in self._indexes.items():
+            if index_table == table:
+                index.setdefault(tuple(row.get(c) for c in columns), []).append(row)
+
+    def _drop_sorted(self, table):
+        for key in [k for k in self._sorted if k[0] == table]:
+            del self._sorted[key]
+
+    def _invalidate(self, table, changed_columns=None):
+        self._drop_sorted(table)
+        for key in [k for k in self._indexes if k[0] == table]:
+            if changed_columns is None or set(key[1]) & changed_columns:
+                del self._indexes[key]
+
+    def _round_trip(self, call):
+        self.requests += 1
+        self.calls[call] = self.calls.get(call, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _sort(rows, order_by):
+        for column, desc in reversed(order_by):
+            # None sorts last ascending and first descending, as in Postgres
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0),
+                      reverse=desc)
+        return rows
+
+    def _sorted_table(self, table, order_by):
+        """All rows of a table in query order, cached until the table is written to"""
+        key = (table, tuple(order_by))
+        rows = self._sorted.get(key)
+        if rows is None:
+            rows = self._sorted[key] = self._sort(list(self.tables.get(table, [])), order_by)
+        return rows
+
+    def _candidates(self, query):
+        """Rows that may match: an index lookup on the first eq filter, else a full scan"""
+        rows = self.tables.setdefault(query.table, [])
+        for op, column, value in query.filters:
+            if op == 'eq':
+                return self._index(query.table, (column,)).get((value,), [])
+            if op == 'in' and column == 'id':
+                index = self._index(query.table, ('id',))
+                return [row for v in value for row in index.get((v,), [])]
+        return rows
+
+    def _new_row(self, table, record):
+        row = dict(record)
+        for column, default in self.defaults.get(table, {}).items():
+            row.setdefault(column, default())
+        if row.get('id') is None:
+            next_id = self._next_ids.get(table)
+            if next_id is None:
+                next_id = max((r.get('id') or 0 for r in self.tables.get(table, []) if isinstance(r.get('id'), int)), default=0) + 1
+            row['id'] = next_id
+            self._next_ids[table] = next_id + 1
+        self.tables.setdefault(table, []).append(row)
+        self._index_add(table, row)
+        return row
+
+    def _project(self, row, columns):
+        if columns is None or columns == [('*', None)]:
+            return dict(row)
+        result = {}
+        for name, embed in columns:
+            if embed is None:
+                if name == '*':
+                    result.update(row)
+                else:
+                    result[name] = row.get(name)
+                continue
+            inner, inner_columns = embed
+            # students(...) embeds the row referenced by student_id
+            related = self._index(name, ('id',)).get((row.get(f"{name.rstrip('s')}_id"),), [])
+            if not related:
+                if inner:
+                    return None
+                result[name] = None
+            else:
+                result[name] = self._project(related[0], [(c, None) for c in inner_columns])
+        return result
+
+    def _execute(self, query):
+        with self._lock:
+            self._round_trip(f"{query.operation}:{query.table}")
+            table = query.table
+            records = query.payload if isinstance(query.payload, list) else [query.payload]
+
+            if query.operation == 'insert':
+                rows = [self._new_row(table, record) for record in records]
+                self.rows_written += len(rows)
+                return FakeResponse([dict(r) for r in rows])
+
+            if query.operation == 'upsert':
+                conflict = tuple(c.strip() for c in (query.on_conflict or 'id').split(','))
+                index = self._index(table, conflict)
+                rows = []
+                for record in records:
+                    existing = index.get(tuple(record.get(c) for c in conflict))
+                    if existing:
+                        existing[0].update(record)
+                        rows.append(existing[0])
+                    else:
+                        rows.append(self._new_row(table, record))
+                self._invalidate(table, set().union(*(r.keys() for r in records)) - set(conflict))
+                self.rows_written += len(rows)
+                return FakeResponse([dict(r) for r in rows])
+
+            candidates = self._candidates(query)
+            ordered = bool(query.order_by) and query.operation == 'select' and candidates is self.tables[table]
+            if ordered:
+                candidates = self._sorted_table(table, query.order_by)
+            # An unfiltered ordered read pages straight through the cached order
+            matched = candidates if ordered and not query.filters else \
+                [row for row in candidates if _matches(row, query.filters)]
+
+            if query.operation == 'update':
+                for row in matched:
+                    row.update(query.payload)
+                self._invalidate(table, set(query.payload))
+                self.rows_written += len(matched)
+                return FakeResponse([dict(r) for r in matched])
+
+            if query.operation == 'delete':
+                doomed = {id(row) for row in matched}
+                self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed]
+                self._invalidate(table)
+                self.rows_written += len(matched)
+                return FakeResponse([dict(r) for r in matched])
+
+            if not ordered:
+                self._sort(matched, query.order_by)
+            total = len(matched)
+            end = None if query.limit_rows is None else query.offset + query.limit_rows
+            page = matched[query.offset:end]
+            data = [projected for projected in (self._project(row, query.columns) for row in page)
+                    if projected is not None]
+            self.rows_read += len(data)
+            return FakeResponse(data, total if query.count else None)
@@ -0,0 +1,150 @@
+"""
+Import-Time Benchmark
+Guards the startup cost of the pipeline scripts
+Run with: python benchmarks/import_time.py [--runs 7] [--save-baseline] [--max-regression 0.25]
+
+Two checks:
+- Heavy modules (supabase, requests, bs4, numpy, ...) must not be loaded by importing a
+  module or by --help. This is deterministic and fails on any regression.
+- Median wall time of each case (minus bare interpreter startup) is compared with the
+  baseline saved on this machine by --save-baseline.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils import get_state_dir, print_step, safe_print
+
+BASELINE_FILE = 'import_time_baseline.json'
+
+# Modules that must only load when a command actually needs them
+HEAVY_MODULES = ('supabase', 'postgrest', 'httpx', 'dotenv', 'requests', 'bs4', 'numpy', 'pyarrow',
+                 'gspread', 'asyncio', 'http.server', 'cProfile', 'pstats', 'tracemalloc')
+
+# (name, python arguments, modules the case may load)
+CASES = [
+    ('import utils', ['-c', 'import utils'], ()),
+    ('import data_processor', ['-c', 'import data_processor'], ()),
+    ('import analytics', ['-c', 'import analytics'], ()),
+    ('import main', ['-c', 'import main'], ()),
+    ('main.py --help', ['main.py', '--help'], ()),
+    ('data_processor.py --help', ['data_processor.py', '--help'], ()),
+    ('analytics.py --help', ['analytics.py', '--help'], ()),
+    ('student_management.py --help', ['student_management.py', '--help'], ()),
+    ('update_points_assigned.py --help', ['update_points_assigned.py', '--help'], ()),
+    ('update_attendance.py --help', ['update_attendance.py', '--help'], ()),
+    ('publish_artifacts.py --help', ['publish_artifacts.py', '--help'], ()),
+]
+
+# Appended to a case to report which heavy modules it loaded
+MODULE_PROBE = (
+    "import atexit, json, sys\n"
+    "atexit.register(lambda: sys.__stderr__.write('HEAVY_MODULES=' + json.dumps("
+    "[m for m in {modules!r} if m in sys.modules]) + '\\n'))\n"
+)
+
+def run_case(args, probe=False):
+    """Run one case in a fresh interpreter; returns (seconds, heavy modules loaded or None)"""
+    if probe:
+        script = args[0] if not args[0].startswith('-') else None
+        code = MODULE_PROBE.format(modules=HEAVY_MODULES)
+        if script:
+            # Run the script as __main__ after installing the probe
+            code += f"sys.argv = {args!r}\nimport runpy\nrunpy.run_path({script!r}, run_name='__main__')\n"
+        else:
+            code += args[1] + "\n"
+        args = ['-c', code]
+
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+
+    if not probe:
+        return elapsed, None
+    for line in result.stderr.splitlines():
+        if line.startswith('HEAVY_MODULES='):
+            return elapsed, json.loads(line.split('=', 1)[1])
+    raise RuntimeError(f"Case failed to run:\n{result.stderr[-2000:]}")
+
+def measure(runs):
+    """Median seconds per case, relative to a bare interpreter start"""
+    startup = statistics.median(run_case(['-c', 'pass'])[0] for _ in range(runs))
+    results = {}
+    for name, args, _ in CASES:
+        samples = [run_case(args)[0] for _ in range(runs)]
+        results[name] = max(0.0, statistics.median(samples) - startup)
+    return startup, results
+
+def check_heavy_imports():
+    """Returns a list of (case, unexpected modules) for every case that loads heavy modules"""
+    failures = []
+    for name, args, allowed in CASES:
+        _, loaded = run_case(args, probe=True)
+        unexpected = [m for m in loaded if m not in allowed]
+        if unexpected:
+            failures.append((name, unexpected))
+    return failures
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Benchmark and guard the import time of the pipeline scripts')
+    parser.add_argument('--runs', type=int, default=7, help='Runs per case (median is used, default: 7)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save this run as the baseline for this machine')
+    parser.add_argument('--max-regression', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline (default: 0.25 = 25%%)')
+    parser.add_argument('--slack-ms', type=float, default=15.0,
+                        help='Absolute slowdown always allowed, for timer noise (default: 15 ms)')
+    args = parser.parse_args()
+
+    print_step("IMPORT GUARD", "Checking that heavy modules load only when needed")
+    failures = check_heavy_imports()
+    for name, modules in failures:
+        safe_print(f"[X] {name} loads {', '.join(modules)}")
+    if not failures:
+        safe_print(f"[OK] {len(CASES)} cases load none of: {', '.join(HEAVY_MODULES)}")
+
+    print_step("IMPORT TIME", f"Median of {args.runs} runs, interpreter startup subtracted")
+    startup, results = measure(args.runs)
+    baseline_path = os.path.join(get_state_dir(), BASELINE_FILE)
+    try:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['cases']
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+
+    regressions = []
+    print(f"  {'case':<36} {'ms':>8} {'baseline':>10}")
+    print(f"  {'(interpreter startup)':<36} {startup * 1000:>8.1f}")
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        marker = ''
+        if previous is not None:
+            limit = previous * (1 + args.max_regression) + args.slack_ms / 1000
+            if seconds > limit:
+                regressions.append(name)
+                marker = '  REGRESSION'
+        previous_text = f"{previous * 1000:.1f}" if previous is not None else '-'
+        print(f"  {name:<36} {seconds * 1000:>8.1f} {previous_text:>10}{marker}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'cases': results}, f, indent=2)
+        safe_print(f"[OK] Baseline saved to {baseline_path}")
+    elif not baseline:
+        print("No baseline yet: run with --save-baseline to record one for this machine")
+
+    if failures or regressions:
+        safe_print(f"\n[FAIL] {len(failures)} heavy import(s), {len(regressions)} time regression(s)")
+        sys.exit(1)
+    safe_print("\n[OK] Import time within budget")
+
+if __name__ == "__main__":
+    main()
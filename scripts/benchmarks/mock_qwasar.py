@@ -0,0 +1,392 @@
+"""
+Mock Qwasar Server
+Local stand-in for the Qwasar CAS login and profile pages, for scraper load tests
+Run with: python benchmarks/mock_qwasar.py [--port 8700] [--latency-ms 50] [--error-rate 0.01] [--rate-limit 20]
+
+Point the scraper at it with:
+    QWASAR_APP_URL=http://127.0.0.1:8700 QWASAR_CAS_URL=http://127.0.0.1:8700/cas
+    SCRAPER_USERNAME=mock SCRAPER_PASSWORD=mock
+
+The login flow follows the real platform request by request:
+    GET  /login                 302 to the CAS login, sets an anonymous _session_id
+    GET  /cas/login?service=    login form with the csrf-token meta and lt field, sets _appcas_session
+    POST /cas/login             "You are being redirected" page linking /users/service?ticket=ST-...
+    GET  /users/service?ticket  sets user.id and an authenticated _session_id
+    GET  /users/<username>      the profile page, or 302 to /login without a valid session
+
+Profiles are generated from the username, so expected_profile() tells a load test what the
+scraper should have parsed. GET /__stats returns request counts per route and status.
+"""
+
+import argparse
+import html
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MOCK_USERNAME = 'mock'
+MOCK_PASSWORD = 'mock'
+
+SEASON_LABELS = ['Preseason Web', 'Season 02 Software Engineer', 'Season 03 Software Engineer Golang',
+                 'Season 03 Software Engineer Rust', 'Final Project']
+PROJECT_NAMES = ['My Css Is Easy I', 'My Levenshtein', 'My Cat', 'My Ls', 'My Printf', 'My Tar', 'My Mastermind',
+                 'My Readline', 'My Bc', 'My Ngram', 'My Spaceship', 'My Blockchain', 'My Select', 'My Sqlite',
+                 'My Redis', 'My Tiny Url', 'My Bitcoin', 'My Users App', 'My Sudoku', 'My Ls Go']
+# Profile size -> (seasons shown, projects, activity rows)
+PROFILE_SIZES = {
+    'small': (1, 4, 5),
+    'typical': (3, 25, 40),
+    'large': (5, 250, 1200),
+}
+
+def _profile_rng(username, salt=''):
+    return random.Random(zlib.crc32(f"{salt}{username}".encode()))
+
+def profile_size(username):
+    """Mostly typical profiles, with some new students and some long-running ones"""
+    roll = _profile_rng(username, 'size').random()
+    return 'small' if roll < 0.2 else 'large' if roll > 0.9 else 'typical'
+
+def expected_profile(username, size=None):
+    """The data QwasarScraper.extract_student_data should return for this username"""
+    rng = _profile_rng(username)
+    seasons, project_count, _ = PROFILE_SIZES[size or profile_size(username)]
+
+    season_progress = {}
+    for position, label in enumerate(SEASON_LABELS[:seasons]):
+        season_progress[label] = '100%' if position < seasons - 1 else f"{rng.randint(0, 99)}%"
+
+    names = [PROJECT_NAMES[i] if i < len(PROJECT_NAMES) else f"{PROJECT_NAMES[i % len(PROJECT_NAMES)]} {i // len(PROJECT_NAMES) + 1}"
+             for i in range(project_count)]
+    done = max(0, project_count - rng.randint(1, 3))
+    login = datetime(2025, 1, 1) + timedelta(days=rng.randint(0, 600), minutes=rng.randint(0, 1439))
+
+    return {
+        'img_url': f"https://s3.amazonaws.com/qwasar-avatars/{username}.png",
+        'last_login': f"{login:%B} {login.day}, {login.year} {login.strftime('%I:%M%p').lstrip('0').lower()}",
+        'ongoing_projects': names[done:],
+        'completed_projects': names[:done],
+        'exercises_completed': str(rng.randint(0, 400)),
+        'points': str(rng.randint(0, 9000)),
+        'season_progress': season_progress,
+    }
+
+def _project_rows(names, state):
+    return ''.join(
+        f'<div class="border-b border-slate-800"><li class="flex gap-3 px-3 py-2 text-sm">'
+        f'<span class="w-4 text-slate-500">{i + 1}</span>'
+        f'<a href="/projects/{re.sub(r"[^a-z0-9]+", "-", name.lower())}">{html.escape(name)}</a>'
+        f'<span class="ml-auto text-slate-400">{state}</span></li></div>'
+        for i, name in enumerate(names))
+
+def render_profile(username, size=None):
+    """Profile page HTML laid out like the real one (the parts the scraper reads, plus filler)"""
+    size = size or profile_size(username)
+    profile = expected_profile(username, size)
+    activity_rows = PROFILE_SIZES[size][2]
+    rng = _profile_rng(username, 'activity')
+    name = html.escape(username)
+
+    cards = ''.join(
+        f'<div class="card card-with-header mb-4"><div class="card-header flex justify-between">'
+        f'<h2 class="text-xl font-semibold">{html.escape(label)}</h2><span class="badge">Track</span></div>'
+        f'<div class="card-body"><div class="w-full h-2 bg-slate-700 rounded">'
+        f'<div class="{"bg-green-500" if percent == "100%" else "bg-yellow-400"} h-2 rounded" style="width: {percent};"></div>'
+        f'</div><p class="text-sm text-slate-400">{percent} complete</p></div></div>'
+        for label, percent in profile['season_progress'].items())
+
+    activity = ''.join(
+        f'<tr class="border-b border-slate-800"><td>{(datetime(2025, 1, 1) + timedelta(hours=i * 7)):%Y-%m-%d %H:%M}</td>'
+        f'<td>{rng.choice(["Submitted", "Reviewed", "Started", "Commented on"])}</td>'
+        f'<td><a href="/projects/{rng.randint(1, 500)}">{html.escape(rng.choice(PROJECT_NAMES))}</a></td>'
+        f'<td class="text-right">{rng.randint(0, 100)}%</td></tr>'
+        for i in range(activity_rows))
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{name} | Qwasar</title>
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="csrf-token" content="{rng.getrandbits(128):032x}" />
+<link rel="stylesheet" href="/assets/application-6f1e2d.css">
+<script src="/assets/application-8a9b0c.js" defer></script>
+</head>
+<body class="bg-slate-900 text-slate-100">
+<nav class="flex items-center gap-2 px-6 py-3">
+<a href="/"><img src="/assets/logo.svg" height="32" alt="Qwasar"></a>
+<a href="/dashboard">Dashboard</a><a href="/projects">Projects</a><a href="/users/{name}">Profile</a>
+<a href="/logout" data-method="delete">Sign out</a>
+</nav>
+<main class="grid grid-cols-12 gap-6 p-6">
+<div class="col-span-4">
+<img src="{profile['img_url']}" height="256" width="256" class="rounded-full" alt="{name}">
+<h1 class="text-2xl">{name}</h1>
+<div class="flex items-center gap-2"><span>Member since</span><span>2024</span></div>
+<div class="flex items-center gap-2"><svg viewBox="0 0 20 20" class="h-5 w-5"><path d="M10 15l-5.878 3.09 1.123-6.545L.489 6.91l6.572-.955L10 0l2.939 5.955 6.572.955-4.756 4.635 1.123 6.545z"/></svg><span>Points</span><span>{profile['points']}</span></div>
+<ul class="mt-4">
+<li class="row flex"><span>Exercises Completed</span><span>{profile['exercises_completed']}</span></li>
+<li class="row flex justify-between"><span>Last sign in</span><span><time datetime="2025-01-01T00:00:00Z" data-format="%B %e, %Y %l:%M%P">{profile['last_login']}</time></span></li>
+</ul>
+</div>
+<div class="col-span-8">
+{cards}
+</div>
+<div class="col-span-full mt-6"><h2 class="text-lg">Projects In Progress</h2><ul>{_project_rows(profile['ongoing_projects'], 'In progress')}</ul></div>
+<div class="col-span-full mt-6"><h2 class="text-lg">Projects Completed</h2><ul>{_project_rows(profile['completed_projects'], 'Completed')}</ul></div>
+<div class="col-span-full mt-6"><h2 class="text-lg">Recent Activity</h2><table class="w-full text-sm"><tbody>{activity}</tbody></table></div>
+</main>
+<script>window.__CURRENT_USER__ = {json.dumps({'login': username, 'theme': 'dark'})};</script>
+</body>
+</html>
+"""
+
+def render_login_page(lt, csrf):
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Qwasar - Sign in</title>
+<meta name="csrf-token" content="{csrf}" />
+</head><body><h1>Sign in</h1>
+<form action="/cas/login" method="post">
+<input type="hidden" name="lt" id="lt" value="{lt}" autocomplete="off" />
+<input type="text" name="username"><input type="password" name="password">
+<button type="submit">Sign in</button>
+</form></body></html>
+"""
+
+class MockQwasarServer:
+    """
+    Threaded HTTP server emulating the Qwasar login and profile pages
+    latency/jitter: seconds added to every response; error_rate: share of requests answered
+    with 503; rate_limit: requests per second before answering 429 with Retry-After (0 = off);
+    session_ttl: seconds before a login session expires (0 = never).
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit=0.0,
+                 retry_after=1, session_ttl=0.0, profile_size=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.session_ttl = session_ttl
+        self.profile_size = profile_size
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self.login_tickets = {}   # lt -> csrf token
+        self.cas_sessions = set()
+        self.service_tickets = set()
+        self.sessions = {}        # _session_id -> expiry (None for anonymous sessions)
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def scraper_env(self):
+        """Environment variables that point QwasarScraper at this server"""
+        return {'QWASAR_APP_URL': self.url, 'QWASAR_CAS_URL': f"{self.url}/cas",
+                'SCRAPER_USERNAME': MOCK_USERNAME, 'SCRAPER_PASSWORD': MOCK_PASSWORD}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-qwasar', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts = {}
+            self.logins = 0
+            self.bytes_sent = 0
+
+    def stats(self):
+        with self._lock:
+            return {'requests': dict(self.counts), 'logins': self.logins, 'bytes_sent': self.bytes_sent}
+
+    def record(self, route, status, size):
+        with self._lock:
+            key = f"{route} {status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+            self.bytes_sent += size
+
+    def fault(self):
+        """The injected failure for this request, if any: (status, headers)"""
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+        with self._lock:
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+                self._refilled = now
+                if self._tokens < 1:
+                    return 429, {'Retry-After': str(self.retry_after)}
+                self._tokens -= 1
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 503, {}
+        return None
+
+    def new_session(self, authenticated):
+        session_id = secrets.token_hex(16)
+        with self._lock:
+            if authenticated:
+                self.sessions[session_id] = time.monotonic() + self.session_ttl if self.session_ttl else float('inf')
+                self.logins += 1
+            else:
+                self.sessions[session_id] = None
+        return session_id
+
+    def is_authenticated(self, cookies):
+        with self._lock:
+            expiry = self.sessions.get(cookies.get('_session_id'))
+        return bool(cookies.get('user.id')) and expiry is not None and time.monotonic() < expiry
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def cookies(self):
+                jar = {}
+                for part in self.headers.get('Cookie', '').split(';'):
+                    if '=' in part:
+                        key, value = part.strip().split('=', 1)
+                        jar[key] = value
+                return jar
+
+            def respond(self, route, status, body='', headers=None, cookies=None):
+                payload = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json' if route == 'stats' else 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                for key, value in (cookies or {}).items():
+                    self.send_header('Set-Cookie', f"{key}={value}; path=/; HttpOnly")
+                self.end_headers()
+                self.wfile.write(payload)
+                server.record(route, status, len(payload))
+
+            def redirect(self, route, location, cookies=None):
+                self.respond(route, 302, f'<html><body>You are being <a href="{location}">redirected</a>.</body></html>',
+                             {'Location': location}, cookies)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                if parts.path == '/__stats':
+                    return self.respond('stats', 200, json.dumps(server.stats()))
+
+                route = 'profile' if parts.path.startswith('/users/') and parts.path != '/users/service' \
+                    else parts.path.strip('/').replace('/', '_') or 'root'
+                failure = server.fault()
+                if failure:
+                    return self.respond(route, failure[0], f"<html><body>Error {failure[0]}</body></html>", failure[1])
+
+                if parts.path == '/login':
+                    service = f"{server.url}/users/service"
+                    return self.redirect(route, f"{server.url}/cas/login?service={service}",
+                                         {'_session_id': server.new_session(False)})
+
+                if parts.path == '/cas/login':
+                    lt, csrf = f"LT-{secrets.token_hex(12)}", secrets.token_urlsafe(32).replace('-', '+').replace('_', '/')
+                    cas_session = secrets.token_hex(16)
+                    with server._lock:
+                        server.login_tickets[lt] = csrf
+                        server.cas_sessions.add(cas_session)
+                    return self.respond(route, 200, render_login_page(lt, csrf), cookies={'_appcas_session': cas_session})
+
+                if parts.path == '/users/service':
+                    ticket = (query.get('ticket') or [''])[0]
+                    with server._lock:
+                        valid = ticket in server.service_tickets
+                        server.service_tickets.discard(ticket)
+                    if not valid:
+                        return self.redirect(route, f"{server.url}/login")
+                    return self.redirect(route, f"{server.url}/dashboard", {
+                        'user.id': secrets.token_hex(8), '_session_id': server.new_session(True)})
+
+                if parts.path.startswith('/users/'):
+                    if not server.is_authenticated(self.cookies()):
+                        return self.redirect(route, f"{server.url}/login")
+                    username = parts.path[len('/users/'):]
+                    return self.respond(route, 200, render_profile(username, server.profile_size))
+
+                self.respond(route, 404, '<html><body>Not found</body></html>')
+
+            def do_POST(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+                route = parts.path.strip('/').replace('/', '_')
+                failure = server.fault()
+                if failure:
+                    return self.respond(route, failure[0], f"<html><body>Error {failure[0]}</body></html>", failure[1])
+
+                if parts.path != '/cas/login':
+                    return self.respond(route, 404, '<html><body>Not found</body></html>')
+
+                with server._lock:
+                    csrf = server.login_tickets.pop(form.get('lt'), None)
+                    cas_ok = self.cookies().get('_appcas_session') in server.cas_sessions
+                valid = (csrf is not None and csrf == form.get('authenticity_token') and cas_ok
+                         and form.get('username') == MOCK_USERNAME and form.get('password') == MOCK_PASSWORD)
+                if not valid:
+                    # Wrong credentials show the form again, like the real CAS
+                    return self.respond(route, 200, render_login_page(f"LT-{secrets.token_hex(12)}", 'invalid'))
+
+                ticket = f"ST-{secrets.token_hex(12)}"
+                with server._lock:
+                    server.service_tickets.add(ticket)
+                self.respond(route, 303, f'<html><body>You are being <a href="{form["service"]}?ticket={ticket}">'
+                                         f'redirected</a>.</body></html>', {'Location': f"{form['service']}?ticket={ticket}"})
+
+        return Handler
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Run a local mock of the Qwasar login and profile pages')
+    parser.add_argument('--port', type=int, default=8700, help='Port to listen on (default: 8700)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the delay')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Requests per second before 429 (0 = off)')
+    parser.add_argument('--session-ttl', type=float, default=0.0, help='Seconds before sessions expire (0 = never)')
+    parser.add_argument('--profile-size', choices=list(PROFILE_SIZES), help='Serve only this profile size')
+    args = parser.parse_args()
+
+    server = MockQwasarServer(port=args.port, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                              error_rate=args.error_rate, rate_limit=args.rate_limit,
+                              session_ttl=args.session_ttl, profile_size=args.profile_size)
+    print(f"Mock Qwasar listening on {server.url}")
+    for key, value in server.scraper_env().items():
+        print(f"  {key}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Profile Parser Benchmarks
+Measures how fast QwasarScraper parses profile pages, per BeautifulSoup backend
+Run with: python benchmarks/parser_benchmarks.py [--backends html.parser lxml] [--save-baseline]
+
+Works on the anonymized profile fixtures in benchmarks/fixtures/ (small, typical and very large
+profiles, with the data each should parse to in profiles.json). For every backend and fixture:
+- pages/second for the full scrape_data_original, and the share spent building the soup
+- time per extractor (harvest_projects_original, harvest_block_original, ...) on a parsed soup
+- peak memory allocated while parsing one page (tracemalloc)
+- whether the parsed data matches the fixture's expected data
+
+Pages/second is compared with the baseline saved on this machine by --save-baseline. Exits 1
+on a regression or a wrong parse. --write-fixtures regenerates the corpus from mock_qwasar.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils import get_state_dir, print_step, safe_print
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+EXPECTED_FILE = 'profiles.json'
+BASELINE_FILE = 'parser_baseline.json'
+FIXTURE_SIZES = ('small', 'typical', 'large')
+
+# backend -> module it needs
+BACKENDS = {'html.parser': None, 'lxml': 'lxml', 'html5lib': 'html5lib'}
+
+# (name, extractor(scraper, soup)) in the order scrape_data_original runs them
+EXTRACTORS = [
+    ('img+login', lambda s, soup: (soup.find('img', {'height': '256'}),
+                                   soup.find('time', {'data-format': '%B %e, %Y %l:%M%P'}))),
+    ('in_progress', lambda s, soup: s.harvest_projects_original(soup)),
+    ('completed', lambda s, soup: s.harvest_projects_completed_original(soup)),
+    ('seasons', lambda s, soup: [s.harvest_block_original(card)
+                                 for card in soup.find_all('div', {'class': 'card-with-header'})]),
+    ('exercises', lambda s, soup: s.harvest_exercises_completed_original(soup)),
+    ('points', lambda s, soup: s.harvest_points_original(soup)),
+]
+
+def available_backends():
+    return [name for name, module in BACKENDS.items() if module is None or importlib.util.find_spec(module)]
+
+def fixture_path(size):
+    return os.path.join(FIXTURES_DIR, f"profile_{size}.html")
+
+def write_fixtures():
+    """Regenerate the fixture pages and their expected data from the mock server's renderer"""
+    from mock_qwasar import expected_profile, render_profile
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    expected = {}
+    for size in FIXTURE_SIZES:
+        username = f"anon-{size}"
+        with open(fixture_path(size), 'w', encoding='utf-8') as f:
+            f.write(render_profile(username, size))
+        expected[size] = expected_profile(username, size)
+    with open(os.path.join(FIXTURES_DIR, EXPECTED_FILE), 'w', encoding='utf-8') as f:
+        json.dump(expected, f, indent=2)
+    safe_print(f"[OK] Wrote {len(FIXTURE_SIZES)} fixtures to {FIXTURES_DIR}")
+
+def load_fixtures(sizes):
+    with open(os.path.join(FIXTURES_DIR, EXPECTED_FILE), encoding='utf-8') as f:
+        expected = json.load(f)
+    fixtures = {}
+    for size in sizes:
+        with open(fixture_path(size), encoding='utf-8') as f:
+            fixtures[size] = (f.read(), expected[size])
+    return fixtures
+
+def make_scraper(backend):
+    """A scraper for parsing only: no credentials, session or database needed"""
+    from data_processor import QwasarScraper
+
+    scraper = QwasarScraper.__new__(QwasarScraper)
+    scraper.html_parser = backend
+    return scraper
+
+def seconds_per_call(func, min_time, rounds=3):
+    """Best time per call over a few rounds, each running for at least min_time (like timeit)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=rounds, number=number)) / number
+
+def peak_allocation(func):
+    """Peak bytes allocated while func runs"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark(backend, html, expected, min_time):
+    """Measurements for one backend on one page"""
+    from bs4 import BeautifulSoup
+
+    scraper = make_scraper(backend)
+    parsed = scraper.extract_student_data(html, 'fixture')
+    soup = BeautifulSoup(html, backend)
+
+    page = seconds_per_call(lambda: scraper.scrape_data_original(html, 'fixture'), min_time)
+    return {
+        'page_ms': page * 1000,
+        'pages_per_second': 1 / page,
+        'soup_ms': seconds_per_call(lambda: BeautifulSoup(html, backend), min_time) * 1000,
+        'extractors_ms': {name: seconds_per_call(lambda: extract(scraper, soup), min_time) * 1000
+                          for name, extract in EXTRACTORS},
+        'peak_kb': peak_allocation(lambda: scraper.scrape_data_original(html, 'fixture')) / 1024,
+        'correct': parsed == expected,
+        'wrong_fields': sorted(key for key in expected if parsed.get(key) != expected[key]),
+    }
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Benchmark profile page parsing per BeautifulSoup backend')
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS),
+                        help='Backends to compare (default: every installed one)')
+    parser.add_argument('--fixtures', nargs='+', choices=FIXTURE_SIZES, default=list(FIXTURE_SIZES),
+                        help='Fixture sizes to parse (default: all)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Seconds each measurement runs for at least (default: 0.2)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save this run as the baseline for this machine')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed drop in pages/second against the baseline (default: 0.2 = 20%%)')
+    parser.add_argument('--write-fixtures', action='store_true', help='Regenerate the fixture corpus and exit')
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+
+    installed = available_backends()
+    backends = args.backends or installed
+    missing = [b for b in backends if b not in installed]
+    if missing:
+        print(f"Skipping backends that are not installed: {', '.join(missing)}")
+    backends = [b for b in backends if b in installed]
+    fixtures = load_fixtures(args.fixtures)
+
+    baseline_path = os.path.join(get_state_dir(), BASELINE_FILE)
+    try:
+        with open(baseline_path) as f:
+            baseline = json.load(f)['results']
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+
+    results = {}
+    regressions = []
+    wrong = []
+    for backend in backends:
+        print_step(f"PARSER: {backend}", f"Best of 3 rounds of at least {args.min_time:g}s per measurement")
+        print(f"  {'fixture':<9} {'KB':>6} {'pages/s':>8} {'baseline':>9} {'page ms':>8} {'soup ms':>8} "
+              + ''.join(f"{name:>12}" for name, _ in EXTRACTORS) + f" {'peak KB':>8}  parsed")
+        for size, (html, expected) in fixtures.items():
+            key = f"{backend}/{size}"
+            result = benchmark(backend, html, expected, args.min_time)
+            results[key] = result
+
+            previous = baseline.get(key, {}).get('pages_per_second')
+            marker = ''
+            if previous and result['pages_per_second'] < previous * (1 - args.max_regression):
+                regressions.append(key)
+                marker = '  REGRESSION'
+            if not result['correct']:
+                wrong.append(f"{key} ({', '.join(result['wrong_fields'])})")
+
+            previous_text = f"{previous:.1f}" if previous else '-'
+            print(f"  {size:<9} {len(html) / 1024:>6.0f} {result['pages_per_second']:>8.1f} {previous_text:>9} "
+                  f"{result['page_ms']:>8.2f} {result['soup_ms']:>8.2f} "
+                  + ''.join(f"{result['extractors_ms'][name]:>12.3f}" for name, _ in EXTRACTORS)
+                  + f" {result['peak_kb']:>8.0f}  {'ok' if result['correct'] else 'WRONG'}{marker}")
+
+    if args.save_baseline:
+        # Keep entries for backends/fixtures that were not part of this run
+        baseline.update(results)
+        with open(baseline_path, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'results': baseline}, f, indent=2)
+        safe_print(f"\n[OK] Baseline saved to {baseline_path}")
+    elif not baseline:
+        print("\nNo baseline yet: run with --save-baseline to record one for this machine")
+
+    for item in wrong:
+        safe_print(f"[X] Parsed wrongly: {item}")
+    if wrong or regressions:
+        safe_print(f"\n[FAIL] {len(wrong)} wrong parse(s), {len(regressions)} regression(s)")
+        sys.exit(1)
+    safe_print("\n[OK] Parser throughput within budget")
+
+if __name__ == "__main__":
+    main()
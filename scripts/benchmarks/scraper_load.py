@@ -0,0 +1,144 @@
+"""
+Scraper Load Test
+Drives QwasarScraper against the local mock server at several concurrency levels
+Run with: python benchmarks/scraper_load.py [--students 200] [--concurrency 1 4 8 16] [--latency-ms 80]
+
+The scraper logs in through the mock CAS flow once, then fetches and parses every profile
+with the given number of threads. Per level it reports pages/second, request latency,
+retries caused by 429/503 answers, re-logins and correctness: every parsed profile is
+compared with what the mock server rendered. Exits 1 if a profile was parsed wrongly.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils import print_step, safe_print
+from mock_qwasar import MockQwasarServer, PROFILE_SIZES, expected_profile
+
+def fetch_one(scraper, username, profile_size):
+    """Fetch one profile; returns (seconds, 'ok' | 'mismatch' | 'failed', detail)"""
+    started = time.perf_counter()
+    try:
+        data = scraper.fetch_profile(username)
+    except Exception as e:
+        return time.perf_counter() - started, 'failed', f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - started
+
+    expected = dict(expected_profile(username, profile_size), name=username)
+    if data != expected:
+        wrong = sorted(key for key in expected if data.get(key) != expected[key])
+        return elapsed, 'mismatch', f"{username}: {', '.join(wrong)}"
+    return elapsed, 'ok', None
+
+def run_level(scraper, server, usernames, concurrency, profile_size):
+    """Scrape every username with `concurrency` threads; returns the measurements"""
+    server.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda u: fetch_one(scraper, u, profile_size), usernames))
+    wall = time.perf_counter() - started
+
+    served = server.stats()
+    status_counts = {}
+    for key, count in served['requests'].items():
+        status = key.rsplit(' ', 1)[1]
+        status_counts[status] = status_counts.get(status, 0) + count
+
+    latencies = sorted(seconds for seconds, outcome, _ in results if outcome != 'failed')
+    return {
+        'concurrency': concurrency,
+        'wall_seconds': wall,
+        'pages_per_second': len(usernames) / wall if wall else 0.0,
+        'latency_p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'latency_p95_ms': latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0] * 1000 if latencies else None,
+        'ok': sum(1 for _, outcome, _ in results if outcome == 'ok'),
+        'mismatched': [detail for _, outcome, detail in results if outcome == 'mismatch'],
+        'failed': [detail for _, outcome, detail in results if outcome == 'failed'],
+        'throttled': status_counts.get('429', 0),
+        'server_errors': status_counts.get('503', 0),
+        'relogins': served['logins'],
+        'bytes': served['bytes_sent'],
+    }
+
+def print_results(results):
+    print(f"  {'threads':>7} {'pages/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'ok':>6} {'wrong':>6} {'failed':>7} "
+          f"{'429s':>6} {'503s':>6} {'logins':>7} {'MB':>7}")
+    for r in results:
+        p50 = f"{r['latency_p50_ms']:.0f}" if r['latency_p50_ms'] is not None else '-'
+        p95 = f"{r['latency_p95_ms']:.0f}" if r['latency_p95_ms'] is not None else '-'
+        print(f"  {r['concurrency']:>7} {r['pages_per_second']:>8.1f} {p50:>8} {p95:>8} {r['ok']:>6} "
+              f"{len(r['mismatched']):>6} {len(r['failed']):>7} {r['throttled']:>6} {r['server_errors']:>6} "
+              f"{r['relogins']:>7} {r['bytes'] / 1e6:>7.1f}")
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Load test the Qwasar scraper against a local mock server')
+    parser.add_argument('--students', type=int, default=200, help='Profiles fetched per level (default: 200)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16],
+                        help='Thread counts to test (default: 1 4 8 16)')
+    parser.add_argument('--latency-ms', type=float, default=80.0, help='Server delay per response (default: 80)')
+    parser.add_argument('--jitter-ms', type=float, default=20.0, help='Random +/- variation of the delay (default: 20)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 503')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='Server requests per second before 429 (0 = off)')
+    parser.add_argument('--session-ttl', type=float, default=0.0, help='Seconds before the login expires (0 = never)')
+    parser.add_argument('--profile-size', choices=list(PROFILE_SIZES), help='Serve only this profile size')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show scraper output')
+    args = parser.parse_args()
+
+    server = MockQwasarServer(latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                              error_rate=args.error_rate, rate_limit=args.rate_limit,
+                              session_ttl=args.session_ttl, profile_size=args.profile_size).start()
+    os.environ.update(server.scraper_env())
+
+    from data_processor import QwasarScraper
+
+    usernames = [f"student{i:07d}" for i in range(1, args.students + 1)]
+    sink = None if args.verbose else open(os.devnull, 'w')
+    results = []
+    try:
+        with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+            # The students table is never read: usernames come from the command line
+            scraper = QwasarScraper(supabase_client=object())
+            started = time.perf_counter()
+            scraper.login()
+            login_seconds = time.perf_counter() - started
+
+        print_step("SCRAPER LOAD TEST", f"{len(usernames)} profiles per level against {server.url} "
+                                        f"(login took {login_seconds * 1000:.0f} ms)")
+        for concurrency in args.concurrency:
+            with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+                results.append(run_level(scraper, server, usernames, concurrency, args.profile_size))
+        print_results(results)
+    finally:
+        server.stop()
+        if sink:
+            sink.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'students': args.students, 'latency_ms': args.latency_ms, 'error_rate': args.error_rate,
+                       'rate_limit': args.rate_limit, 'levels': results}, f, indent=2)
+        safe_print(f"[OK] Results written to {args.output}")
+
+    mismatched = [detail for r in results for detail in r['mismatched']]
+    for detail in mismatched[:10]:
+        safe_print(f"[X] Parsed wrongly: {detail}")
+    failed = sum(len(r['failed']) for r in results)
+    if failed:
+        print(f"{failed} profile(s) could not be fetched (see --error-rate / --rate-limit)")
+    if mismatched:
+        sys.exit(1)
+    safe_print("\n[OK] Every fetched profile was parsed correctly")
+
+if __name__ == "__main__":
+    main()
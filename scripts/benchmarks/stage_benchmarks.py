@@ -0,0 +1,165 @@
+"""
+Stage Benchmarks
+Runs the pipeline stages against synthetic data in an in-memory Supabase stand-in
+Run with: python benchmarks/stage_benchmarks.py [--students 1000 10000 100000] [--stages points analytics]
+
+For every population size and stage this reports wall and CPU time, database round trips and
+rows read/written, plus the wall time projected for a real network round trip (--rtt-ms).
+Round trips per student is the number to watch: anything that grows with the population is
+an N+1 query pattern that will dominate against the hosted database.
+
+Each stage starts from a fresh copy of the generated tables; stage output is silenced
+unless --verbose is given. Analytics state goes to a temporary directory.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils import print_step, safe_print
+from fake_supabase import FakeSupabase
+from synthetic_data import generate_dataset
+
+# Columns the database fills in on insert
+TABLE_DEFAULTS = {
+    'progress_snapshots': {'snapshot_date': lambda: datetime.now().isoformat()},
+    'student_season_progress_history': {'recorded_at': lambda: datetime.now().isoformat()},
+}
+
+def run_extra_data(db, dataset, workdir):
+    from data_processor import StudentDataProcessor
+    StudentDataProcessor(db).update_student_extra_data(dataset.scraped)
+
+def run_season_progress(db, dataset, workdir):
+    from data_processor import StudentDataProcessor
+    StudentDataProcessor(db).update_season_progress(dataset.scraped)
+
+def run_project_completion(db, dataset, workdir):
+    from data_processor import ProjectCompletionProcessor
+    ProjectCompletionProcessor(db).update_project_completion(dataset.scraped)
+
+def run_expected_seasons(db, dataset, workdir):
+    from student_management import StudentSeasonManager
+    StudentSeasonManager(db).update_expected_seasons()
+
+def run_points(db, dataset, workdir):
+    from update_points_assigned import PointsAssignmentManager
+    PointsAssignmentManager(db).update_all_student_points()
+
+def run_attendance(db, dataset, workdir):
+    from update_attendance import sync_attendance
+    path = dataset.write_attendance_csv(os.path.join(workdir, 'attendance.csv'))
+    sync_attendance(file_path=path, supabase=db)
+
+def run_risk_scoring(db, dataset, workdir):
+    from risk_scoring import RiskScoringEngine
+    RiskScoringEngine(db).run()
+
+def run_analytics(db, dataset, workdir):
+    from analytics import run_all_analytics
+    run_all_analytics(db)
+
+# name -> (description, runner(db, dataset, workdir))
+STAGES = {
+    'extra_data': ('Student extra data (data_processor)', run_extra_data),
+    'season_progress': ('Season progress + history (data_processor)', run_season_progress),
+    'project_completion': ('Project completion (data_processor)', run_project_completion),
+    'expected_seasons': ('Expected seasons (student_management)', run_expected_seasons),
+    'points': ('Points assignment (update_points_assigned)', run_points),
+    'attendance': ('Attendance file import (update_attendance)', run_attendance),
+    'analytics': ('Analytics (analytics)', run_analytics),
+    'risk_scoring': ('Risk scoring: load + score + write (risk_scoring)', run_risk_scoring),
+}
+
+def run_stage(name, dataset, workdir, latency=0.0, verbose=False):
+    """Run one stage on a fresh database; returns its measurements"""
+    db = FakeSupabase(dataset.copy_tables(), latency=latency, defaults=TABLE_DEFAULTS)
+    runner = STAGES[name][1]
+    error = None
+
+    sink = None if verbose else open(os.devnull, 'w')
+    started_wall = time.perf_counter()
+    started_cpu = time.process_time()
+    try:
+        with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+            runner(db, dataset, workdir)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        wall = time.perf_counter() - started_wall
+        cpu = time.process_time() - started_cpu
+        if sink:
+            sink.close()
+
+    result = {'stage': name, 'wall_seconds': wall, 'cpu_seconds': cpu, 'error': error}
+    result.update(db.stats())
+    return result
+
+def print_results(student_count, results, rtt):
+    print(f"  {'stage':<20} {'wall s':>8} {'cpu s':>8} {'requests':>9} {'req/stud':>9} "
+          f"{'rows read':>10} {'written':>9} {f'@{rtt * 1000:g}ms s':>10}")
+    for r in results:
+        if r['error']:
+            safe_print(f"  {r['stage']:<20} [ERROR] {r['error']}")
+            continue
+        projected = r['wall_seconds'] + r['requests'] * rtt
+        print(f"  {r['stage']:<20} {r['wall_seconds']:>8.2f} {r['cpu_seconds']:>8.2f} {r['requests']:>9} "
+              f"{r['requests'] / student_count:>9.3f} {r['rows_read']:>10} {r['rows_written']:>9} {projected:>10.1f}")
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Benchmark pipeline stages on synthetic data')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000],
+                        help='Population sizes to run (default: 1000 10000)')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES),
+                        help='Stages to run (default: all)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data (default: 42)')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Sleep this long on every database request (default: 0)')
+    parser.add_argument('--rtt-ms', type=float, default=20.0,
+                        help='Round trip used for the projected wall time column (default: 20)')
+    parser.add_argument('--output', help='Also write the results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='Show stage output')
+    args = parser.parse_args()
+
+    report = {'started_at': datetime.now().isoformat(), 'seed': args.seed, 'latency_ms': args.latency_ms,
+              'runs': []}
+
+    with tempfile.TemporaryDirectory(prefix='stage-bench-') as workdir:
+        # Keep analytics snapshots and caches out of the real state directory
+        os.environ['PIPELINE_STATE_DIR'] = workdir
+
+        for student_count in args.students:
+            started = time.perf_counter()
+            dataset = generate_dataset(student_count, seed=args.seed)
+            print_step(f"{student_count} STUDENTS",
+                       f"Generated {len(dataset.tables['student_season_progress'])} progress rows, "
+                       f"{len(dataset.attendance_records)} attendance responses in "
+                       f"{time.perf_counter() - started:.1f}s")
+
+            results = []
+            for name in args.stages:
+                results.append(run_stage(name, dataset, workdir, args.latency_ms / 1000, args.verbose))
+            print_results(student_count, results, args.rtt_ms / 1000)
+            report['runs'].append({'students': student_count, 'results': results})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        safe_print(f"[OK] Results written to {args.output}")
+
+    failed = [r['stage'] for run in report['runs'] for r in run['results'] if r['error']]
+    if failed:
+        safe_print(f"\n[FAIL] {len(failed)} stage run(s) failed: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Synthetic Pipeline Data
+Deterministic fake programs, cohorts, seasons, projects and students for benchmarks
+
+generate_dataset(n) returns the database tables plus what the outside world would send:
+scraped Qwasar profiles (same shape as QwasarScraper output) and attendance form responses.
+Season and project names match the real ones so the name mappings are exercised.
+"""
+
+import csv
+import random
+from datetime import date, datetime, timedelta
+
+# program id -> (name, seasons in order); scraped labels differ for the Season 03 variants
+PROGRAMS = {
+    1: ('Software Engineering', ['Preseason Web', 'Season 02 Software Engineer', 'Season 03 Software Engineer Go',
+                                 'Season 03 Software Engineer Rust', 'Season 03 Software Engineer Cpp', 'Final Project']),
+    2: ('Data Science', ['Preseason Data', 'Season 02 Data Science', 'Season 03 Data Science',
+                         'Season 03 Machine Learning', 'Final Project']),
+}
+PROJECTS_PER_SEASON = 12
+# Real names of projects shared by several seasons (see ProjectCompletionProcessor)
+SHARED_PROJECTS = ('My Css Is Easy I', 'My Levenshtein', 'My Cat')
+SEASON_DAYS = 120
+STUDENTS_PER_COHORT = 200
+STATUSES = ('On Track', 'At Risk', 'Monitor', 'Unknown')
+SESSION_TYPES = ('Workshop', 'Stand-up', 'Mentoring')
+FIRST_NAMES = ('Ana', 'Ben', 'Chen', 'Dara', 'Eli', 'Femi', 'Gus', 'Hana', 'Ivo', 'Jun', 'Kai', 'Lea')
+LAST_NAMES = ('Silva', 'Jansen', 'Okafor', 'Rossi', 'Novak', 'Kim', 'Haddad', 'Berg', 'Costa', 'Mori')
+
+class SyntheticDataset:
+    """Tables plus scraped profiles and attendance responses for one generated population"""
+
+    def __init__(self, tables, scraped, attendance_records):
+        self.tables = tables
+        self.scraped = scraped
+        self.attendance_records = attendance_records
+
+    def copy_tables(self):
+        """Fresh row dicts, so every benchmark run starts from the same state"""
+        return {name: [dict(row) for row in rows] for name, rows in self.tables.items()}
+
+    def write_attendance_csv(self, path):
+        fields = ['Timestamp', 'Email Address', 'Session Type', 'Session Date']
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.attendance_records)
+        return path
+
+def relative_time(rng, now):
+    """A last-login string in one of the forms the profile pages use"""
+    choice = rng.random()
+    if choice < 0.45:
+        return f"{rng.randint(2, 29)} days ago"
+    if choice < 0.55:
+        return rng.choice(['a day ago', 'an hour ago', 'a month ago', 'a year ago'])
+    if choice < 0.7:
+        return f"{rng.randint(2, 11)} months ago"
+    if choice < 0.8:
+        return f"{rng.randint(2, 23)} hours ago"
+    moment = now - timedelta(days=rng.randint(0, 700), minutes=rng.randint(0, 1440))
+    return f"{moment:%B} {moment.day}, {moment.year} {moment.strftime('%I:%M%p').lstrip('0').lower()}"
+
+def generate_dataset(student_count, seed=42, today=None, responses_per_student=8):
+    """Generate a reproducible population of student_count students"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=12)
+
+    tables = {name: [] for name in (
+        'programs', 'seasons', 'cohorts', 'program_cohort_seasons', 'projects', 'students',
+        'student_season_progress', 'student_project_completion', 'student_season_progress_history',
+        'progress_snapshots', 'cohort_progress_snapshots',
+    )}
+
+    # Programs, seasons and their projects
+    season_ids = {}
+    projects_by_season = {}
+    for program_id, (program_name, seasons) in PROGRAMS.items():
+        tables['programs'].append({'id': program_id, 'name': program_name})
+        for season_name in seasons:
+            season_id = len(tables['seasons']) + 1
+            tables['seasons'].append({'id': season_id, 'name': season_name, 'program_id': program_id})
+            season_ids[(program_id, season_name)] = season_id
+            names = [f"{season_name} Project {i:02d}" for i in range(1, PROJECTS_PER_SEASON + 1)]
+            if season_name.startswith(('Preseason', 'Season 02')):
+                names[:len(SHARED_PROJECTS)] = SHARED_PROJECTS
+            projects_by_season[season_id] = []
+            for name in names:
+                project_id = len(tables['projects']) + 1
+                tables['projects'].append({'id': project_id, 'name': name, 'season_id': season_id})
+                projects_by_season[season_id].append(name)
+
+    # Cohorts start every two months; each runs the program's seasons back to back
+    cohorts_per_program = max(2, -(-student_count // (STUDENTS_PER_COHORT * len(PROGRAMS))))
+    cohorts = []
+    for program_id, (_, seasons) in PROGRAMS.items():
+        for i in range(cohorts_per_program):
+            cohort_id = len(tables['cohorts']) + 1
+            start = today - timedelta(days=60 * (i % 12) + 7 * (i // 12))
+            tables['cohorts'].append({'id': cohort_id, 'name': f"Cohort {start:%b %Y} #{cohort_id}",
+                                      'start_date': start.isoformat()})
+            cohorts.append((cohort_id, program_id))
+            for position, season_name in enumerate(seasons):
+                season_start = start + timedelta(days=SEASON_DAYS * position)
+                tables['program_cohort_seasons'].append({
+                    'id': len(tables['program_cohort_seasons']) + 1,
+                    'program_id': program_id, 'cohort_id': cohort_id,
+                    'season_id': season_ids[(program_id, season_name)],
+                    'start_date': season_start.isoformat(),
+                    'end_date': (season_start + timedelta(days=SEASON_DAYS - 1)).isoformat(),
+                })
+
+    scraped = []
+    attendance_records = []
+    session_dates = [(today - timedelta(days=d)).strftime('%d/%m/%Y') for d in range(181)]
+    for student_id in range(1, student_count + 1):
+        cohort_id, program_id = cohorts[student_id % len(cohorts)]
+        seasons = PROGRAMS[program_id][1]
+        username = f"student{student_id:07d}"
+        email = f"{username}@example.edu"
+        reached = rng.randint(0, len(seasons) - 1)
+        current_season_id = season_ids[(program_id, seasons[reached])]
+        workshops, mentoring, standups = rng.randint(0, 20), rng.randint(0, 10), rng.randint(0, 40)
+
+        tables['students'].append({
+            'id': student_id, 'username': username, 'email': email,
+            'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+            'program_id': program_id, 'cohort_id': cohort_id,
+            'current_season_id': current_season_id, 'expected_season_id': None,
+            'status': rng.choice(STATUSES), 'account_status': 'Active',
+            'points': rng.randint(0, 5000), 'exercises_completed': rng.randint(0, 300),
+            'last_login': (now - timedelta(days=rng.randint(0, 90))).isoformat(),
+            'workshops_attended': workshops, 'mentoring_attended': mentoring, 'standup_attended': standups,
+            'points_assigned': 0, 'profile_image_url': None,
+        })
+
+        season_progress = {}
+        completed_projects = []
+        ongoing_projects = []
+        for position, season_name in enumerate(seasons[:reached + 1]):
+            season_id = season_ids[(program_id, season_name)]
+            progress = 100 if position < reached else rng.randint(0, 99)
+            tables['student_season_progress'].append({
+                'id': len(tables['student_season_progress']) + 1,
+                'student_id': student_id, 'season_id': season_id,
+                'progress_percentage': progress, 'is_completed': progress >= 100,
+                'completion_date': today.isoformat() if progress >= 100 else None,
+                'updated_at': now.isoformat(),
+            })
+            # The profile page shows the Season 03 track without its language suffix for Go
+            label = 'Season 03 Software Engineer Golang' if season_name.endswith(' Go') else season_name
+            # Scraped progress moves on a little since the last run
+            season_progress[label] = f"{min(100, progress + rng.randint(0, 3))}%"
+
+            names = projects_by_season[season_id]
+            done = len(names) if position < reached else rng.randint(0, len(names) - 1)
+            completed_projects += names[:done]
+            ongoing_projects += names[done:done + 1]
+
+        scraped.append({
+            'name': username,
+            'img_url': f"https://example.edu/avatars/{username}.png",
+            'last_login': relative_time(rng, now),
+            'ongoing_projects': ongoing_projects,
+            'completed_projects': list(dict.fromkeys(completed_projects)),
+            'exercises_completed': str(rng.randint(0, 300)),
+            'points': str(rng.randint(0, 5000)),
+            'season_progress': season_progress,
+        })
+
+        for _ in range(rng.randint(0, responses_per_student * 2)):
+            days_back, minute = rng.randint(0, 180), rng.randint(540, 1260)
+            session_date = session_dates[days_back]
+            attendance_records.append(((-days_back, minute), {
+                'Timestamp': f"{session_date} {minute // 60:02d}:{minute % 60:02d}:00",
+                'Email Address': email if rng.random() > 0.02 else f"unknown{student_id}@example.edu",
+                'Session Type': rng.choice(SESSION_TYPES),
+                'Session Date': session_date,
+            }))
+
+    # Form responses arrive in submission order
+    attendance_records.sort(key=lambda pair: pair[0])
+    return SyntheticDataset(tables, scraped, [record for _, record in attendance_records])
@@ -0,0 +1,269 @@
+"""
+Pipeline Daemon
+Keeps the orchestrator running and starts each job on its own schedule (main.py --daemon)
+
+Stages run in-process, so the Supabase client, the logged-in scraper session and the lookup
+caches stay warm between runs. Each job drops only the lookup maps listed in its
+refresh_lookups (e.g. the scrape job reloads the student maps, which change as students are
+added); the other maps are reused until a job that refreshes them runs. Last run times are kept in the state directory, so a
+restart does not rerun jobs that ran recently.
+
+Endpoints (127.0.0.1 only):
+- /healthz: JSON status of every job (503 while shutting down or when a job keeps failing)
+- /metrics: Prometheus text with the latest stage metrics and per-job counters
+"""
+
+import json
+import re
+import signal
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import print_step, safe_print, load_state, save_state
+from metrics import RunMetrics
+
+DAEMON_STATE_FILE = 'daemon_state.json'
+# A job that failed this many times in a row makes /healthz report unhealthy
+MAX_CONSECUTIVE_FAILURES = 3
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+def parse_schedule(spec):
+    """
+    Parse a job schedule: an interval ('90s', '30m', '6h', '1d') or a daily time ('02:00')
+    Returns: ('every', seconds) or ('daily', (hour, minute))
+    """
+    spec = spec.strip().lower()
+    match = re.fullmatch(r'(\d+)([smhd])', spec)
+    if match:
+        return 'every', int(match.group(1)) * UNITS[match.group(2)]
+    match = re.fullmatch(r'([01]?\d|2[0-3]):([0-5]\d)', spec)
+    if match:
+        return 'daily', (int(match.group(1)), int(match.group(2)))
+    raise ValueError(f"Invalid schedule '{spec}' (use e.g. 30m, 6h or 02:00)")
+
+class DaemonJob:
+    """A pipeline stage graph that runs on a schedule"""
+
+    def __init__(self, name, title, stages, schedule, priority=0, refresh_lookups=()):
+        self.name = name
+        self.title = title
+        self.stages = stages
+        # LookupCache entries reloaded before each run of this job
+        self.refresh_lookups = tuple(refresh_lookups)
+        self.kind, self.every = parse_schedule(schedule)
+        self.schedule = schedule
+        # Lower runs first when several jobs are due
+        self.priority = priority
+        self.next_run = None
+        self.last_run = None
+        self.last_success = None
+        self.last_duration = None
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+    def schedule_next(self, now):
+        """Set next_run from the last run (or now, for a job that never ran)"""
+        if self.kind == 'every':
+            self.next_run = self.last_run + timedelta(seconds=self.every) if self.last_run else now
+            return
+
+        hour, minute = self.every
+        latest_slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if latest_slot > now:
+            latest_slot -= timedelta(days=1)
+        # Catch up once on a slot missed while the daemon was down
+        missed = self.last_run is not None and self.last_run < latest_slot
+        self.next_run = now if missed else latest_slot + timedelta(days=1)
+
+    def status(self):
+        return {
+            'schedule': self.schedule,
+            'priority': self.priority,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+            'last_success': self.last_success,
+            'last_duration_seconds': self.last_duration,
+            'next_run': self.next_run.isoformat() if self.next_run else None,
+            'runs': self.runs,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+        }
+
+class PipelineDaemon:
+    """Runs DaemonJobs with one warm orchestrator until SIGTERM/SIGINT"""
+
+    def __init__(self, orchestrator, jobs, health_port=8765, metrics_dir=None):
+        self.orchestrator = orchestrator
+        self.jobs = sorted(jobs, key=lambda job: job.priority)
+        self.health_port = health_port
+        self.metrics_dir = metrics_dir or orchestrator.run_metrics.metrics_dir
+        self.started_at = datetime.now()
+        self.running_job = None
+        self.stage_metrics = {}
+        self.last_report = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def request_stop(self, signum=None, frame=None):
+        """Finish the running job, then exit (a second signal stops immediately)"""
+        if self._stop.is_set():
+            raise KeyboardInterrupt
+        name = signal.Signals(signum).name if signum else 'stop request'
+        safe_print(f"\n[STOP] {name} received, shutting down after the current job...")
+        self._stop.set()
+
+    def _load_state(self):
+        state = load_state(DAEMON_STATE_FILE, {})
+        now = datetime.now()
+        for job in self.jobs:
+            last_run = state.get(job.name, {}).get('last_run')
+            if last_run:
+                job.last_run = datetime.fromisoformat(last_run)
+                job.last_success = state[job.name].get('last_success')
+            job.schedule_next(now)
+
+    def _save_state(self):
+        try:
+            save_state(DAEMON_STATE_FILE, {
+                job.name: {'last_run': job.last_run.isoformat(), 'last_success': job.last_success}
+                for job in self.jobs if job.last_run
+            })
+        except OSError as e:
+            print(f"Warning: could not save daemon state: {e}")
+
+    def run_job(self, job):
+        """Run one job (after dropping its refresh_lookups) and record its outcome"""
+        print_step(f"DAEMON: {job.title}", f"Scheduled {job.schedule}")
+        with self._lock:
+            self.running_job = job.name
+        # One metrics report per job run
+        self.orchestrator.run_metrics = RunMetrics(self.metrics_dir)
+
+        started = datetime.now()
+        try:
+            # invalidate() without names would drop every map
+            if job.refresh_lookups:
+                self.orchestrator.context.lookups.invalidate(*job.refresh_lookups)
+            success = self.orchestrator.run_pipeline(job.title, job.stages)
+        except Exception as e:
+            safe_print(f"[ERROR] Job {job.name} crashed: {e}")
+            success = False
+        self.orchestrator.write_metrics(success)
+
+        with self._lock:
+            self.running_job = None
+            job.last_run = started
+            job.last_success = success
+            job.last_duration = round((datetime.now() - started).total_seconds(), 1)
+            job.runs += 1
+            if success:
+                job.consecutive_failures = 0
+            else:
+                job.failures += 1
+                job.consecutive_failures += 1
+            self.stage_metrics.update(self.orchestrator.run_metrics.stages)
+            self.last_report = self.orchestrator.run_metrics.report(success)
+        job.schedule_next(datetime.now())
+        self._save_state()
+        safe_print(f"[{'OK' if success else 'WARN'}] Job {job.name} finished, next run at {job.next_run:%Y-%m-%d %H:%M}")
+        return success
+
+    def run(self):
+        """Main loop: run due jobs by priority, sleep until the next one is due"""
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        self._load_state()
+        self.start_health_server()
+
+        print_step("DAEMON", f"{len(self.jobs)} job(s): " + ', '.join(f"{job.name} ({job.schedule})" for job in self.jobs))
+        for job in self.jobs:
+            print(f"  {job.name:<12} next run {job.next_run:%Y-%m-%d %H:%M}")
+
+        try:
+            while not self._stop.is_set():
+                now = datetime.now()
+                due = [job for job in self.jobs if job.next_run <= now]
+                if due:
+                    # Re-check the schedule after each job: a higher-priority job may be due again
+                    self.run_job(due[0])
+                    continue
+                wait_seconds = min((job.next_run - now).total_seconds() for job in self.jobs)
+                self._stop.wait(max(1.0, wait_seconds))
+        finally:
+            self.stop_health_server()
+            print_step("DAEMON STOPPED", f"Up {datetime.now() - self.started_at}")
+
+    # Health and metrics endpoint
+    def health(self):
+        with self._lock:
+            jobs = {job.name: job.status() for job in self.jobs}
+            running = self.running_job
+        failing = [name for name, job in jobs.items() if job['consecutive_failures'] >= MAX_CONSECUTIVE_FAILURES]
+        status = 'stopping' if self._stop.is_set() else 'failing' if failing else 'ok'
+        return status == 'ok', {
+            'status': status,
+            'started_at': self.started_at.isoformat(),
+            'uptime_seconds': round((datetime.now() - self.started_at).total_seconds()),
+            'running_job': running,
+            'jobs': jobs,
+        }
+
+    def prometheus_text(self):
+        with self._lock:
+            # Run gauges describe the last job; stage gauges the latest run of every stage
+            report = dict(self.last_report or {'wall_seconds': None, 'success': True}, stages=dict(self.stage_metrics))
+            jobs = [(job.name, job.status(), job.last_run) for job in self.jobs]
+
+        lines = [RunMetrics.prometheus_text(report).rstrip('\n')]
+        for name, kind, help_text, value in (
+            ('pipeline_daemon_job_runs_total', 'counter', 'Runs of the job since the daemon started', lambda s, _: s['runs']),
+            ('pipeline_daemon_job_failures_total', 'counter', 'Failed runs of the job since the daemon started', lambda s, _: s['failures']),
+            ('pipeline_daemon_job_last_success', 'gauge', 'Whether the last run of the job succeeded', lambda s, _: None if s['last_success'] is None else int(s['last_success'])),
+            ('pipeline_daemon_job_last_run_timestamp_seconds', 'gauge', 'Unix time the job last started', lambda _, last: round(last.timestamp()) if last else None),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{job="{job}"}} {value(status, last)}' for job, status, last in jobs
+                      if value(status, last) is not None]
+        return '\n'.join(lines) + '\n'
+
+    def start_health_server(self):
+        if not self.health_port:
+            return
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/healthz':
+                    healthy, body = daemon.health()
+                    self._send(200 if healthy else 503, 'application/json', json.dumps(body, indent=2))
+                elif self.path == '/metrics':
+                    self._send(200, 'text/plain; version=0.0.4', daemon.prometheus_text())
+                else:
+                    self._send(404, 'text/plain', 'Not found\n')
+
+            def _send(self, status, content_type, body):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                # Keep probes out of the pipeline output
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.health_port), Handler)
+        except OSError as e:
+            print(f"Warning: health endpoint disabled, could not listen on port {self.health_port}: {e}")
+            return
+        threading.Thread(target=self._server.serve_forever, name='daemon-health', daemon=True).start()
+        safe_print(f"[OK] Health endpoint on http://127.0.0.1:{self.health_port}/healthz (metrics on /metrics)")
+
+    def stop_health_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
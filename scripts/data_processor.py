@@ -8,36 +8,63 @@ import argparse
 import sys
 import os
 import json
-import requests
 import time
 import re
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
+import threading
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
 
 # Import our utilities
 from utils import (
-    get_supabase_client, map_season_name_to_db, parse_relative_time_to_timestamp,
+    get_supabase_client, get_season_resolver, parse_timestamps,
     load_scraped_data, get_student_id_map, get_project_id_map, get_season_id_map,
-    safe_upsert, safe_update, print_step, safe_print
+    safe_upsert, safe_update, print_step, safe_print, fetch_all_rows, LookupCache, load_env
 )
+from profiling import add_profile_arguments, profile_main
+from metrics import HTTP_HOOKS, record_http_response
+
+# Overridable (QWASAR_APP_URL / QWASAR_CAS_URL) to run against benchmarks/mock_qwasar.py
+QWASAR_APP_URL = 'https://upskill.us.qwasar.io'
+QWASAR_CAS_URL = 'https://casapp.us.qwasar.io'
 
 class QwasarScraper:
     """Handles web scraping from Qwasar platform"""
     
+    # Profile requests answered with these are retried (Retry-After is honoured)
+    RETRY_STATUSES = {429, 502, 503, 504}
+    MAX_RETRIES = 3
+    MAX_RETRY_DELAY = 30
+    
+    # BeautifulSoup backend: 'html.parser' (built in), 'lxml' or 'html5lib' (SCRAPER_HTML_PARSER)
+    html_parser = 'html.parser'
+    
     def __init__(self, supabase_client=None):
+        # requests and bs4 are imported where they are used, so non-scraping runs never load them
+        import requests
+        
+        load_env()
         self.username = os.getenv('SCRAPER_USERNAME')
         self.password = os.getenv('SCRAPER_PASSWORD')
         
         if not self.username or not self.password:
             raise ValueError("SCRAPER_USERNAME and SCRAPER_PASSWORD must be set in environment")
         
+        self.app_url = os.getenv('QWASAR_APP_URL', QWASAR_APP_URL).rstrip('/')
+        self.cas_url = os.getenv('QWASAR_CAS_URL', QWASAR_CAS_URL).rstrip('/')
+        self.service_url = f"{self.app_url}/users/service"
+        self.html_parser = os.getenv('SCRAPER_HTML_PARSER', self.html_parser)
+        self._login_lock = threading.Lock()
+        
         self.session = requests.Session()
+        self.session.hooks['response'].append(record_http_response)
         self.supabase = supabase_client or get_supabase_client()
     
     def get_auth_token(self):
         """Get authentication token for login"""
-        url = "https://casapp.us.qwasar.io/login"
-        params = {"service": "https%3A%2F%2Fupskill.us.qwasar.io%2Fusers%2Fservice"}
+        import requests
+        
+        url = f"{self.cas_url}/login"
+        params = {"service": quote(self.service_url, safe='')}
         headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:109.0) Gecko/20100101 Firefox/110.0",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
@@ -102,7 +129,9 @@ class QwasarScraper:
     
     def get_tokens(self):
         """Original working token method from scraper.py"""
-        url = 'https://upskill.us.qwasar.io/login'
+        import requests
+        
+        url = f"{self.app_url}/login"
         headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:109.0) Gecko/20100101 Firefox/110.0',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
@@ -117,21 +146,21 @@ class QwasarScraper:
             'Te': 'trailers'
         }
 
-        response = requests.get(url, headers=headers, allow_redirects=False)
+        response = requests.get(url, headers=headers, allow_redirects=False, hooks=HTTP_HOOKS)
         sessionIdCookies = response.cookies
         
         auth_token, lt_value, appcas_session = self.get_auth_token()
         
-        url = 'https://casapp.us.qwasar.io/login'
+        url = f"{self.cas_url}/login"
         cookies = {'_appcas_session': appcas_session}
         headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.14; rv:109.0) Gecko/20100101 Firefox/110.0',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
             'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
             'Accept-Encoding': 'gzip, deflate',
-            'Referer': 'https://casapp.us.qwasar.io/login?service=https%3A%2F%2Fupskill.us.qwasar.io%2Fusers%2Fservice',
+            'Referer': f"{self.cas_url}/login?service={quote(self.service_url, safe='')}",
             'Content-Type': 'application/x-www-form-urlencoded',
-            'Origin': 'https://casapp.us.qwasar.io',
+            'Origin': self.cas_url,
             'Dnt': '1',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
@@ -144,12 +173,13 @@ class QwasarScraper:
         data = {
             'authenticity_token': auth_token,
             'lt': lt_value,
-            'service': 'https://upskill.us.qwasar.io/users/service',
+            'service': self.service_url,
             'username': self.username,
             'password': self.password,
         }
 
-        res = requests.post(url, cookies=cookies, headers=headers, data=data, allow_redirects=False)
+        res = requests.post(url, cookies=cookies, headers=headers, data=data, allow_redirects=False,
+                            hooks=HTTP_HOOKS)
         
         match = re.search(r'<a\s+href="(.*?)">', res.text)
         if not match:
@@ -157,7 +187,8 @@ class QwasarScraper:
 
         redirect_url = match.group(1)
         session_cookies = {'_session_id': sessionIdCookies.get('_session_id')}
-        res = requests.get(redirect_url, headers=headers, cookies=session_cookies, allow_redirects=False)
+        res = requests.get(redirect_url, headers=headers, cookies=session_cookies, allow_redirects=False,
+                           hooks=HTTP_HOOKS)
         
         user_id = res.cookies.get('user.id')
         session_id = res.cookies.get('_session_id')
@@ -168,6 +199,56 @@ class QwasarScraper:
         """Get session cookies"""
         return getattr(self, 'session_cookies', {})
     
+    def relogin(self, stale_cookies):
+        """Log in again unless another thread already replaced the expired session"""
+        with self._login_lock:
+            if self.get_session_cookies() == stale_cookies and not self.login():
+                raise Exception("Re-login failed")
+    
+    def get_with_retry(self, url):
+        """GET a page with the session cookies, waiting out throttling (429) and transient 5xx errors"""
+        import requests
+        
+        for attempt in range(self.MAX_RETRIES + 1):
+            response = requests.get(url, cookies=self.get_session_cookies(), hooks=HTTP_HOOKS)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.MAX_RETRIES:
+                break
+            
+            retry_after = response.headers.get('Retry-After', '')
+            delay = float(retry_after) if retry_after.isdigit() else 2 ** attempt
+            print(f"  HTTP {response.status_code} for {url}, retrying in {min(delay, self.MAX_RETRY_DELAY):g}s")
+            time.sleep(min(delay, self.MAX_RETRY_DELAY))
+        
+        response.raise_for_status()
+        return response
+    
+    def is_login_page(self, response):
+        """True if a profile request ended on the login page instead"""
+        return 'login' in response.url.lower() or 'sign in' in response.text.lower()[:500]
+    
+    def fetch_profile(self, student_id):
+        """Download and parse one student's profile page (safe to call from several threads)"""
+        url = f"{self.app_url}/users/{student_id}"
+        cookies = self.get_session_cookies()
+        response = self.get_with_retry(url)
+        
+        # Check if we're actually logged in
+        if self.is_login_page(response):
+            print(f"WARNING: Appears to be redirected to login page!")
+            print(f"Current URL: {response.url}")
+            print(f"Response length: {len(response.text)} characters")
+            # Try to re-login
+            self.relogin(cookies)
+            response = self.get_with_retry(url)
+            if self.is_login_page(response):
+                # Parsing the login form would store an empty profile
+                raise Exception("Still redirected to login page after re-login")
+        
+        # Extract data from the page
+        student_data = self.extract_student_data(response.text, student_id)
+        student_data['name'] = student_id
+        return student_data
+    
     def get_student_usernames(self, limit=None, exclude_inactive=True):
         """Fetch student usernames from Supabase database"""
         try:
@@ -214,8 +295,6 @@ class QwasarScraper:
     
     def extract_student_data(self, html_content, student_id):
         """Extract data from a student's profile page using original working logic"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
         # Use the exact working scrape function from original scraper
         data = self.scrape_data_original(html_content, student_id)
         
@@ -231,12 +310,14 @@ class QwasarScraper:
     
     def scrape_data_original(self, text, student_id):
         """Original working scrape function from scraper.py"""
+        from bs4 import BeautifulSoup
+        
         dic = {}
         seasons_data = {}  # Only for seasons
         ongoing_projects = []
         completed_projects = []
 
-        soup = BeautifulSoup(text, 'html.parser')
+        soup = BeautifulSoup(text, self.html_parser)
         # Locate all card elements
         cards = soup.find_all('div', {'class': 'card-with-header'})
 
@@ -494,7 +575,8 @@ class QwasarScraper:
         print_step("SCRAPING", "Extracting student data from Qwasar platform")
     
         try:
-            if not self.login():
+            # A long-running process keeps its session; expired sessions are re-logged below
+            if not self.get_session_cookies() and not self.login():
                 raise Exception("Login failed")
             
             # Get student IDs dynamically from database
@@ -507,7 +589,6 @@ class QwasarScraper:
                 raise Exception("No student usernames found to scrape")
             
             scraped_data = []
-            base_url = "https://upskill.us.qwasar.io/users/"
             
             print(f"Starting to scrape {len(student_ids)} students...")
             
@@ -517,27 +598,7 @@ class QwasarScraper:
                     print(f"Scraping student {i}/{len(student_ids)}: {student_id}")
                     print(f"{'='*60}")
                     
-                    # Get student profile page using cookies directly
-                    url = base_url + student_id
-                    cookies = self.get_session_cookies()
-                    response = requests.get(url, cookies=cookies)
-                    response.raise_for_status()
-                    
-                    # Check if we're actually logged in
-                    if 'login' in response.url.lower() or 'sign in' in response.text.lower()[:500]:
-                        print(f"WARNING: Appears to be redirected to login page!")
-                        print(f"Current URL: {response.url}")
-                        print(f"Response length: {len(response.text)} characters")
-                        # Try to re-login
-                        if self.login():
-                            cookies = self.get_session_cookies()
-                            response = requests.get(url, cookies=cookies)
-                        else:
-                            raise Exception("Re-login failed")
-                    
-                    # Extract data from the page
-                    student_data = self.extract_student_data(response.text, student_id)
-                    student_data['name'] = student_id
+                    student_data = self.fetch_profile(student_id)
                     
                     scraped_data.append(student_data)
                     
@@ -576,18 +637,19 @@ class QwasarScraper:
 class StudentDataProcessor:
     """Handles student data updates including extra data and season progress"""
     
-    def __init__(self, supabase_client):
+    def __init__(self, supabase_client, lookups=None):
         self.supabase = supabase_client
-        self.student_id_map = get_student_id_map(supabase_client)
-        self.season_id_map = get_season_id_map(supabase_client)
+        lookups = lookups or LookupCache(supabase_client)
+        self.student_id_map = lookups.get('student_id_map', get_student_id_map)
+        self.season_id_map = lookups.get('season_id_map', get_season_id_map)
         
         # Get student program mapping for season filtering
-        self.student_program_map = self._get_student_program_map()
+        self.student_program_map = lookups.get('student_program_map', self._get_student_program_map)
         
-        # Get seasons grouped by program for proper filtering
-        self.seasons_by_program = self._get_seasons_by_program()
+        # Scraped season labels -> season ids, per program
+        self.season_resolver = lookups.get('season_resolver', get_season_resolver)
     
-    def _get_student_program_map(self):
+    def _get_student_program_map(self, supabase_client=None):
         """Get mapping of student_id to program_id"""
         try:
             response = self.supabase.from_('students').select('id, program_id').execute()
@@ -596,28 +658,16 @@ class StudentDataProcessor:
             print(f"Error fetching student program mapping: {e}")
             return {}
     
-    def _get_seasons_by_program(self):
-        """Get seasons grouped by program_id"""
-        try:
-            response = self.supabase.from_('seasons').select('id, name, program_id').execute()
-            seasons_by_program = {}
-            for row in response.data:
-                program_id = row['program_id']
-                if program_id not in seasons_by_program:
-                    seasons_by_program[program_id] = {}
-                seasons_by_program[program_id][row['name']] = row['id']
-            return seasons_by_program
-        except Exception as e:
-            print(f"Error fetching seasons by program: {e}")
-            return {}
-    
     def update_student_extra_data(self, scraped_data):
         """Update student extra information (last login, points, etc.)"""
         print_step("STUDENT EXTRA DATA", "Updating student details, points, and login info")
         
         records_to_update = []
         
-        for student_data in scraped_data:
+        # Convert the whole last_login column at once, relative to one "now" for the run
+        last_logins = parse_timestamps([student_data.get("last_login") for student_data in scraped_data])
+        
+        for student_data, last_login_timestamp in zip(scraped_data, last_logins):
             username = student_data.get("name")
             if not username or username not in self.student_id_map:
                 continue
@@ -628,10 +678,8 @@ class StudentDataProcessor:
             update_record = {"id": student_id}
             
             # Handle last login
-            if "last_login" in student_data:
-                last_login_timestamp = parse_relative_time_to_timestamp(student_data["last_login"])
-                if last_login_timestamp:
-                    update_record["last_login"] = last_login_timestamp
+            if last_login_timestamp:
+                update_record["last_login"] = last_login_timestamp
             
             # Handle current season - infer from season_progress
             season_progress = student_data.get("season_progress", {})
@@ -641,18 +689,17 @@ class StudentDataProcessor:
 
                 if not student_program_id:
                     print(f"Warning: No program found for student {username}, cannot determine current season")
-                elif student_program_id not in self.seasons_by_program:
+                elif not self.season_resolver.has_program(student_program_id):
                     print(f"Warning: No seasons found for program {student_program_id}")
                 else:
-                    # Get seasons that belong to this student's program
-                    program_seasons = self.seasons_by_program[student_program_id]
-
                     # Filter season_progress to only include seasons from the student's program
                     filtered_season_progress = {}
+                    season_ids = {}
                     for season_name, progress_str in season_progress.items():
-                        mapped_season = map_season_name_to_db(season_name)
-                        if mapped_season and mapped_season in program_seasons:
+                        season_id = self.season_resolver.season_id(season_name, student_program_id)
+                        if season_id:
                             filtered_season_progress[season_name] = progress_str
+                            season_ids[season_name] = season_id
 
                     if not filtered_season_progress:
                         print(f"Warning: No program-relevant seasons found for {username} in season_progress: {season_progress}")
@@ -693,16 +740,10 @@ class StudentDataProcessor:
                             current_season_name = last_season_name
                             print(f"All seasons 100% complete for {username}, using last season: {current_season_name}")
 
-                        # Map and set current season
+                        # Set current season (only seasons of the student's program are left)
                         if current_season_name:
-                            mapped_season = map_season_name_to_db(current_season_name)
-                            season_id = program_seasons.get(mapped_season)
-
-                            if season_id:
-                                update_record["current_season_id"] = season_id
-                                print(f"Set current season for {username}: {current_season_name} (progress: {filtered_season_progress.get(current_season_name)})")
-                            else:
-                                print(f"Warning: Season '{mapped_season}' not found in program {student_program_id} for student {username}")
+                            update_record["current_season_id"] = season_ids[current_season_name]
+                            print(f"Set current season for {username}: {current_season_name} (progress: {filtered_season_progress.get(current_season_name)})")
             
             # Handle other fields
             if "img_url" in student_data:
@@ -715,6 +756,7 @@ class StudentDataProcessor:
             if len(update_record) > 1:  # More than just the ID
                 records_to_update.append(update_record)
 
+        self.season_resolver.report_unknown("Student extra data")
         if records_to_update:
             safe_update(self.supabase, 'students', records_to_update)
         else:
@@ -739,24 +781,19 @@ class StudentDataProcessor:
                 print(f"Warning: No program found for student {username}")
                 continue
             
-            # Get seasons for this student's specific program
-            program_seasons = self.seasons_by_program.get(student_program_id, {})
-            if not program_seasons:
+            if not self.season_resolver.has_program(student_program_id):
                 print(f"Warning: No seasons found for program {student_program_id}")
                 continue
             
             # Process season progress data
             season_progress = student_data.get("season_progress", {})
             for season_name, progress_data in season_progress.items():
-                mapped_season_name = map_season_name_to_db(season_name)
-                if not mapped_season_name:
+                if not season_name:
                     continue
                 
-                # IMPORTANT: Only match seasons from the student's program
-                season_id = program_seasons.get(mapped_season_name)
+                # IMPORTANT: Only match seasons from the student's program (others are reported below)
+                season_id = self.season_resolver.season_id(season_name, student_program_id)
                 if not season_id:
-                    # Skip seasons that don't belong to this student's program
-                    print(f"Skipping season '{mapped_season_name}' - not found in program {student_program_id} for student {username}")
                     continue
                 
                 # Handle progress_data - could be string percentage or dict
@@ -788,13 +825,64 @@ class StudentDataProcessor:
                 
                 records_to_upsert.append(progress_record)
         
+        self.season_resolver.report_unknown("Season progress")
         if records_to_upsert:
-            safe_upsert(self.supabase, 'student_season_progress', records_to_upsert, 
-                       on_conflict="student_id, season_id")
+            # Work out which values changed before the upsert overwrites them
+            history_records = self._get_progress_changes(records_to_upsert)
+
+            if safe_upsert(self.supabase, 'student_season_progress', records_to_upsert,
+                           on_conflict="student_id, season_id"):
+                self._record_progress_history(history_records)
             safe_print(f"[OK] Updated {len(records_to_upsert)} season progress records")
         else:
             print("No season progress records to update")
     
+    def _get_progress_changes(self, records):
+        """Build progress history rows for records whose percentage differs from the stored one"""
+        try:
+            existing_rows = fetch_all_rows(
+                self.supabase, 'student_season_progress', 'id, student_id, season_id, progress_percentage'
+            )
+        except Exception as e:
+            print(f"Error fetching existing season progress, skipping history: {e}")
+            return []
+
+        existing = {
+            (row['student_id'], row['season_id']): row.get('progress_percentage')
+            for row in existing_rows
+        }
+
+        # recorded_at is a timestamptz, so send an explicit UTC offset
+        recorded_at = datetime.now(timezone.utc).isoformat()
+        history_records = []
+        for record in records:
+            previous = existing.get((record['student_id'], record['season_id']))
+            if previous is not None and float(previous) == float(record['progress_percentage']):
+                continue
+            history_records.append({
+                "student_id": record['student_id'],
+                "season_id": record['season_id'],
+                "progress_percentage": record['progress_percentage'],
+                # Value before this change: velocity uses it as the value at the start of its window
+                "previous_percentage": previous,
+                "recorded_at": recorded_at,
+            })
+        return history_records
+    
+    def _record_progress_history(self, history_records, chunk_size=500):
+        """Append changed progress values to the append-only progress history table"""
+        if not history_records:
+            print("No season progress changes to record in history")
+            return
+
+        try:
+            for start in range(0, len(history_records), chunk_size):
+                self.supabase.from_('student_season_progress_history') \
+                    .insert(history_records[start:start + chunk_size]).execute()
+            safe_print(f"[OK] Recorded {len(history_records)} progress changes in history")
+        except Exception as e:
+            print(f"Error recording season progress history: {e}")
+    
     def cleanup_incorrect_season_progress(self):
         """Remove student season progress records where the season doesn't belong to the student's program"""
         print_step("CLEANUP", "Removing incorrect cross-program season progress records")
@@ -838,10 +926,11 @@ class StudentDataProcessor:
 class ProjectCompletionProcessor:
     """Handles project completion data updates"""
     
-    def __init__(self, supabase_client):
+    def __init__(self, supabase_client, lookups=None):
         self.supabase = supabase_client
-        self.student_id_map = get_student_id_map(supabase_client)
-        self.project_id_map = get_project_id_map(supabase_client)
+        lookups = lookups or LookupCache(supabase_client)
+        self.student_id_map = lookups.get('student_id_map', get_student_id_map)
+        self.project_id_map = lookups.get('project_id_map', get_project_id_map)
     
     # Projects that appear in multiple seasons and should be marked complete across all
     MULTI_SEASON_PROJECTS = {"My Css Is Easy I", "My Levenshtein", "My Cat"}
@@ -909,6 +998,53 @@ class ProjectCompletionProcessor:
         else:
             print("No project completion records to update")
 
+def scrape_and_save(supabase, limit=None, include_inactive=False, scraper=None):
+    """
+    Scrape Qwasar and save the result to public/student_grades.json
+    Pass a scraper to reuse its logged-in session (e.g. from the daemon).
+    """
+    scraper = scraper or QwasarScraper(supabase_client=supabase)
+    scraped_data = scraper.scrape_student_data(limit=limit, include_inactive=include_inactive)
+
+    # Save scraped data to the correct path
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    json_path = os.path.join(script_dir, '..', 'public', 'student_grades.json')
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(scraped_data, f, indent=2, ensure_ascii=False)
+    safe_print(f"[OK] Saved scraped data to {json_path}")
+    return scraped_data
+
+def process_data(supabase, scraped_data, students=False, projects=False, progress=False, cleanup=False,
+                 lookups=None):
+    """
+    Run the selected processing steps on scraped data
+    lookups is an optional shared LookupCache; one is created per call otherwise.
+    """
+    lookups = lookups or LookupCache(supabase)
+    student_processor = None
+    
+    # Process student extra data
+    if students:
+        student_processor = StudentDataProcessor(supabase, lookups)
+        student_processor.update_student_extra_data(scraped_data)
+    
+    # Process project completion
+    if projects:
+        project_processor = ProjectCompletionProcessor(supabase, lookups)
+        project_processor.update_project_completion(scraped_data)
+    
+    # Process season progress
+    if progress:
+        student_processor = student_processor or StudentDataProcessor(supabase, lookups)
+        student_processor.update_season_progress(scraped_data)
+    
+    # Clean up incorrect cross-program records
+    if cleanup:
+        student_processor = student_processor or StudentDataProcessor(supabase, lookups)
+        student_processor.cleanup_incorrect_season_progress()
+
 def main():
     """Main function with CLI argument parsing"""
     parser = argparse.ArgumentParser(description='Process student data from Qwasar platform')
@@ -921,6 +1057,7 @@ def main():
     parser.add_argument('--limit', type=int, help='Limit number of students to scrape (for testing)')
     parser.add_argument('--include-inactive', action='store_true', help='Include inactive students in scraping')
     
+    add_profile_arguments(parser)
     args = parser.parse_args()
     
     # If no specific flags are provided, show help
@@ -934,19 +1071,7 @@ def main():
         
         # Load or scrape data
         if args.scrape or args.all:
-            scraper = QwasarScraper(supabase_client=supabase)
-            scraped_data = scraper.scrape_student_data(
-                limit=args.limit if hasattr(args, 'limit') else None,
-                include_inactive=args.include_inactive if hasattr(args, 'include_inactive') else False
-            )
-            # Save scraped data to the correct path
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            json_path = os.path.join(script_dir, '..', 'public', 'student_grades.json')
-            os.makedirs(os.path.dirname(json_path), exist_ok=True)
-            
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(scraped_data, f, indent=2, ensure_ascii=False)
-            safe_print(f"[OK] Saved scraped data to {json_path}")
+            scraped_data = scrape_and_save(supabase, limit=args.limit, include_inactive=args.include_inactive)
         else:
             scraped_data = load_scraped_data()
         
@@ -954,25 +1079,13 @@ def main():
             print("No data available to process")
             return
         
-        # Process student extra data
-        if args.students or args.all:
-            student_processor = StudentDataProcessor(supabase)
-            student_processor.update_student_extra_data(scraped_data)
-        
-        # Process project completion
-        if args.projects or args.all:
-            project_processor = ProjectCompletionProcessor(supabase)
-            project_processor.update_project_completion(scraped_data)
-        
-        # Process season progress
-        if args.progress or args.all:
-            student_processor = StudentDataProcessor(supabase)
-            student_processor.update_season_progress(scraped_data)
-        
-        # Clean up incorrect cross-program records
-        if args.cleanup or args.all:
-            student_processor = StudentDataProcessor(supabase)
-            student_processor.cleanup_incorrect_season_progress()
+        process_data(
+            supabase, scraped_data,
+            students=args.students or args.all,
+            projects=args.projects or args.all,
+            progress=args.progress or args.all,
+            cleanup=args.cleanup or args.all,
+        )
         
         print_step("COMPLETED", "All selected operations completed successfully")
         
@@ -981,4 +1094,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile_main('data_processor', main)
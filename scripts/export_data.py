@@ -0,0 +1,203 @@
+"""
+Columnar Data Export
+Exports the raw student tables and the analytics aggregates as Parquet or Arrow files
+Run with: python export_data.py [--format parquet|arrow] [--output DIR] [--tables students ...]
+
+Every run writes a full snapshot of each dataset as a new hive-style partition:
+
+    exports/<dataset>/snapshot_date=YYYY-MM-DD/part-0.parquet
+
+Re-running on the same day replaces that day's partition. Partitions older than
+--keep-days (default DEFAULT_KEEP_DAYS) are deleted after each run, so the directory holds
+a bounded history instead of growing by a full copy of every table per day. The result can be read
+without touching the database, e.g. with pyarrow.dataset.dataset(path, partitioning='hive')
+or pandas.read_parquet(path). Arrow (.arrow) files are written uncompressed so they can be
+memory-mapped. Requires pyarrow (pip install -r requirements-optional.txt).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timedelta
+
+# Import our utilities
+from utils import get_supabase_client, fetch_all_rows, print_step, safe_print
+from analytics import CohortAnalyticsCube
+
+# Raw tables exported as-is
+EXPORT_TABLES = ('students', 'student_season_progress', 'student_project_completion')
+
+DEFAULT_EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exports')
+
+FILE_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+# Daily partitions kept per dataset (0 keeps all of them)
+DEFAULT_KEEP_DAYS = 30
+PARTITION_PREFIX = 'snapshot_date='
+
+def import_pyarrow():
+    """Import pyarrow lazily so the rest of the pipeline does not depend on it"""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exporting requires pyarrow (pip install -r requirements-optional.txt)")
+    return pyarrow
+
+class ColumnarExporter:
+    """Writes table snapshots and aggregates as dated Parquet/Arrow partitions"""
+
+    def __init__(self, supabase_client, output_dir=None, file_format='parquet', keep_days=DEFAULT_KEEP_DAYS):
+        self.supabase = supabase_client
+        self.output_dir = output_dir or os.environ.get('PIPELINE_EXPORT_DIR') or DEFAULT_EXPORT_DIR
+        self.file_format = file_format
+        self.keep_days = keep_days
+        self.pa = import_pyarrow()
+
+    def _partition_path(self, dataset, snapshot_date):
+        directory = os.path.join(self.output_dir, dataset, f"{PARTITION_PREFIX}{snapshot_date}")
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"part-0.{FILE_EXTENSIONS[self.file_format]}")
+
+    def write(self, dataset, rows, snapshot_date):
+        """
+        Write rows as one partition of a dataset (atomically, replacing that day's file)
+        Returns: path of the written file, or None if there was nothing to write
+        """
+        if not rows:
+            print(f"  {dataset}: no rows, skipped")
+            return None
+
+        table = self.pa.Table.from_pylist(rows)
+        path = self._partition_path(dataset, snapshot_date)
+        tmp_path = f"{path}.tmp"
+
+        if self.file_format == 'parquet':
+            self.pa.parquet.write_table(table, tmp_path, compression='zstd')
+        else:
+            # Uncompressed IPC files can be memory-mapped without decoding
+            self.pa.feather.write_feather(table, tmp_path, compression='uncompressed')
+
+        os.replace(tmp_path, path)
+        print(f"  {dataset}: {table.num_rows} rows, {table.num_columns} columns -> {path}")
+        return path
+
+    @staticmethod
+    def _flatten_cohorts(cohorts):
+        """Turn the nested status_counts of cohort roll-ups into status_<name> columns"""
+        statuses = sorted({status for entry in cohorts.values() for status in entry.get('status_counts', {})})
+        rows = []
+        for entry in cohorts.values():
+            row = {key: value for key, value in entry.items() if key != 'status_counts'}
+            counts = entry.get('status_counts', {})
+            for status in statuses:
+                row[f"status_{status.lower().replace(' ', '_')}"] = counts.get(status, 0)
+            rows.append(row)
+        return rows
+
+    def export_tables(self, tables, snapshot_date):
+        """Export full snapshots of the raw tables"""
+        written = {}
+        for table_name in tables:
+            rows = fetch_all_rows(self.supabase, table_name)
+            written[table_name] = self.write(table_name, rows, snapshot_date)
+        return written
+
+    def export_aggregates(self, snapshot_date, rebuild=False):
+        """Export the analytics cube cells and cohort roll-ups"""
+        cube = CohortAnalyticsCube(self.supabase).build() if rebuild else CohortAnalyticsCube.load()
+        if not cube:
+            print("  No analytics cube found (run analytics.py --cube or pass --rebuild-cube)")
+            return {}
+
+        generated_at = cube.get('generated_at')
+        cells = [{**cell, 'generated_at': generated_at} for cell in cube['cells']]
+        cohorts = [{**row, 'generated_at': generated_at} for row in self._flatten_cohorts(cube['cohorts'])]
+        return {
+            'cube_cells': self.write('cube_cells', cells, snapshot_date),
+            'cube_cohorts': self.write('cube_cohorts', cohorts, snapshot_date),
+        }
+
+    def prune(self, datasets, today):
+        """
+        Delete partitions older than keep_days from the given datasets
+        Returns: number of partitions removed
+        """
+        if not self.keep_days:
+            return 0
+
+        cutoff = (today - timedelta(days=self.keep_days - 1)).isoformat()
+        removed = 0
+        for dataset in datasets:
+            dataset_dir = os.path.join(self.output_dir, dataset)
+            if not os.path.isdir(dataset_dir):
+                continue
+            for name in os.listdir(dataset_dir):
+                # ISO dates compare correctly as strings
+                if name.startswith(PARTITION_PREFIX) and name[len(PARTITION_PREFIX):] < cutoff:
+                    shutil.rmtree(os.path.join(dataset_dir, name))
+                    removed += 1
+        return removed
+
+    def run(self, tables=EXPORT_TABLES, aggregates=True, rebuild_cube=False):
+        """Export the selected tables and aggregates for today"""
+        today = datetime.now().date()
+        snapshot_date = today.isoformat()
+        print_step("COLUMNAR EXPORT", f"Writing {self.file_format} partition snapshot_date={snapshot_date}")
+
+        try:
+            written = self.export_tables(tables, snapshot_date)
+            if aggregates:
+                written.update(self.export_aggregates(snapshot_date, rebuild=rebuild_cube))
+        except Exception as e:
+            print(f"Error exporting data: {e}")
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest_path = os.path.join(self.output_dir, '_last_export.json')
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'exported_at': datetime.now().isoformat(),
+                'snapshot_date': snapshot_date,
+                'format': self.file_format,
+                'files': {name: path for name, path in written.items() if path},
+            }, f, indent=2)
+
+        safe_print(f"[OK] Exported {sum(1 for path in written.values() if path)} datasets to {self.output_dir}")
+
+        # Only datasets written by this run are pruned, so a failed export never empties a history
+        removed = self.prune([name for name, path in written.items() if path], today)
+        if removed:
+            print(f"Removed {removed} partitions older than {self.keep_days} days")
+        return written
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Export tables and analytics aggregates to Parquet/Arrow')
+    parser.add_argument('--format', choices=sorted(FILE_EXTENSIONS), default='parquet', help='Output file format')
+    parser.add_argument('--output', help='Export directory (default: scripts/exports or PIPELINE_EXPORT_DIR)')
+    parser.add_argument('--tables', nargs='+', choices=EXPORT_TABLES, default=list(EXPORT_TABLES),
+                        help='Raw tables to export (default: all)')
+    parser.add_argument('--no-aggregates', action='store_true', help='Skip the analytics cube datasets')
+    parser.add_argument('--rebuild-cube', action='store_true', help='Rebuild the analytics cube before exporting it')
+    parser.add_argument('--keep-days', type=int, default=DEFAULT_KEEP_DAYS,
+                        help=f'Days of partitions to keep per dataset, 0 keeps all (default: {DEFAULT_KEEP_DAYS})')
+
+    args = parser.parse_args()
+
+    try:
+        supabase = get_supabase_client(service_role=True)
+        exporter = ColumnarExporter(supabase, output_dir=args.output, file_format=args.format,
+                                    keep_days=args.keep_days)
+        if exporter.run(tables=args.tables, aggregates=not args.no_aggregates,
+                        rebuild_cube=args.rebuild_cube) is None:
+            sys.exit(1)
+    except Exception as e:
+        safe_print(f"\n[ERROR] Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -8,98 +8,493 @@ import argparse
 import sys
 import subprocess
 import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 
 # Import our utilities
-from utils import print_step, safe_print
+from utils import get_supabase_client, get_state_dir, print_step, safe_print, load_scraped_data, LookupCache
+from metrics import METRICS_FILE_ENV, RunMetrics, StageTimer
+from profiling import add_profile_arguments, new_run_dir, StageProfiler
+
+class PipelineContext:
+    """Shared client and lookup caches for stages that run inside the orchestrator process"""
+    
+    def __init__(self):
+        self.supabase = get_supabase_client(service_role=True)
+        self.lookups = LookupCache(self.supabase)
+        self._scraper = None
+    
+    @property
+    def scraper(self):
+        """Qwasar scraper whose login session is reused by later scrapes"""
+        if self._scraper is None:
+            from data_processor import QwasarScraper
+            self._scraper = QwasarScraper(supabase_client=self.supabase)
+        return self._scraper
+
+class StageOutput:
+    """
+    Line-by-line stage output with a [stage] prefix and an optional per-stage log file
+    Subprocess output is fed in through emit(). In in-process mode this object replaces
+    sys.stdout: each thread writes on behalf of the stage it is running (see begin()), and
+    partial writes are buffered per thread so lines from parallel stages never mix.
+    """
+    
+    def __init__(self, stream, log_dir=None):
+        self.stream = stream
+        self.log_dir = log_dir
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._logs = {}
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+    
+    def open_log(self, stage):
+        """
+        Start the stage's log file; returns True if this call opened it
+        A log that is already open (e.g. an in-process stage running a script) is kept as is.
+        """
+        if not self.log_dir:
+            return False
+        with self._lock:
+            if stage in self._logs:
+                return False
+            self._logs[stage] = open(os.path.join(self.log_dir, f"{stage}.log"), 'w', encoding='utf-8')
+            return True
+    
+    def close_log(self, stage):
+        with self._lock:
+            log = self._logs.pop(stage, None)
+        if log:
+            log.close()
+    
+    def emit(self, stage, line):
+        """Write one complete line for a stage"""
+        with self._lock:
+            self.stream.write(f"[{stage}] {line}\n" if stage else f"{line}\n")
+            self.stream.flush()
+            log = self._logs.get(stage)
+            if log:
+                log.write(f"{line}\n")
+                log.flush()
+    
+    def begin(self, stage):
+        """Attribute everything the current thread prints to stage (in-process mode)"""
+        self.flush_thread()
+        self._local.stage = stage
+        self.open_log(stage)
+    
+    def end(self):
+        """Stop attributing the current thread's output to its stage"""
+        stage = getattr(self._local, 'stage', None)
+        self.flush_thread()
+        self._local.stage = None
+        self.close_log(stage)
+    
+    def flush_thread(self):
+        partial = getattr(self._local, 'partial', '')
+        if partial:
+            self._local.partial = ''
+            self.emit(getattr(self._local, 'stage', None), partial)
+    
+    # File-like interface used when installed as sys.stdout
+    def write(self, text):
+        *lines, partial = (getattr(self._local, 'partial', '') + text).split('\n')
+        self._local.partial = partial
+        stage = getattr(self._local, 'stage', None)
+        for line in lines:
+            self.emit(stage, line)
+        return len(text)
+    
+    def flush(self):
+        self.stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# One node of the pipeline graph: depends_on lists the names of upstream stages.
+# An optional stage's failure is reported as 'soft-failed': it neither fails the run nor
+# blocks the stages downstream of it (they run on the data already in the database).
+PipelineStage = namedtuple('PipelineStage', ['name', 'script', 'args', 'depends_on', 'optional'],
+                           defaults=(False,))
+
+class StageScheduler:
+    """
+    Runs pipeline stages as a dependency graph
+    A stage starts as soon as all of its upstream stages succeeded, up to max_workers at a
+    time. When a stage fails, everything downstream of it is skipped, and unrelated
+    branches keep running. Optional stages that fail don't block anything.
+    """
+    
+    def __init__(self, run_stage, stages, max_workers=3):
+        self.run_stage = run_stage
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max(1, max_workers)
+        self.results = {}
+        self.durations = {}
+        self._validate()
+    
+    def _validate(self):
+        """Reject unknown dependencies and cycles before anything runs"""
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+        
+        visiting, done = set(), set()
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+        for name in self.stages:
+            visit(name)
+    
+    def _execute(self, stage):
+        print_step(stage.name.upper(), f"Running {stage.script}")
+        started = time.perf_counter()
+        try:
+            ok = self.run_stage(stage.script, stage.args)
+        except Exception as e:
+            safe_print(f"[ERROR] {stage.name} raised: {e}")
+            ok = False
+        return ok, time.perf_counter() - started
+    
+    def _skip_blocked(self, pending):
+        """Mark stages with a failed or skipped upstream as skipped (transitively)"""
+        blocked = True
+        while blocked:
+            blocked = False
+            for name, stage in list(pending.items()):
+                upstream = [d for d in stage.depends_on if self.results.get(d) in ('failed', 'skipped')]
+                if upstream:
+                    del pending[name]
+                    self.results[name] = 'skipped'
+                    safe_print(f"[SKIP] {name} (upstream failed: {', '.join(upstream)})")
+                    blocked = True
+    
+    def run(self):
+        """
+        Run every stage
+        Returns: dict of {stage name: 'success' | 'soft-failed' | 'failed' | 'skipped'}
+        """
+        pending = dict(self.stages)
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                self._skip_blocked(pending)
+                
+                for name, stage in list(pending.items()):
+                    if all(self.results.get(d) in ('success', 'soft-failed') for d in stage.depends_on):
+                        del pending[name]
+                        running[pool.submit(self._execute, stage)] = name
+                
+                if not running:
+                    break
+                
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    ok, elapsed = future.result()
+                    optional = self.stages[name].optional
+                    self.results[name] = 'success' if ok else 'soft-failed' if optional else 'failed'
+                    self.durations[name] = elapsed
+                    if ok:
+                        safe_print(f"[OK] {name} completed successfully ({elapsed:.1f}s)")
+                    elif optional:
+                        safe_print(f"[WARN] {name} failed ({elapsed:.1f}s), non-fatal: downstream stages still run")
+                    else:
+                        safe_print(f"[ERROR] {name} failed ({elapsed:.1f}s)")
+        
+        return self.results
+    
+    def critical_path(self):
+        """Longest chain of stage durations through the graph (seconds)"""
+        finish = {}
+        def longest(name):
+            if name not in finish:
+                upstream = [longest(d) for d in self.stages[name].depends_on]
+                finish[name] = self.durations.get(name, 0.0) + max(upstream, default=0.0)
+            return finish[name]
+        return max((longest(name) for name in self.stages), default=0.0)
 
 class DataPipelineOrchestrator:
     """Orchestrates the complete data processing pipeline"""
     
-    def __init__(self):
+    # Stages that can run in-process, mapped to the method that runs them
+    IN_PROCESS_STAGES = {
+        'data_processor.py': '_run_data_processor',
+        'student_management.py': '_run_student_management',
+        'update_points_assigned.py': '_run_points_assignment',
+        'analytics.py': '_run_analytics',
+        'update_attendance.py': '_run_attendance',
+        'publish_artifacts.py': '_run_publish',
+    }
+    
+    def __init__(self, in_process=False, max_workers=3, log_dir=None, metrics_dir=None,
+                 profile=None, profile_dir=None):
         self.scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        self.output = StageOutput(sys.stdout, log_dir=log_dir)
+        self.run_metrics = RunMetrics(metrics_dir or os.path.join(get_state_dir(), 'metrics'))
+        # Every stage of a profiled run writes into the same run directory
+        self.profile = profile
+        self.profile_dir = new_run_dir(profile_dir) if profile else None
         self.success_count = 0
         self.total_operations = 0
+        self.in_process = in_process
+        self.max_workers = max_workers
+        self._context = None
+        self._context_lock = threading.Lock()
+    
+    @property
+    def context(self):
+        """Shared in-process context, created on first use"""
+        with self._context_lock:
+            if self._context is None:
+                self._context = PipelineContext()
+        return self._context
+    
+    def run_stage(self, script_name, args=[]):
+        """
+        Run a stage in this interpreter when in-process mode is on, otherwise as a subprocess
+        Timing, memory and request metrics of the stage are added to the run report.
+        """
+        stage = os.path.splitext(script_name)[0]
+        handler = self.IN_PROCESS_STAGES.get(script_name) if self.in_process else None
+        started = time.perf_counter()
+        
+        if handler:
+            timer = StageTimer(stage)
+            with timer:
+                if self.profile:
+                    with StageProfiler(stage, self.profile, self.profile_dir):
+                        success = self._run_in_process(script_name, handler, args)
+                else:
+                    success = self._run_in_process(script_name, handler, args)
+            details = timer.result
+        else:
+            metrics_path = self.run_metrics.child_metrics_path(stage)
+            success = self.run_script(script_name, args, metrics_path=metrics_path)
+            details = self.run_metrics.collect_child(metrics_path)
+        
+        self.run_metrics.add_stage(stage, success, time.perf_counter() - started, details)
+        return success
+    
+    def write_metrics(self, success):
+        """Write the JSON and Prometheus metrics reports for this run"""
+        if not self.run_metrics.stages:
+            return
+        try:
+            json_path, prom_path = self.run_metrics.write(success)
+            safe_print(f"[OK] Metrics written to {json_path} and {prom_path}")
+        except OSError as e:
+            print(f"Warning: could not write metrics report: {e}")
+    
+    def _run_in_process(self, script_name, handler, args):
+        print(f"Running in-process: {script_name} {' '.join(args)}")
+        self.output.begin(os.path.splitext(script_name)[0])
+        try:
+            return bool(getattr(self, handler)(args))
+        except SystemExit as e:
+            return not e.code
+        except Exception as e:
+            safe_print(f"[ERROR] Stage failed: {e}")
+            return False
+        finally:
+            self.output.end()
+    
+    def _run_data_processor(self, args):
+        from data_processor import scrape_and_save, process_data
+        
+        run_all = '--all' in args
+        if run_all or '--scrape' in args:
+            scraped_data = scrape_and_save(self.context.supabase, scraper=self.context.scraper)
+        else:
+            scraped_data = load_scraped_data()
+        
+        if not scraped_data:
+            print("No data available to process")
+            return True
+        
+        process_data(
+            self.context.supabase, scraped_data,
+            students=run_all or '--students' in args,
+            projects=run_all or '--projects' in args,
+            progress=run_all or '--progress' in args,
+            cleanup=run_all or '--cleanup' in args,
+            lookups=self.context.lookups,
+        )
+        return True
     
-    def run_script(self, script_name, args=[]):
-        """Run a script with specified arguments"""
+    def _run_student_management(self, args):
+        from student_management import StudentManager
+        
+        # StudentManager picks up the same singleton client as the context
+        manager = StudentManager(service_role=True, lookups=self.context.lookups)
+        if '--all' in args:
+            return manager.run_all_updates()
+        
+        success = True
+        if '--seasons' in args and not manager.update_expected_seasons():
+            success = False
+        if '--status' in args and not manager.update_student_status():
+            success = False
+        return success
+    
+    def _run_points_assignment(self, args):
+        from update_points_assigned import PointsAssignmentManager
+        
+        manager = PointsAssignmentManager(self.context.supabase)
+        if not manager.update_all_student_points():
+            return False
+        manager.show_points_statistics()
+        return True
+    
+    def _run_analytics(self, args):
+        if '--all' not in args:
+            return self.run_script('analytics.py', args)
+        
+        from analytics import run_all_analytics
+        return run_all_analytics(self.context.supabase)
+    
+    def _run_attendance(self, args):
+        from update_attendance import sync_attendance
+        
+        try:
+            return sync_attendance(full_sync='--full-sync' in args, supabase=self.context.supabase)
+        except FileNotFoundError as e:
+            print(f"Attendance configuration error: {e}")
+            return False
+    
+    def _run_publish(self, args):
+        from publish_artifacts import ArtifactPublisher
+        
+        return ArtifactPublisher(self.context.supabase).publish() is not None
+    
+    def run_script(self, script_name, args=[], metrics_path=None):
+        """Run a script with specified arguments (metrics_path receives the child's metrics)"""
         script_path = os.path.join(self.scripts_dir, script_name)
         
         if not os.path.exists(script_path):
             safe_print(f"[ERROR] Script not found: {script_name}")
             return False
         
+        stage = os.path.splitext(script_name)[0]
+        opened_log = False
         try:
             cmd = [sys.executable, script_path] + args
+            if self.profile:
+                cmd += ['--profile', self.profile, '--profile-dir', self.profile_dir]
             print(f"Running: {' '.join(cmd)}")
             
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            # Unbuffered child output so lines arrive as they are printed
+            env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+            if metrics_path:
+                env[METRICS_FILE_ENV] = metrics_path
+            # An in-process stage falling back to its script keeps writing to the log begin() opened
+            opened_log = self.output.open_log(stage)
             
-            if result.stdout:
-                print(result.stdout)
-            if result.stderr:
-                print(f"Warnings: {result.stderr}")
+            # Stream stdout and stderr line by line instead of buffering the whole run
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env,
+                                  text=True, encoding='utf-8', errors='replace', bufsize=1) as process:
+                for line in process.stdout:
+                    self.output.emit(stage, line.rstrip('\n'))
+                returncode = process.wait()
+            
+            if returncode != 0:
+                safe_print(f"[ERROR] Script failed with exit code {returncode}")
+                return False
             
             return True
             
-        except subprocess.CalledProcessError as e:
-            safe_print(f"[ERROR] Script failed with exit code {e.returncode}")
-            if e.stdout:
-                print(f"Output: {e.stdout}")
-            if e.stderr:
-                print(f"Error: {e.stderr}")
-            return False
         except Exception as e:
             safe_print(f"[ERROR] Unexpected error: {e}")
             return False
+        finally:
+            if opened_log:
+                self.output.close_log(stage)
     
-    def run_full_pipeline(self, scrape_new_data=False):
-        """Run the complete data processing pipeline"""
-        print_step("FULL PIPELINE", "Starting complete data processing pipeline")
+    def run_pipeline(self, title, stages):
+        """Run a stage graph and print a summary"""
+        if self.in_process:
+            # Create the shared client before worker threads need it
+            self.context
         
-        operations = []
+        scheduler = StageScheduler(self.run_stage, stages, max_workers=self.max_workers)
+        started = time.perf_counter()
+        results = scheduler.run()
+        wall_time = time.perf_counter() - started
         
-        # 1. Data Collection and Processing
-        if scrape_new_data:
-            operations.append(("Data Scraping & Processing", "data_processor.py", ["--all"]))
-        else:
-            operations.append(("Data Processing (existing data)", "data_processor.py", ["--students", "--projects", "--progress"]))
+        self.total_operations = len(stages)
+        self.success_count = sum(1 for status in results.values() if status == 'success')
+        soft_failed = [name for name, status in results.items() if status == 'soft-failed']
         
-        # 2. Student Management
-        operations.append(("Student Management", "student_management.py", ["--all"]))
-
-        # 3. Points Assignment Update
-        operations.append(("Points Assignment", "update_points_assigned.py", []))
-
-        # 4. Analytics
-        operations.append(("Analytics Generation", "analytics.py", ["--all", "--service-role"]))
-        
-        self.total_operations = len(operations)
-        
-        for operation_name, script, args in operations:
-            print_step(operation_name.upper(), f"Running {script}")
-            
-            if self.run_script(script, args):
-                safe_print(f"[OK] {operation_name} completed successfully")
-                self.success_count += 1
-            else:
-                safe_print(f"[ERROR] {operation_name} failed")
+        print_step(f"{title} SUMMARY", f"{self.max_workers} worker(s)")
+        for stage in stages:
+            status = results.get(stage.name, 'skipped')
+            duration = scheduler.durations.get(stage.name)
+            print(f"  {stage.name:<32} {status:<11} {f'{duration:.1f}s' if duration is not None else '-'}")
+        print(f"  Wall time: {wall_time:.1f}s (critical path {scheduler.critical_path():.1f}s, "
+              f"sum of stages {sum(scheduler.durations.values()):.1f}s)")
         
-        # Summary
         if self.success_count == self.total_operations:
             print_step("PIPELINE SUCCESS", f"All {self.total_operations} operations completed successfully! 🎉")
             return True
+        elif self.success_count + len(soft_failed) == self.total_operations:
+            print_step("PIPELINE SUCCESS", f"Completed {self.success_count}/{self.total_operations} operations "
+                                           f"(non-fatal failures: {', '.join(soft_failed)})")
+            return True
         else:
             print_step("PIPELINE PARTIAL", f"Completed {self.success_count}/{self.total_operations} operations")
             return False
     
+    def run_full_pipeline(self, scrape_new_data=False):
+        """Run the complete data processing pipeline"""
+        print_step("FULL PIPELINE", "Starting complete data processing pipeline")
+        
+        data_args = ["--all"] if scrape_new_data else ["--students", "--projects", "--progress"]
+        stages = [
+            # Scraping/processing and the attendance sync touch different data
+            PipelineStage("Data Processing", "data_processor.py", data_args, []),
+            # Google Sheets outages must not cost the scraped data: points then use the stored counts
+            PipelineStage("Attendance Sync", "update_attendance.py", [], [], optional=True),
+            PipelineStage("Student Management", "student_management.py", ["--all"], ["Data Processing"]),
+            # Points only depend on attendance counts
+            PipelineStage("Points Assignment", "update_points_assigned.py", [], ["Attendance Sync"]),
+            PipelineStage("Analytics Generation", "analytics.py", ["--all", "--service-role"], ["Student Management"]),
+            # Static dashboard artifacts only read the analytics output
+            PipelineStage("Dashboard Artifacts", "publish_artifacts.py", [], ["Analytics Generation"]),
+        ]
+        return self.run_pipeline("FULL PIPELINE", stages)
+    
+    def run_quick_update(self):
+        """Run management, points, analytics and publish (no data processing)"""
+        print_step("QUICK UPDATE", "Running management, points, analytics, and publish")
+        
+        stages = [
+            PipelineStage("Student Management", "student_management.py", ["--all"], []),
+            PipelineStage("Points Assignment", "update_points_assigned.py", [], []),
+            PipelineStage("Analytics Generation", "analytics.py", ["--all", "--service-role"], ["Student Management"]),
+            PipelineStage("Dashboard Artifacts", "publish_artifacts.py", [], ["Analytics Generation"]),
+        ]
+        return self.run_pipeline("QUICK UPDATE", stages)
+    
     def run_data_only(self, scrape=False):
         """Run only data collection and processing"""
         print_step("DATA PIPELINE", "Running data collection and processing only")
         
         args = ["--all"] if scrape else ["--students", "--projects", "--progress"]
         
-        if self.run_script("data_processor.py", args):
+        if self.run_stage("data_processor.py", args):
             safe_print("[OK] Data processing completed successfully")
             return True
         else:
@@ -110,7 +505,7 @@ class DataPipelineOrchestrator:
         """Run only student management operations"""
         print_step("MANAGEMENT PIPELINE", "Running student management operations only")
         
-        if self.run_script("student_management.py", ["--all"]):
+        if self.run_stage("student_management.py", ["--all"]):
             safe_print("[OK] Student management completed successfully")
             return True
         else:
@@ -121,18 +516,29 @@ class DataPipelineOrchestrator:
         """Run only analytics generation"""
         print_step("ANALYTICS PIPELINE", "Running analytics generation only")
 
-        if self.run_script("analytics.py", ["--all", "--service-role"]):
+        if self.run_stage("analytics.py", ["--all", "--service-role"]):
             safe_print("[OK] Analytics generation completed successfully")
             return True
         else:
             safe_print("[ERROR] Analytics generation failed")
             return False
 
+    def run_publish_only(self):
+        """Run only the static dashboard artifact publishing"""
+        print_step("PUBLISH PIPELINE", "Publishing static dashboard artifacts")
+
+        if self.run_stage("publish_artifacts.py", []):
+            safe_print("[OK] Dashboard artifacts published successfully")
+            return True
+        else:
+            safe_print("[ERROR] Dashboard artifact publishing failed")
+            return False
+
     def run_points_only(self):
         """Run only points assignment update"""
         print_step("POINTS PIPELINE", "Running points assignment update only")
 
-        if self.run_script("update_points_assigned.py", []):
+        if self.run_stage("update_points_assigned.py", []):
             safe_print("[OK] Points assignment update completed successfully")
             return True
         else:
@@ -143,12 +549,50 @@ class DataPipelineOrchestrator:
         """Run only attendance sync from Google Sheets"""
         print_step("ATTENDANCE PIPELINE", "Running attendance sync from Google Sheets")
 
-        if self.run_script("update_attendance.py", []):
+        if self.run_stage("update_attendance.py", []):
             safe_print("[OK] Attendance sync completed successfully")
             return True
         else:
             safe_print("[ERROR] Attendance sync failed")
             return False
+    
+    # Default daemon schedules, overridable with --schedule JOB=SPEC
+    DAEMON_SCHEDULES = {'attendance': '1h', 'scrape': '6h', 'analytics': '02:00'}
+    
+    def daemon_jobs(self, schedules=None):
+        """Jobs run by --daemon, highest priority first"""
+        from daemon import DaemonJob
+        
+        schedules = dict(self.DAEMON_SCHEDULES, **(schedules or {}))
+        return [
+            DaemonJob('attendance', "ATTENDANCE", [
+                PipelineStage("Attendance Sync", "update_attendance.py", [], []),
+                PipelineStage("Points Assignment", "update_points_assigned.py", [], ["Attendance Sync"]),
+            ], schedules['attendance'], priority=0),
+            DaemonJob('scrape', "SCRAPE", [
+                PipelineStage("Data Processing", "data_processor.py", ["--all"], []),
+                PipelineStage("Student Management", "student_management.py", ["--all"], ["Data Processing"]),
+            ], schedules['scrape'], priority=1,
+               # Students are added from the dashboard between runs
+               refresh_lookups=('student_id_map', 'student_program_map')),
+            DaemonJob('analytics', "NIGHTLY ANALYTICS", [
+                PipelineStage("Student Management", "student_management.py", ["--all"], []),
+                PipelineStage("Analytics Generation", "analytics.py", ["--all", "--service-role"], ["Student Management"]),
+                PipelineStage("Dashboard Artifacts", "publish_artifacts.py", [], ["Analytics Generation"]),
+            ], schedules['analytics'], priority=2,
+               # Seasons, projects and cohort schedules rarely change: reloading them once a night is enough
+               refresh_lookups=('season_id_map', 'season_resolver', 'project_id_map', 'cohort_season_schedule')),
+        ]
+
+def parse_schedule_overrides(values):
+    """Parse --schedule JOB=SPEC options into a dict"""
+    schedules = {}
+    for value in values or []:
+        job, _, spec = value.partition('=')
+        if job not in DataPipelineOrchestrator.DAEMON_SCHEDULES or not spec:
+            raise ValueError(f"Invalid --schedule '{value}' (jobs: {', '.join(DataPipelineOrchestrator.DAEMON_SCHEDULES)})")
+        schedules[job] = spec
+    return schedules
 
 def main():
     """Main function with comprehensive CLI options"""
@@ -164,13 +608,20 @@ Examples:
   python main.py --management           # Run student management only
   python main.py --points               # Update points assignment only
   python main.py --analytics            # Run analytics only
-  python main.py --quick                # Quick update (management + points + analytics)
+  python main.py --publish              # Publish static dashboard artifacts only
+  python main.py --quick                # Quick update (management + points + analytics + publish)
+  python main.py --full --in-process    # Run stages in this process with a shared client
+  python main.py --full --workers 1     # Run the stage graph one stage at a time
+  python main.py --full --log-dir logs  # Also write logs/<stage>.log
+  python main.py --data --profile       # cProfile each stage into .state/profiles/<timestamp>
+  python main.py --daemon               # Keep running: attendance hourly, scrape every 6h, analytics at 02:00
+  python main.py --daemon --schedule scrape=2h --health-port 9100
         """
     )
     
     # Pipeline options
     parser.add_argument('--full', action='store_true', 
-                       help='Run the complete pipeline (data + management + analytics)')
+                       help='Run the complete pipeline (data + attendance + management + points + analytics + publish)')
     parser.add_argument('--data', action='store_true', 
                        help='Run data processing only')
     parser.add_argument('--management', action='store_true', 
@@ -181,19 +632,42 @@ Examples:
                        help='Update points assignment only')
     parser.add_argument('--attendance', action='store_true',
                        help='Sync attendance from Google Sheets')
+    parser.add_argument('--publish', action='store_true',
+                       help='Publish static dashboard artifacts to public/data only')
     parser.add_argument('--quick', action='store_true',
-                       help='Quick update: management + points + analytics (no data processing)')
+                       help='Quick update: management + points + analytics + publish (no data processing)')
     
     # Options
     parser.add_argument('--scrape', action='store_true', 
                        help='Include web scraping (only with --full or --data)')
+    parser.add_argument('--workers', type=int, default=3,
+                       help='Maximum number of stages to run at the same time (default: 3)')
+    parser.add_argument('--log-dir', metavar='DIR',
+                       help='Also write each stage\'s output to DIR/<stage>.log')
+    parser.add_argument('--metrics-dir', metavar='DIR',
+                       help='Where to write the run metrics (default: scripts/.state/metrics)')
+    parser.add_argument('--in-process', action='store_true',
+                       help='Run stages inside this process with a shared Supabase client and caches')
     parser.add_argument('--verbose', '-v', action='store_true', 
                        help='Verbose output')
+    add_profile_arguments(parser)
+    
+    # Daemon mode
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep running and start each job on its schedule (always in-process)')
+    parser.add_argument('--schedule', action='append', metavar='JOB=SPEC',
+                       help='Daemon job schedule, e.g. attendance=30m, scrape=6h, analytics=02:00 (repeatable)')
+    parser.add_argument('--health-port', type=int, default=8765,
+                       help='Daemon /healthz and /metrics port on 127.0.0.1 (0 to disable, default: 8765)')
     
     args = parser.parse_args()
     
+    if args.daemon:
+        run_daemon(args)
+        return
+    
     # Validate arguments
-    if not any([args.full, args.data, args.management, args.analytics, args.points, args.attendance, args.quick]):
+    if not any([args.full, args.data, args.management, args.analytics, args.points, args.attendance, args.publish, args.quick]):
         parser.print_help()
         return
     
@@ -202,7 +676,12 @@ Examples:
         sys.exit(1)
     
     # Initialize orchestrator
-    orchestrator = DataPipelineOrchestrator()
+    orchestrator = DataPipelineOrchestrator(in_process=args.in_process, max_workers=args.workers,
+                                            log_dir=args.log_dir, metrics_dir=args.metrics_dir,
+                                            profile=args.profile, profile_dir=args.profile_dir)
+    if args.in_process:
+        # Route every thread's prints through the stage-aware output
+        sys.stdout = orchestrator.output
     
     try:
         success = False
@@ -225,12 +704,15 @@ Examples:
         elif args.attendance:
             success = orchestrator.run_attendance_only()
 
+        elif args.publish:
+            success = orchestrator.run_publish_only()
+
         elif args.quick:
-            print_step("QUICK UPDATE", "Running management, points, and analytics")
-            mgmt_success = orchestrator.run_management_only()
-            points_success = orchestrator.run_points_only()
-            analytics_success = orchestrator.run_analytics_only()
-            success = mgmt_success and points_success and analytics_success
+            success = orchestrator.run_quick_update()
+        
+        orchestrator.write_metrics(success)
+        if orchestrator.profile_dir:
+            safe_print(f"[OK] Stage profiles in {orchestrator.profile_dir} (snakeviz <stage>.pstats, flamegraph.pl <stage>.collapsed)")
         
         # Exit with appropriate code
         if success:
@@ -247,5 +729,29 @@ Examples:
         safe_print(f"\n[ERROR] Pipeline error: {e}")
         sys.exit(1)
 
+def run_daemon(args):
+    """Run the pipeline daemon until SIGTERM/SIGINT"""
+    # http.server and friends are only needed in daemon mode
+    from daemon import PipelineDaemon
+    
+    try:
+        schedules = parse_schedule_overrides(args.schedule)
+        orchestrator = DataPipelineOrchestrator(in_process=True, max_workers=args.workers,
+                                                log_dir=args.log_dir, metrics_dir=args.metrics_dir)
+        jobs = orchestrator.daemon_jobs(schedules)
+        # Fail fast on a bad .env instead of failing every job
+        orchestrator.context
+    except ValueError as e:
+        safe_print(f"[ERROR] {e}")
+        sys.exit(2)
+    
+    sys.stdout = orchestrator.output
+    try:
+        PipelineDaemon(orchestrator, jobs, health_port=args.health_port).run()
+    except KeyboardInterrupt:
+        safe_print("\n[STOPPED] Daemon stopped without finishing the current job")
+        sys.exit(130)
+    sys.exit(0)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
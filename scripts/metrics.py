@@ -0,0 +1,292 @@
+"""
+Pipeline Metrics
+Per-stage wall time, CPU time, peak RSS, Supabase round-trips and scraper HTTP traffic
+
+Requests are counted by hooks on the Supabase (httpx) session and on the scraper's
+requests calls, and attributed to the stage the current thread is running. Stage
+subprocesses started by main.py write their own numbers to PIPELINE_METRICS_FILE at exit;
+main.py merges them into one JSON report and a Prometheus textfile per run.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_FILE_ENV = 'PIPELINE_METRICS_FILE'
+REPORT_HISTORY = 50
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (None where the resource module is unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+def _quantile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class MetricsRegistry:
+    """Thread-safe request counters, keyed by the stage running in the current thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._requests = {}
+        self._pending = {}
+
+    def set_stage(self, stage):
+        self._local.stage = stage
+
+    def current_stage(self):
+        return getattr(self._local, 'stage', None)
+
+    def record(self, kind, seconds, status=None, size=0):
+        """Record one request of a kind ('supabase' or 'http') for the current stage"""
+        key = (self.current_stage(), kind)
+        with self._lock:
+            entry = self._requests.setdefault(key, {'latencies': [], 'errors': 0, 'bytes': 0})
+            entry['latencies'].append(seconds)
+            entry['bytes'] += size
+            if status is None or status >= 400:
+                entry['errors'] += 1
+
+    def summary(self, stage=None):
+        """Request summary per kind for one stage"""
+        with self._lock:
+            entries = {kind: dict(entry) for (key_stage, kind), entry in self._requests.items() if key_stage == stage}
+
+        result = {}
+        for kind in ('supabase', 'http'):
+            entry = entries.get(kind, {'latencies': [], 'errors': 0, 'bytes': 0})
+            latencies = entry['latencies']
+            result[kind] = {
+                'requests': len(latencies),
+                'errors': entry['errors'],
+                'bytes': entry['bytes'],
+                'seconds_total': round(sum(latencies), 4),
+                'p50_seconds': _quantile(latencies, 0.5),
+                'p95_seconds': _quantile(latencies, 0.95),
+                'max_seconds': max(latencies) if latencies else None,
+            }
+        return result
+
+    def reset(self, stage=None):
+        with self._lock:
+            for key in [key for key in self._requests if key[0] == stage]:
+                del self._requests[key]
+
+    # httpx event hooks for the Supabase session
+    def _on_request(self, request):
+        with self._lock:
+            self._pending[id(request)] = time.perf_counter()
+
+    def _on_response(self, response):
+        with self._lock:
+            started = self._pending.pop(id(response.request), None)
+        if started is not None:
+            self.record('supabase', time.perf_counter() - started, response.status_code)
+
+REGISTRY = MetricsRegistry()
+
+def instrument_supabase_client(client):
+    """Count and time every PostgREST request made through a Supabase client"""
+    try:
+        session = client.postgrest.session
+    except AttributeError:
+        return False
+
+    if getattr(session, '_pipeline_metrics', False):
+        return True
+
+    hooks = session.event_hooks
+    hooks['request'] = list(hooks.get('request', [])) + [REGISTRY._on_request]
+    hooks['response'] = list(hooks.get('response', [])) + [REGISTRY._on_response]
+    session.event_hooks = hooks
+    session._pipeline_metrics = True
+    return True
+
+def record_http_response(response, *args, **kwargs):
+    """requests response hook: count scraper requests and bytes"""
+    REGISTRY.record('http', response.elapsed.total_seconds(), response.status_code, len(response.content or b''))
+    return response
+
+# Pass as hooks=HTTP_HOOKS to requests calls that should be counted
+HTTP_HOOKS = {'response': [record_http_response]}
+
+class StageTimer:
+    """Wall/CPU time of a stage running in the current thread (in-process mode)"""
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        REGISTRY.reset(self.stage)
+        REGISTRY.set_stage(self.stage)
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.result = {
+            'wall_seconds': round(time.perf_counter() - self._wall, 4),
+            'cpu_seconds': round(time.thread_time() - self._cpu, 4),
+            # Process-wide: stages share the orchestrator process in this mode
+            'peak_rss_bytes': peak_rss_bytes(),
+            **REGISTRY.summary(self.stage),
+        }
+        REGISTRY.set_stage(None)
+        return False
+
+def install_exit_report():
+    """In a stage subprocess started by main.py, write this process's metrics at exit"""
+    path = os.environ.get(METRICS_FILE_ENV)
+    if not path:
+        return
+
+    started = time.perf_counter()
+
+    def write_report():
+        data = {
+            'wall_seconds': round(time.perf_counter() - started, 4),
+            'cpu_seconds': round(time.process_time(), 4),
+            'peak_rss_bytes': peak_rss_bytes(),
+            **REGISTRY.summary(None),
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+    atexit.register(write_report)
+
+class RunMetrics:
+    """Collects per-stage metrics for one orchestrator run and writes the reports"""
+
+    def __init__(self, metrics_dir):
+        self.metrics_dir = metrics_dir
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def child_metrics_path(self, stage):
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        return os.path.join(self.metrics_dir, f".{stage}.{os.getpid()}.json")
+
+    def collect_child(self, path):
+        """Read (and remove) the metrics file a stage subprocess wrote at exit"""
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def add_stage(self, stage, success, wall_seconds, details=None):
+        with self._lock:
+            self.stages[stage] = {
+                **(details or {}),
+                'success': bool(success),
+                # The orchestrator's view, including interpreter startup for subprocesses
+                'wall_seconds': round(wall_seconds, 4),
+            }
+
+    def report(self, success):
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': datetime.now().isoformat(),
+            'wall_seconds': round(time.perf_counter() - self._started, 4),
+            'success': bool(success),
+            'orchestrator_peak_rss_bytes': peak_rss_bytes(),
+            'stages': self.stages,
+        }
+
+    @staticmethod
+    def prometheus_text(report):
+        """Render the report in the Prometheus textfile-collector format"""
+        lines = []
+
+        def metric(name, help_text, kind, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if value is None:
+                    continue
+                label_text = ','.join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        stages = sorted(report['stages'].items())
+        metric('pipeline_run_timestamp_seconds', 'Unix time the last run finished', 'gauge',
+               [({}, round(time.time(), 3))])
+        metric('pipeline_run_wall_seconds', 'Wall-clock time of the last run', 'gauge',
+               [({}, report['wall_seconds'])])
+        metric('pipeline_run_success', 'Whether every stage of the last run succeeded', 'gauge',
+               [({}, int(report['success']))])
+        metric('pipeline_stage_success', 'Whether the stage succeeded in the last run', 'gauge',
+               [({'stage': s}, int(d['success'])) for s, d in stages])
+        metric('pipeline_stage_wall_seconds', 'Wall-clock time of the stage', 'gauge',
+               [({'stage': s}, d.get('wall_seconds')) for s, d in stages])
+        metric('pipeline_stage_cpu_seconds', 'CPU time of the stage', 'gauge',
+               [({'stage': s}, d.get('cpu_seconds')) for s, d in stages])
+        metric('pipeline_stage_peak_rss_bytes', 'Peak resident memory of the stage process', 'gauge',
+               [({'stage': s}, d.get('peak_rss_bytes')) for s, d in stages])
+
+        for kind, description in (('supabase', 'Supabase'), ('http', 'scraper HTTP')):
+            metric(f'pipeline_stage_{kind}_requests', f'{description} requests made by the stage', 'gauge',
+                   [({'stage': s}, d.get(kind, {}).get('requests')) for s, d in stages])
+            metric(f'pipeline_stage_{kind}_errors', f'{description} requests that failed', 'gauge',
+                   [({'stage': s}, d.get(kind, {}).get('errors')) for s, d in stages])
+            samples = []
+            for s, d in stages:
+                entry = d.get(kind, {})
+                samples += [({'stage': s, 'quantile': '0.5'}, entry.get('p50_seconds')),
+                            ({'stage': s, 'quantile': '0.95'}, entry.get('p95_seconds'))]
+            metric(f'pipeline_stage_{kind}_request_seconds', f'{description} request latency', 'summary', samples)
+            lines += [f'pipeline_stage_{kind}_request_seconds_sum{{stage="{s}"}} {d[kind]["seconds_total"]}'
+                      for s, d in stages if kind in d]
+            lines += [f'pipeline_stage_{kind}_request_seconds_count{{stage="{s}"}} {d[kind]["requests"]}'
+                      for s, d in stages if kind in d]
+
+        metric('pipeline_stage_http_bytes', 'Bytes downloaded by the scraper', 'gauge',
+               [({'stage': s}, d.get('http', {}).get('bytes')) for s, d in stages])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, success):
+        """
+        Write run-<timestamp>.json, latest.json and pipeline.prom to the metrics directory
+        Returns: (json path, prometheus path)
+        """
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        report = self.report(success)
+
+        json_path = os.path.join(self.metrics_dir, f"run-{self.started_at:%Y%m%d-%H%M%S}.json")
+        for path in (json_path, os.path.join(self.metrics_dir, 'latest.json')):
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+        # The textfile collector may read at any moment, so swap the file in atomically
+        prom_path = os.path.join(self.metrics_dir, 'pipeline.prom')
+        with open(f"{prom_path}.tmp", 'w') as f:
+            f.write(self.prometheus_text(report))
+        os.replace(f"{prom_path}.tmp", prom_path)
+
+        runs = sorted(name for name in os.listdir(self.metrics_dir) if name.startswith('run-'))
+        for name in runs[:-REPORT_HISTORY]:
+            os.remove(os.path.join(self.metrics_dir, name))
+
+        return json_path, prom_path
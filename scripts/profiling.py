@@ -0,0 +1,205 @@
+"""
+Stage Profiling
+cProfile and tracemalloc wrappers behind the --profile option of main.py and the stage scripts
+
+Per stage, the run directory receives:
+- <stage>.pstats: cProfile stats (snakeviz, gprof2dot, flameprof, python -m pstats)
+- <stage>.collapsed: folded stacks for flamegraph.pl / speedscope (microseconds)
+- <stage>.cpu.txt: top functions by cumulative and own time
+- <stage>.alloc.txt: top allocation sites (tracemalloc) and peak traced memory
+"""
+
+import argparse
+import io
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from utils import get_state_dir, safe_print
+
+PROFILE_MODES = ('cpu', 'memory', 'all')
+TOP_ENTRIES = 30
+TRACEMALLOC_FRAMES = 10
+MAX_STACK_DEPTH = 64
+
+# tracemalloc is process-wide: stages running side by side in-process share one trace
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+def add_profile_arguments(parser):
+    """Add --profile / --profile-dir to a stage script's argument parser"""
+    parser.add_argument('--profile', nargs='?', const='cpu', choices=PROFILE_MODES,
+                        help='Profile this run: cpu (cProfile, default), memory (tracemalloc) or all')
+    parser.add_argument('--profile-dir', metavar='DIR',
+                        help='Directory for profile output (default: .state/profiles/<timestamp>)')
+
+def new_run_dir(path=None):
+    """Create (and return) the directory the profiles of one run are written to"""
+    path = path or os.path.join(get_state_dir(), 'profiles', datetime.now().strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins, e.g. <method 'execute' of ...>
+        return name.replace(';', ',')
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(';', ',')
+
+def collapsed_stacks(stats):
+    """
+    Fold cProfile's caller graph into flamegraph stacks (microseconds per stack)
+    cProfile keeps one level of callers only, so the time of a function called from several
+    places is split between them in proportion to each caller's share.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            # edge: (primitive calls, calls, own time, cumulative time)
+            callees[caller].append((func, edge[3]))
+
+    roots = [func for func, entry in stats.stats.items() if not any(c in stats.stats for c in entry[4])]
+    folded = defaultdict(float)
+
+    def walk(func, stack, scale, path):
+        stack = stack + [_label(func)]
+        folded[';'.join(stack)] += stats.stats[func][2] * scale
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, []):
+            callee_cumulative = stats.stats[callee][3]
+            if callee in path or edge_time <= 0 or callee_cumulative <= 0:
+                continue
+            walk(callee, stack, scale * min(1.0, edge_time / callee_cumulative), path | {callee})
+
+    for root in roots:
+        walk(root, [], 1.0, {root})
+
+    return [f"{stack} {int(round(seconds * 1_000_000))}" for stack, seconds in sorted(folded.items())
+            if seconds * 1_000_000 >= 1]
+
+class StageProfiler:
+    """Profile one stage (the current thread for cProfile, the process for tracemalloc)"""
+
+    def __init__(self, stage, mode, run_dir):
+        self.stage = stage
+        self.mode = mode
+        self.run_dir = run_dir
+        self.profiler = None
+        self._baseline = None
+
+    def __enter__(self):
+        global _tracing_users
+        # Every stage script imports this module; the profilers load only when --profile is used
+        import cProfile
+        import tracemalloc
+
+        if self.mode in ('memory', 'all'):
+            with _tracing_lock:
+                if _tracing_users == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(TRACEMALLOC_FRAMES)
+                _tracing_users += 1
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.take_snapshot()
+
+        if self.mode in ('cpu', 'all'):
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one active profiler per process
+                print(f"Warning: CPU profiling skipped for {self.stage}: {e} (try --workers 1)")
+                self.profiler = None
+        return self
+
+    def __exit__(self, *exc):
+        global _tracing_users
+        import tracemalloc
+
+        if self.profiler:
+            self.profiler.disable()
+        # Snapshot before writing the reports so their allocations are not counted
+        memory = self._take_memory_snapshot() if self._baseline is not None else None
+        try:
+            os.makedirs(self.run_dir, exist_ok=True)
+            if self.profiler:
+                self._write_cpu()
+            if memory:
+                self._write_memory(*memory)
+            safe_print(f"[OK] Profile for {self.stage} written to {self.run_dir}")
+        except OSError as e:
+            print(f"Warning: could not write profile for {self.stage}: {e}")
+        finally:
+            if self._baseline is not None:
+                with _tracing_lock:
+                    _tracing_users -= 1
+                    if _tracing_users == 0:
+                        tracemalloc.stop()
+        return False
+
+    def _path(self, suffix):
+        return os.path.join(self.run_dir, f"{self.stage}{suffix}")
+
+    def _write_cpu(self):
+        import pstats
+
+        self.profiler.dump_stats(self._path('.pstats'))
+        stats = pstats.Stats(self.profiler)
+
+        with open(self._path('.collapsed'), 'w') as f:
+            f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+
+        report = io.StringIO()
+        stats.stream = report
+        report.write(f"{self.stage}: top {TOP_ENTRIES} by cumulative time\n")
+        stats.sort_stats('cumulative').print_stats(TOP_ENTRIES)
+        report.write(f"\n{self.stage}: top {TOP_ENTRIES} by own time\n")
+        stats.sort_stats('tottime').print_stats(TOP_ENTRIES)
+        with open(self._path('.cpu.txt'), 'w') as f:
+            f.write(report.getvalue())
+
+    def _take_memory_snapshot(self):
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                  tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>')]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        return current, peak, snapshot, self._baseline.filter_traces(ignore)
+
+    def _write_memory(self, current, peak, snapshot, baseline):
+        growth = snapshot.compare_to(baseline, 'lineno')
+        live = snapshot.statistics('traceback')
+
+        with open(self._path('.alloc.txt'), 'w') as f:
+            f.write(f"{self.stage}: peak traced memory {peak / 1024 / 1024:.1f} MiB, "
+                    f"still allocated at exit {current / 1024 / 1024:.1f} MiB\n")
+            if self.mode == 'all':
+                f.write("(traced while cProfile was running, so sizes include profiler overhead)\n")
+
+            f.write(f"\nTop {TOP_ENTRIES} allocation sites still holding memory the stage allocated:\n")
+            for stat in growth[:TOP_ENTRIES]:
+                f.write(f"  {stat}\n")
+
+            f.write("\nTop 10 live allocations with call stacks:\n")
+            for stat in live[:10]:
+                f.write(f"\n  {stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+                for line in stat.traceback.format(limit=TRACEMALLOC_FRAMES):
+                    f.write(f"    {line}\n")
+
+def profile_main(stage, main):
+    """
+    Run a stage script's main(), profiled when --profile is on the command line
+    main() still parses its own arguments, so it must accept the options from add_profile_arguments.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    add_profile_arguments(parser)
+    args, _ = parser.parse_known_args()
+    if not args.profile:
+        return main()
+
+    with StageProfiler(stage, args.profile, new_run_dir(args.profile_dir)):
+        return main()
@@ -0,0 +1,265 @@
+"""
+Progress Velocity and Completion Forecasting
+Computes per-student season progress velocity and projected completion dates
+Run with: python progress_velocity.py [--lookback-days 56] [--top 20]
+
+Uses the append-only student_season_progress_history table written by
+data_processor.py. For every student, the progress points of their current season
+inside the lookback window (plus today's value) are fitted with a least-squares line.
+Each history row holds the value after a change, so the value before the first change in
+the window (its previous_percentage) is added as a point at the start of the window.
+Without it, a single recent 0 -> 30 jump would fit as a flat line.
+The fit runs for the whole population at once with NumPy. The slope gives velocity in
+percent per week, and extrapolating it to 100% gives the projected completion date.
+That date is compared with program_cohort_seasons.end_date.
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Import our utilities
+from utils import get_supabase_client, fetch_all_rows, print_step, safe_print, save_state
+
+class ProgressVelocityEngine:
+    """Vectorized velocity and completion-date forecasting for all students"""
+
+    HISTORY_TABLE = 'student_season_progress_history'
+    FORECAST_FILE = 'progress_forecast.json'
+
+    # A student is "slowing down" when their recent velocity drops below this share of the window velocity
+    SLOWDOWN_RATIO = 0.5
+
+    def __init__(self, supabase_client, lookback_days=56, recent_days=14):
+        self.supabase = supabase_client
+        self.lookback_days = lookback_days
+        self.recent_days = recent_days
+
+    def _load(self, now):
+        """Load history inside the lookback window plus the current student/progress/schedule state"""
+        since = (now - timedelta(days=self.lookback_days)).isoformat()
+
+        history = fetch_all_rows(
+            self.supabase, self.HISTORY_TABLE,
+            'id, student_id, season_id, progress_percentage, previous_percentage, recorded_at',
+            filters=lambda q: q.gte('recorded_at', since)
+        )
+        students = fetch_all_rows(
+            self.supabase, 'students', 'id, username, program_id, cohort_id, current_season_id'
+        )
+        progress = fetch_all_rows(
+            self.supabase, 'student_season_progress', 'id, student_id, season_id, progress_percentage'
+        )
+        schedule = fetch_all_rows(
+            self.supabase, 'program_cohort_seasons', 'id, program_id, cohort_id, season_id, end_date'
+        )
+        return history, students, progress, schedule
+
+    @staticmethod
+    def _utc_naive(value):
+        """A timestamp (ISO string or datetime) as a naive UTC datetime; naive input is taken as UTC"""
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+
+    @classmethod
+    def _to_days(cls, timestamps, now):
+        """Convert timestamps to (negative) days relative to now, vectorized"""
+        # recorded_at is a timestamptz: normalize every offset to UTC before NumPy drops it
+        values = np.array([cls._utc_naive(t) for t in timestamps], dtype='datetime64[us]')
+        return (values - np.datetime64(cls._utc_naive(now), 'us')).astype(np.float64) / 86400e6
+
+    @staticmethod
+    def _window_anchors(groups, x, previous, window_days):
+        """
+        Value of each student at the start of a window, as extra (group, x, y) points
+        It is the previous_percentage of the student's first history row inside the window.
+        Students without a row in the window (or without a known previous value) get no anchor.
+        """
+        inside = np.flatnonzero(x >= -window_days)
+        # First row per student inside the window: sort by (student, time)
+        inside = inside[np.lexsort((x[inside], groups[inside]))]
+        _, first = np.unique(groups[inside], return_index=True)
+        first = inside[first]
+        first = first[~np.isnan(previous[first])]
+        return groups[first], np.full(len(first), -float(window_days)), previous[first]
+
+    @staticmethod
+    def _slopes(groups, x, y, group_count):
+        """Least-squares slope of y over x per group (NaN where fewer than two distinct x)"""
+        n = np.bincount(groups, minlength=group_count)
+        sx = np.bincount(groups, weights=x, minlength=group_count)
+        sy = np.bincount(groups, weights=y, minlength=group_count)
+        sxx = np.bincount(groups, weights=x * x, minlength=group_count)
+        sxy = np.bincount(groups, weights=x * y, minlength=group_count)
+
+        denominator = n * sxx - sx * sx
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slopes = (n * sxy - sx * sy) / denominator
+        slopes[(n < 2) | (np.abs(denominator) < 1e-12)] = np.nan
+        return slopes
+
+    def compute(self, now=None):
+        """
+        Compute velocity and projected completion for every student with a current season
+        Returns: list of per-student forecast dicts
+        """
+        now = now or datetime.now(timezone.utc)
+        history, students, progress, schedule = self._load(now)
+
+        students = [s for s in students if s.get('current_season_id')]
+        if not students:
+            return []
+
+        student_codes = {s['id']: i for i, s in enumerate(students)}
+        current_seasons = {s['id']: s['current_season_id'] for s in students}
+
+        current_progress = np.full(len(students), np.nan)
+        for row in progress:
+            code = student_codes.get(row['student_id'])
+            if code is not None and row['season_id'] == current_seasons[row['student_id']]:
+                current_progress[code] = float(row.get('progress_percentage') or 0)
+
+        # History points of each student's current season, plus "today" at the current value
+        history = [
+            row for row in history
+            if row['student_id'] in student_codes and row['season_id'] == current_seasons[row['student_id']]
+        ]
+        has_current = ~np.isnan(current_progress)
+        history_groups = np.array([student_codes[row['student_id']] for row in history], dtype=np.int64)
+        history_x = self._to_days([row['recorded_at'] for row in history], now) if history else np.empty(0)
+        history_y = np.array([float(row['progress_percentage'] or 0) for row in history])
+        history_previous = np.array([
+            np.nan if row.get('previous_percentage') is None else float(row['previous_percentage'])
+            for row in history
+        ])
+
+        def window_slopes(window_days):
+            """Percent per day over the last window_days: history inside it, its start value and today"""
+            inside = history_x >= -window_days
+            anchor_groups, anchor_x, anchor_y = self._window_anchors(
+                history_groups, history_x, history_previous, window_days)
+            groups = np.concatenate([history_groups[inside], anchor_groups, np.flatnonzero(has_current)])
+            x = np.concatenate([history_x[inside], anchor_x, np.zeros(int(has_current.sum()))])
+            y = np.concatenate([history_y[inside], anchor_y, current_progress[has_current]])
+            return self._slopes(groups, x, y, len(students))
+
+        # Percent per day over the window and over the recent sub-window
+        velocity = window_slopes(self.lookback_days)
+        recent_velocity = window_slopes(self.recent_days)
+
+        # No recorded change inside the window means no progress was made
+        velocity = np.where(np.isnan(velocity) & has_current, 0.0, velocity)
+        recent_velocity = np.where(np.isnan(recent_velocity) & has_current, 0.0, recent_velocity)
+
+        remaining = np.clip(100 - current_progress, 0, None)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            days_to_complete = np.where(velocity > 0, remaining / velocity, np.nan)
+        days_to_complete[remaining == 0] = 0
+
+        slowing = (velocity > 0) & (recent_velocity < velocity * self.SLOWDOWN_RATIO)
+
+        end_dates = {
+            (row['program_id'], row['cohort_id'], row['season_id']): row.get('end_date')
+            for row in schedule
+        }
+
+        forecasts = []
+        for i, student in enumerate(students):
+            if not has_current[i]:
+                continue
+
+            projected = None
+            if not np.isnan(days_to_complete[i]):
+                projected = (now + timedelta(days=float(days_to_complete[i]))).date()
+
+            end_date = end_dates.get((student.get('program_id'), student.get('cohort_id'), student['current_season_id']))
+            days_late = None
+            if projected and end_date:
+                days_late = (projected - datetime.fromisoformat(str(end_date)[:10]).date()).days
+
+            forecasts.append({
+                'student_id': student['id'],
+                'username': student.get('username'),
+                'season_id': student['current_season_id'],
+                'progress': round(float(current_progress[i]), 2),
+                'velocity_per_week': round(float(velocity[i]) * 7, 2),
+                'recent_velocity_per_week': round(float(recent_velocity[i]) * 7, 2),
+                'slowing_down': bool(slowing[i]),
+                'projected_completion': projected.isoformat() if projected else None,
+                'season_end_date': str(end_date)[:10] if end_date else None,
+                'days_late': days_late,
+            })
+
+        return forecasts
+
+    def run(self, top=20):
+        """Compute forecasts, print a summary and save them to the state directory"""
+        print_step("PROGRESS VELOCITY", f"Forecasting season completion ({self.lookback_days}-day window)")
+
+        try:
+            forecasts = self.compute()
+        except Exception as e:
+            print(f"Error computing progress velocity: {e}")
+            return None
+
+        if not forecasts:
+            print("No students with current season progress found")
+            return []
+
+        stalled = [f for f in forecasts if f['projected_completion'] is None]
+        late = sorted((f for f in forecasts if f['days_late'] is not None and f['days_late'] > 0),
+                      key=lambda f: f['days_late'], reverse=True)
+        slowing = sorted((f for f in forecasts if f['slowing_down']),
+                         key=lambda f: f['recent_velocity_per_week'] - f['velocity_per_week'])
+
+        print(f"Students forecast: {len(forecasts)}")
+        print(f"  Projected to finish after season end: {len(late)}")
+        print(f"  Slowing down: {len(slowing)}")
+        print(f"  Stalled (no progress in window): {len(stalled)}")
+
+        if late:
+            print(f"\nTop {min(top, len(late))} projected late:")
+            print(f"{'Username':<25} {'Progress':<10} {'%/week':<8} {'Projected':<12} {'Season end':<12} {'Days late':<9}")
+            for f in late[:top]:
+                print(f"{str(f['username']):<25} {f['progress']:<10} {f['velocity_per_week']:<8} "
+                      f"{f['projected_completion']:<12} {f['season_end_date']:<12} {f['days_late']:<9}")
+
+        if slowing:
+            print(f"\nTop {min(top, len(slowing))} slowing down:")
+            print(f"{'Username':<25} {'Progress':<10} {'%/week':<8} {'Recent %/week':<14}")
+            for f in slowing[:top]:
+                print(f"{str(f['username']):<25} {f['progress']:<10} {f['velocity_per_week']:<8} "
+                      f"{f['recent_velocity_per_week']:<14}")
+
+        path = save_state(self.FORECAST_FILE, {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'lookback_days': self.lookback_days,
+            'forecasts': forecasts,
+        })
+        safe_print(f"\n[OK] Saved {len(forecasts)} forecasts to {path}")
+        return forecasts
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Forecast season completion from progress history')
+    parser.add_argument('--lookback-days', type=int, default=56, help='History window used for velocity (default: 56)')
+    parser.add_argument('--recent-days', type=int, default=14, help='Window used to detect slowdowns (default: 14)')
+    parser.add_argument('--top', type=int, default=20, help='Number of students to list per section')
+
+    args = parser.parse_args()
+
+    try:
+        supabase = get_supabase_client(service_role=True)
+        engine = ProgressVelocityEngine(supabase, lookback_days=args.lookback_days, recent_days=args.recent_days)
+        if engine.run(top=args.top) is None:
+            sys.exit(1)
+    except Exception as e:
+        safe_print(f"\n[ERROR] Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Static Dashboard Artifacts
+Writes pre-aggregated dashboard data into public/data so it can be served as static files
+Run with: python publish_artifacts.py [--output DIR] [--no-brotli]
+
+Artifacts (aggregates only, no per-student data since public/ is served without auth):
+- snapshot: latest vs. previous progress snapshot (same shape as /api/snapshot)
+- snapshot-history: last 12 snapshots for the mini charts (same shape as /api/snapshot-history)
+- cohorts: index of all cohorts with their summary
+- cohorts/<program_id>-<cohort_id>: cohort summary, cube cells and snapshot series
+
+Groups of fewer than MIN_GROUP_SIZE students would give away individual values, so cube cells
+that small are left out (their students are counted in 'suppressed_students', and further
+cells are left out until those are at least MIN_GROUP_SIZE students too) and cohort
+summaries and series points that small keep their counts but lose their progress/points stats.
+
+Every artifact is written as <name>.<content hash>.json with .gz (and .br when the
+brotli package is installed) variants next to it. manifest.json maps artifact names to
+the current hashed files. It is the only file with a fixed name, so everything else can
+be cached as immutable. Unchanged artifacts keep their file and hash.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+
+# Import our utilities
+from utils import get_supabase_client, fetch_all_rows, print_step, safe_print
+from profiling import add_profile_arguments, profile_main
+from analytics import CohortAnalyticsCube
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public', 'data')
+
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_HISTORY_LIMIT = 12
+COHORT_SERIES_LIMIT = 52
+MIN_GROUP_SIZE = 5
+
+# Fields computed from the values of the students in a group
+STAT_PREFIXES = ('progress_', 'points_', 'avg_')
+
+def import_brotli():
+    """Return the brotli module if installed (brotli variants are optional)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+def pct_change(current, previous):
+    """Percent change, matching pctChange() in server/api/snapshot.js"""
+    if not previous:
+        return 100 if current > 0 else 0
+    return 100 * (current - previous) / previous
+
+def redact_small_group(entry, students_key='students'):
+    """Copy of an aggregate without its stat fields when it covers fewer than MIN_GROUP_SIZE students"""
+    if (entry.get(students_key) or 0) >= MIN_GROUP_SIZE:
+        return dict(entry)
+    return {key: value for key, value in entry.items() if not key.startswith(STAT_PREFIXES)}
+
+def chart_label(snapshot_date):
+    """Short chart label like 'Oct 19' (toLocaleDateString en-US month short, day numeric)"""
+    parsed = datetime.fromisoformat(str(snapshot_date)[:10])
+    return f"{parsed:%b} {parsed.day}"
+
+class ArtifactPublisher:
+    """Builds dashboard JSON artifacts and writes them with precompressed variants and a manifest"""
+
+    def __init__(self, supabase_client, output_dir=None, brotli=True):
+        self.supabase = supabase_client
+        self.output_dir = os.path.abspath(output_dir or os.environ.get('PUBLIC_DATA_DIR') or DEFAULT_OUTPUT_DIR)
+        self.brotli = import_brotli() if brotli else None
+
+    def build_snapshot_artifacts(self):
+        """Snapshot comparison and history, in the shapes returned by the snapshot API routes"""
+        response = self.supabase.table('progress_snapshots') \
+            .select('*') \
+            .order('snapshot_date', desc=True) \
+            .limit(SNAPSHOT_HISTORY_LIMIT) \
+            .execute()
+        snapshots = response.data or []
+
+        if len(snapshots) < 2:
+            snapshot = {
+                'message': 'Not enough data',
+                'total_pct_change': None,
+                'on_track_pct_change': None,
+                'at_risk_pct_change': None,
+                'monitor_pct_change': None,
+            }
+        else:
+            latest, previous = snapshots[0], snapshots[1]
+            days = (datetime.fromisoformat(str(latest['snapshot_date'])[:10])
+                    - datetime.fromisoformat(str(previous['snapshot_date'])[:10])).days
+            snapshot = {
+                'snapshot_date': latest['snapshot_date'],
+                'comparison_date': previous['snapshot_date'],
+                'days_compared': days,
+                'total_change': latest['total_students'] - previous['total_students'],
+                'total_pct_change': pct_change(latest['total_students'], previous['total_students']),
+            }
+            for column in ('on_track', 'at_risk', 'monitor'):
+                snapshot[f'{column}_change'] = latest[column] - previous[column]
+                snapshot[f'{column}_pct_change'] = pct_change(latest[column], previous[column])
+
+        chronological = list(reversed(snapshots))
+        history = {
+            key: [
+                {'date': chart_label(s['snapshot_date']), 'snapshot_date': s['snapshot_date'], 'value': s[column]}
+                for s in chronological
+            ]
+            for key, column in (('total', 'total_students'), ('on_track', 'on_track'),
+                                ('at_risk', 'at_risk'), ('monitor', 'monitor'))
+        }
+        if not snapshots:
+            history['message'] = 'No data'
+
+        return {'snapshot': snapshot, 'snapshot-history': history}
+
+    def build_cohort_artifacts(self, cube):
+        """Per-cohort summaries with their cube cells and snapshot series, plus an index"""
+        if not cube:
+            print("No analytics cube found, skipping cohort artifacts (run analytics.py --cube)")
+            return {}
+
+        cohort_names = {c['id']: c.get('name') for c in fetch_all_rows(self.supabase, 'cohorts', 'id, name')}
+        program_names = {p['id']: p.get('name') for p in fetch_all_rows(self.supabase, 'programs', 'id, name')}
+
+        series = {}
+        rows = fetch_all_rows(self.supabase, 'cohort_progress_snapshots')
+        for row in sorted(rows, key=lambda r: str(r['snapshot_date'])):
+            series.setdefault(f"{row['program_id']}:{row['cohort_id']}", []).append(redact_small_group({
+                key: row.get(key)
+                for key in ('snapshot_date', 'granularity', 'total_students', 'on_track',
+                            'at_risk', 'monitor', 'avg_progress')
+            }, 'total_students'))
+
+        by_cohort = {}
+        for cell in cube['cells']:
+            by_cohort.setdefault(f"{cell['program_id']}:{cell['cohort_id']}", []).append(cell)
+
+        cells = {}
+        suppressed = {}
+        for key, cohort_cells in by_cohort.items():
+            kept = sorted(cohort_cells, key=lambda c: c['students'])
+            hidden = 0
+            # Also drop the next smallest cells while the hidden remainder is itself a small group,
+            # otherwise it could be worked out from the cohort summary minus the published cells
+            while kept and (kept[0]['students'] < MIN_GROUP_SIZE or 0 < hidden < MIN_GROUP_SIZE):
+                hidden += kept.pop(0)['students']
+            cells[key] = kept
+            suppressed[key] = hidden
+
+        artifacts = {}
+        index = []
+        for key, summary in cube['cohorts'].items():
+            program_id, cohort_id = summary['program_id'], summary['cohort_id']
+            name = f"cohorts/{program_id}-{cohort_id}"
+            summary = {
+                **redact_small_group(summary),
+                'program_name': program_names.get(program_id),
+                'cohort_name': cohort_names.get(cohort_id),
+            }
+            artifacts[name] = {
+                'generated_at': cube.get('generated_at'),
+                'summary': summary,
+                'cells': cells.get(key, []),
+                'suppressed_students': suppressed.get(key, 0),
+                'series': series.get(key, [])[-COHORT_SERIES_LIMIT:],
+            }
+            index.append({**summary, 'artifact': name})
+
+        artifacts['cohorts'] = {'generated_at': cube.get('generated_at'), 'cohorts': index}
+        return artifacts
+
+    def write_artifact(self, name, payload):
+        """
+        Write one artifact under its content hash with compressed variants
+        Returns: manifest entry for the artifact
+        """
+        data = json.dumps(payload, separators=(',', ':'), sort_keys=True, default=str).encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        relative_path = f"{name}.{digest[:12]}.json"
+        path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        variants = {'': data, '.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if self.brotli:
+            variants['.br'] = self.brotli.compress(data, quality=11)
+
+        entry = {'path': relative_path, 'sha256': digest, 'bytes': len(data)}
+        for suffix, content in variants.items():
+            if suffix:
+                entry[f"{suffix[1:]}_bytes"] = len(content)
+            # Same hash means same content, so existing files are left untouched
+            if not os.path.exists(path + suffix):
+                tmp_path = f"{path}{suffix}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path + suffix)
+
+        return entry
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_stale_files(self, manifests):
+        """Delete hashed files not referenced by the current or previous manifest"""
+        keep = {MANIFEST_FILE}
+        for manifest in manifests:
+            for entry in (manifest or {}).get('artifacts', {}).values():
+                keep.update(entry['path'] + suffix for suffix in ('', '.gz', '.br'))
+
+        removed = 0
+        for root, _, files in os.walk(self.output_dir):
+            for file_name in files:
+                relative_path = os.path.relpath(os.path.join(root, file_name), self.output_dir).replace(os.sep, '/')
+                if relative_path not in keep:
+                    os.remove(os.path.join(root, file_name))
+                    removed += 1
+        return removed
+
+    def publish(self):
+        """Build all artifacts, write them and swap in the new manifest"""
+        print_step("DASHBOARD ARTIFACTS", f"Publishing static dashboard data to {self.output_dir}")
+
+        try:
+            artifacts = self.build_snapshot_artifacts()
+            artifacts.update(self.build_cohort_artifacts(CohortAnalyticsCube.load()))
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            previous = self._load_manifest()
+            previous_entries = (previous or {}).get('artifacts', {})
+
+            manifest = {'generated_at': datetime.now().isoformat(), 'artifacts': {}}
+            changed = 0
+            for name, payload in sorted(artifacts.items()):
+                entry = self.write_artifact(name, payload)
+                manifest['artifacts'][name] = entry
+                if previous_entries.get(name, {}).get('sha256') != entry['sha256']:
+                    changed += 1
+
+            tmp_path = os.path.join(self.output_dir, f"{MANIFEST_FILE}.tmp")
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, os.path.join(self.output_dir, MANIFEST_FILE))
+
+            removed = self._remove_stale_files([manifest, previous])
+
+        except Exception as e:
+            print(f"Error publishing dashboard artifacts: {e}")
+            return None
+
+        if not self.brotli:
+            print("brotli not installed, only gzip variants were written (pip install brotli)")
+        safe_print(f"[OK] Published {len(manifest['artifacts'])} artifacts ({changed} changed, {removed} stale files removed)")
+        return manifest
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Publish precompressed static dashboard artifacts')
+    parser.add_argument('--output', help='Output directory (default: public/data or PUBLIC_DATA_DIR)')
+    parser.add_argument('--no-brotli', action='store_true', help='Only write gzip variants')
+
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        supabase = get_supabase_client(service_role=True)
+        publisher = ArtifactPublisher(supabase, output_dir=args.output, brotli=not args.no_brotli)
+        if publisher.publish() is None:
+            sys.exit(1)
+    except Exception as e:
+        safe_print(f"\n[ERROR] Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    profile_main('publish_artifacts', main)
@@ -0,0 +1,299 @@
+"""
+At-Risk Scoring
+Computes a continuous 0-100 risk score for every student with NumPy
+Run with: python risk_scoring.py [--dry-run] [--top 20] [--benchmark N]
+
+Features (one row per student):
+- progress_gap: seasons left until the end of the expected season
+  (expected season index - current season index + unfinished share of the current season)
+- days_inactive: days since last_login
+- attendance_points: workshops/mentoring x3 + standups x1 (same weights as points_assigned)
+- points_vs_cohort: points standardized within the student's cohort
+- completion_rate: completed / tracked projects
+
+Features are standardized over the population, combined with fixed weights
+(positive = raises risk) and squashed with a logistic function. Scores are written
+in bulk to student_risk_scores.
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Import our utilities
+from utils import get_supabase_client, fetch_all_rows, print_step, safe_print, safe_upsert
+from update_points_assigned import PointsAssignmentManager
+
+FEATURES = ('progress_gap', 'days_inactive', 'attendance_points', 'points_vs_cohort', 'completion_rate')
+
+# Positive weights raise risk, negative weights lower it
+FEATURE_WEIGHTS = np.array([1.2, 0.8, -0.6, -0.4, -0.8])
+
+# Used for students that never logged in
+MAX_DAYS_INACTIVE = 365.0
+
+class RiskScoringEngine:
+    """Builds the student feature matrix and scores the whole population in one pass"""
+
+    SCORES_TABLE = 'student_risk_scores'
+
+    def __init__(self, supabase_client):
+        self.supabase = supabase_client
+
+    def load_columns(self, now=None):
+        """
+        Load the source tables and flatten them into per-student NumPy columns
+        This is the only per-row Python work; everything after it is vectorized.
+        """
+        now = now or datetime.now()
+
+        students = fetch_all_rows(
+            self.supabase, 'students',
+            'id, username, program_id, cohort_id, current_season_id, expected_season_id, last_login, '
+            'points, workshops_attended, mentoring_attended, standup_attended'
+        )
+        progress_rows = fetch_all_rows(
+            self.supabase, 'student_season_progress', 'id, student_id, season_id, progress_percentage'
+        )
+        schedule = fetch_all_rows(
+            self.supabase, 'program_cohort_seasons', 'id, program_id, cohort_id, season_id, start_date'
+        )
+        completions = fetch_all_rows(
+            self.supabase, 'student_project_completion', 'id, student_id, is_completed'
+        )
+
+        codes = {s['id']: i for i, s in enumerate(students)}
+        count = len(students)
+
+        # Season order within each (program, cohort) schedule
+        season_index = {}
+        for row in sorted(schedule, key=lambda r: str(r.get('start_date'))):
+            key = (row['program_id'], row['cohort_id'])
+            season_index.setdefault(key, {})
+            season_index[key].setdefault(row['season_id'], len(season_index[key]))
+
+        progress = {(r['student_id'], r['season_id']): r.get('progress_percentage') for r in progress_rows}
+
+        def number(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return np.nan
+
+        current_index = np.full(count, np.nan)
+        expected_index = np.full(count, np.nan)
+        current_progress = np.full(count, np.nan)
+        for i, s in enumerate(students):
+            seasons = season_index.get((s.get('program_id'), s.get('cohort_id')), {})
+            current_index[i] = seasons.get(s.get('current_season_id'), np.nan)
+            expected_index[i] = seasons.get(s.get('expected_season_id'), np.nan)
+            current_progress[i] = number(progress.get((s['id'], s.get('current_season_id'))))
+
+        last_login = np.array(
+            [str(s['last_login'])[:19] if s.get('last_login') else 'NaT' for s in students],
+            dtype='datetime64[s]'
+        )
+
+        cohort_ids = {}
+        cohort_codes = np.array(
+            [cohort_ids.setdefault(s.get('cohort_id'), len(cohort_ids)) for s in students], dtype=np.int64
+        )
+
+        completion_students = np.array(
+            [codes.get(r['student_id'], -1) for r in completions], dtype=np.int64
+        )
+        completion_done = np.array([bool(r.get('is_completed')) for r in completions], dtype=bool)
+        known = completion_students >= 0
+
+        return {
+            'ids': [s['id'] for s in students],
+            'usernames': [s.get('username') for s in students],
+            'current_index': current_index,
+            'expected_index': expected_index,
+            'current_progress': current_progress,
+            'last_login': last_login,
+            'now': np.datetime64(now.replace(tzinfo=None), 's'),
+            'points': np.array([number(s.get('points')) for s in students]),
+            'workshops': np.array([number(s.get('workshops_attended')) for s in students]),
+            'mentoring': np.array([number(s.get('mentoring_attended')) for s in students]),
+            'standups': np.array([number(s.get('standup_attended')) for s in students]),
+            'cohort_codes': cohort_codes,
+            'project_total': np.bincount(completion_students[known], minlength=count),
+            'project_completed': np.bincount(completion_students[known & completion_done], minlength=count),
+        }
+
+    @staticmethod
+    def build_feature_matrix(columns):
+        """Build the (students x FEATURES) matrix from per-student columns"""
+        count = len(columns['points'])
+
+        gap = (columns['expected_index'] - columns['current_index']) \
+            + (100 - np.nan_to_num(columns['current_progress'], nan=0.0)) / 100
+        progress_gap = np.clip(gap, 0, None)
+
+        inactive = (columns['now'] - columns['last_login']).astype('timedelta64[s]').astype(np.float64) / 86400
+        days_inactive = np.where(np.isnat(columns['last_login']), MAX_DAYS_INACTIVE, np.clip(inactive, 0, None))
+
+        attendance_points = (np.nan_to_num(columns['workshops']) * PointsAssignmentManager.WORKSHOP_POINTS
+                             + np.nan_to_num(columns['mentoring']) * PointsAssignmentManager.MENTORING_POINTS
+                             + np.nan_to_num(columns['standups']) * PointsAssignmentManager.STANDUP_POINTS)
+
+        # Points standardized within each cohort
+        points = columns['points']
+        cohorts = columns['cohort_codes']
+        valid = ~np.isnan(points)
+        cohort_count = int(cohorts.max()) + 1 if count else 0
+        n = np.bincount(cohorts[valid], minlength=cohort_count)
+        total = np.bincount(cohorts[valid], weights=points[valid], minlength=cohort_count)
+        squares = np.bincount(cohorts[valid], weights=points[valid] ** 2, minlength=cohort_count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / n
+            std = np.sqrt(np.maximum(squares / n - mean ** 2, 0))
+            points_vs_cohort = (points - mean[cohorts]) / std[cohorts]
+        points_vs_cohort[~np.isfinite(points_vs_cohort)] = np.nan
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            completion_rate = np.where(
+                columns['project_total'] > 0, columns['project_completed'] / columns['project_total'], np.nan
+            )
+
+        return np.column_stack([progress_gap, days_inactive, attendance_points, points_vs_cohort, completion_rate])
+
+    @staticmethod
+    def score(matrix):
+        """Turn the feature matrix into 0-100 risk scores"""
+        if not len(matrix):
+            return np.empty(0)
+
+        # Missing values count as the population average for that feature
+        column_means = np.nanmean(np.where(np.isnan(matrix).all(axis=0), 0, matrix), axis=0)
+        filled = np.where(np.isnan(matrix), column_means, matrix)
+
+        std = filled.std(axis=0)
+        standardized = (filled - filled.mean(axis=0)) / np.where(std > 0, std, 1)
+
+        logits = standardized @ FEATURE_WEIGHTS
+        return 100 / (1 + np.exp(-logits))
+
+    def write_scores(self, columns, matrix, scores, chunk_size=500):
+        """Upsert scores and the features behind them in chunks"""
+        scored_at = datetime.now().isoformat()
+        records = []
+        for i, student_id in enumerate(columns['ids']):
+            record = {'student_id': student_id, 'risk_score': round(float(scores[i]), 2), 'scored_at': scored_at}
+            for j, feature in enumerate(FEATURES):
+                value = matrix[i, j]
+                record[feature] = None if np.isnan(value) else round(float(value), 3)
+            records.append(record)
+
+        ok = True
+        for start in range(0, len(records), chunk_size):
+            if not safe_upsert(self.supabase, self.SCORES_TABLE, records[start:start + chunk_size],
+                               on_conflict='student_id'):
+                ok = False
+        return ok
+
+    def run(self, dry_run=False, top=20):
+        """Score all students, print the highest risks and write the scores"""
+        print_step("RISK SCORING", "Scoring all students")
+
+        try:
+            started = time.perf_counter()
+            columns = self.load_columns()
+            loaded = time.perf_counter()
+            if not columns['ids']:
+                print("No students found")
+                return False
+
+            matrix = self.build_feature_matrix(columns)
+            scores = self.score(matrix)
+            scored = time.perf_counter()
+            print(f"Scored {len(scores)} students in {(scored - loaded) * 1000:.1f} ms "
+                  f"(loading took {(loaded - started) * 1000:.1f} ms)")
+
+            order = np.argsort(-scores)[:top]
+            print(f"\n{'Username':<25} {'Risk':<7} " + ' '.join(f"{f:<18}" for f in FEATURES))
+            for i in order:
+                values = ' '.join(f"{'-' if np.isnan(v) else round(float(v), 2):<18}" for v in matrix[i])
+                print(f"{str(columns['usernames'][i]):<25} {scores[i]:<7.1f} {values}")
+
+            if dry_run:
+                print("\nDry run: scores not written")
+                return True
+
+            written = self.write_scores(columns, matrix, scores)
+            print(f"Whole stage took {(time.perf_counter() - started) * 1000:.1f} ms (load + score + write)")
+            return written
+
+        except Exception as e:
+            print(f"Error scoring students: {e}")
+            return False
+
+def generate_benchmark_columns(count, seed=0):
+    """Synthetic per-student columns for benchmarking"""
+    rng = np.random.default_rng(seed)
+    now = np.datetime64(datetime.now(), 's')
+    last_login = now - rng.integers(0, 200 * 86400, count).astype('timedelta64[s]')
+    last_login[rng.random(count) < 0.05] = np.datetime64('NaT')
+    project_total = rng.integers(0, 40, count)
+    return {
+        'current_index': rng.integers(0, 4, count).astype(float),
+        'expected_index': rng.integers(0, 4, count).astype(float),
+        'current_progress': rng.random(count) * 100,
+        'last_login': last_login,
+        'now': now,
+        'points': rng.integers(0, 5000, count).astype(float),
+        'workshops': rng.integers(0, 30, count).astype(float),
+        'mentoring': rng.integers(0, 30, count).astype(float),
+        'standups': rng.integers(0, 100, count).astype(float),
+        'cohort_codes': rng.integers(0, 50, count),
+        'project_total': project_total,
+        'project_completed': (project_total * rng.random(count)).astype(int),
+    }
+
+def benchmark(count, repeat=5):
+    """
+    Time feature building + scoring for a synthetic population
+    Loading (per-row conversion in load_columns) and writing are not included: for the whole
+    stage use benchmarks/stage_benchmarks.py --stages risk_scoring.
+    """
+    print_step("RISK SCORING BENCHMARK", f"{count} synthetic students, scoring only (no load/write), best of {repeat}")
+    columns = generate_benchmark_columns(count)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        RiskScoringEngine.score(RiskScoringEngine.build_feature_matrix(columns))
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    print(f"Best: {best * 1000:.1f} ms ({count / best:,.0f} students/s)")
+    return best
+
+def main():
+    """Main function with CLI argument parsing"""
+    parser = argparse.ArgumentParser(description='Compute continuous at-risk scores for all students')
+    parser.add_argument('--dry-run', action='store_true', help='Compute and print scores without writing them')
+    parser.add_argument('--top', type=int, default=20, help='Number of highest-risk students to print')
+    parser.add_argument('--benchmark', type=int, metavar='N',
+                        help='Benchmark scoring only (not loading or writing) on N synthetic students')
+
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+        return
+
+    try:
+        supabase = get_supabase_client(service_role=True)
+        if not RiskScoringEngine(supabase).run(dry_run=args.dry_run, top=args.top):
+            sys.exit(1)
+    except Exception as e:
+        safe_print(f"\n[ERROR] Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
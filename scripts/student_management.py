@@ -5,24 +5,28 @@ Run with: python student_management.py [--seasons] [--status] [--all]
 """
 
 import argparse
-import asyncio
 import sys
 from datetime import datetime
 
 # Import our utilities
-from utils import get_supabase_client, print_step, safe_print
+from utils import get_supabase_client, get_cohort_season_schedule, get_season_resolver, print_step, safe_print, LookupCache
+from profiling import add_profile_arguments, profile_main
 
 class StudentSeasonManager:
     """Handles student season assignment and management"""
     
-    def __init__(self, supabase_client):
+    def __init__(self, supabase_client, lookups=None):
         self.supabase = supabase_client
+        # Shared with the other stages when the orchestrator runs them in-process
+        self.lookups = lookups or LookupCache(supabase_client)
     
     def update_expected_seasons(self):
         """Set expected_season_id for students based on their cohort and program"""
         print_step("EXPECTED SEASONS", "Updating expected season assignments for students")
         
         today = datetime.now().date().isoformat()
+        schedule = self.lookups.get('cohort_season_schedule', get_cohort_season_schedule)
+        seasons_by_program = self.lookups.get('season_resolver', get_season_resolver).seasons_by_program
         
         # Get all students with cohort_id and program_id
         try:
@@ -46,9 +50,7 @@ class StudentSeasonManager:
             
             try:
                 # Find the matching program_cohort_season
-                pcs_response = self.supabase.from_('program_cohort_seasons').select('season_id, start_date, end_date') \
-                    .eq('cohort_id', cohort_id).eq('program_id', program_id).execute()
-                pcs_data = pcs_response.data
+                pcs_data = schedule.get((program_id, cohort_id), [])
 
                 expected_season_id = None
                 all_seasons_completed = False
@@ -65,13 +67,7 @@ class StudentSeasonManager:
                     if all_past:
                         all_seasons_completed = True
                         # Get the Final Project season for this program
-                        final_project_response = self.supabase.from_('seasons') \
-                            .select('id') \
-                            .eq('program_id', program_id) \
-                            .eq('name', 'Final Project') \
-                            .execute()
-                        if final_project_response.data:
-                            expected_season_id = final_project_response.data[0]['id']
+                        expected_season_id = seasons_by_program.get(program_id, {}).get('Final Project')
 
                 if expected_season_id:
                     # Update the student's expected_season_id
@@ -237,15 +233,18 @@ class StudentStatusManager:
     
     def update_student_status_sync(self):
         """Synchronous wrapper for async status update"""
+        # asyncio is slow to import and only needed here
+        import asyncio
+        
         return asyncio.run(self.update_student_status())
 
 class StudentManager:
     """Main class that orchestrates all student management operations"""
     
-    def __init__(self, service_role=True):
+    def __init__(self, service_role=True, lookups=None):
         # Use service role for administrative operations
         self.supabase = get_supabase_client(service_role=service_role)
-        self.season_manager = StudentSeasonManager(self.supabase)
+        self.season_manager = StudentSeasonManager(self.supabase, lookups)
         self.status_manager = StudentStatusManager(self.supabase)
     
     def update_expected_seasons(self):
@@ -286,6 +285,7 @@ def main():
     parser.add_argument('--service-role', action='store_true', default=True, 
                        help='Use service role key (default: True)')
     
+    add_profile_arguments(parser)
     args = parser.parse_args()
     
     # If no specific flags are provided, show help
@@ -322,4 +322,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile_main('student_management', main)
\ No newline at end of file
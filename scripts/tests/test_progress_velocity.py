@@ -0,0 +1,51 @@
+"""Tests for ProgressVelocityEngine.compute on the in-memory Supabase stand-in"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, 'benchmarks'))
+
+from fake_supabase import FakeSupabase
+from progress_velocity import ProgressVelocityEngine
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+def make_db(history, progress=30):
+    return FakeSupabase({
+        'students': [{'id': 's1', 'username': 'ada', 'program_id': 1, 'cohort_id': 1, 'current_season_id': 7}],
+        'student_season_progress': [{'id': 1, 'student_id': 's1', 'season_id': 7, 'progress_percentage': progress}],
+        'program_cohort_seasons': [],
+        'student_season_progress_history': history,
+    })
+
+def history_row(row_id, value, previous, recorded_at):
+    return {'id': row_id, 'student_id': 's1', 'season_id': 7, 'progress_percentage': value,
+            'previous_percentage': previous, 'recorded_at': recorded_at}
+
+def test_single_change_in_window_counts_as_progress():
+    # 0 -> 30 yesterday is the only change in the window
+    db = make_db([history_row(1, 30, 0, (NOW - timedelta(days=1)).isoformat())])
+    [forecast] = ProgressVelocityEngine(db).compute(now=NOW)
+
+    assert forecast['velocity_per_week'] > 0
+    assert forecast['recent_velocity_per_week'] > 0
+    assert forecast['projected_completion'] is not None
+
+def test_no_change_in_window_is_stalled():
+    db = make_db([history_row(1, 30, 0, (NOW - timedelta(days=90)).isoformat())])
+    [forecast] = ProgressVelocityEngine(db).compute(now=NOW)
+
+    assert forecast['velocity_per_week'] == 0
+    assert forecast['projected_completion'] is None
+
+def test_recorded_at_offsets_are_normalized_to_utc():
+    # 13 days 23 hours ago, written with a -05:00 offset: inside the 14-day recent window, but
+    # it would land 5 hours earlier (outside it) if the offset were dropped
+    recorded_at = (NOW - timedelta(days=14, hours=-1)).astimezone(timezone(timedelta(hours=-5))).isoformat()
+    db = make_db([history_row(1, 30, 0, recorded_at)])
+    [forecast] = ProgressVelocityEngine(db).compute(now=NOW)
+
+    assert forecast['recent_velocity_per_week'] > 0
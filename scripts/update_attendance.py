@@ -4,22 +4,53 @@ Syncs attendance data from Google Sheets form responses to Supabase
 
 Google Sheet format:
 - Column A: Email address (amsterdam.tech email)
-- Column B: Session date (DD/MM/YYYY)
+- Column B: Session date (DD/MM/YYYY, or the format in ATTENDANCE_DATE_FORMAT)
 - Column C: Session type (Workshop, Mentoring, Standup)
 
-Run with: python update_attendance.py
+By default only rows appended since the last run are fetched (a high-water mark
+and per-student totals are kept in the pipeline state directory). A full
+reconcile runs automatically every FULL_RECONCILE_DAYS days, or on demand.
+
+Attendance can also be imported offline from a CSV or XLSX export of the form
+responses with --file; rows are streamed through the same aggregation and
+database write path.
+
+Run with: python update_attendance.py [--full-sync] [--file export.csv] [--dry-run]
 """
 
+import argparse
+import csv
 import os
-import gspread
-from google.oauth2.service_account import Credentials
+import sys
 from collections import defaultdict
-from utils import get_supabase_client, print_step
+from datetime import datetime, timedelta
+from utils import get_supabase_client, print_step, load_state, save_state, safe_bulk_update, load_env
+from profiling import add_profile_arguments, profile_main
+from attendance_store import AttendanceEventStore, SESSION_FIELDS as ATTENDANCE_FIELDS, parse_session_date
 
 # Google Sheets configuration
 SPREADSHEET_ID = '1LQum-XZSTaun1cJ7AHxjS63JLGzMPFpCWEAES6gNZTg'
 SHEET_GID = 334409729
 
+# First sheet row holding a form response (row 1 is the header)
+FIRST_DATA_ROW = 2
+
+# Incremental sync state and how often to re-read the whole sheet to catch edits
+SYNC_STATE_FILE = 'attendance_sync.json'
+FULL_RECONCILE_DAYS = 7
+
+# Cached worksheet title and column letters, resolved from the header row
+SHEET_METADATA_FILE = 'attendance_sheet_metadata.json'
+
+# Form header names for each column we read (first match wins)
+COLUMN_HEADERS = {
+    'timestamp': ['Timestamp'],
+    'email': ['Please enter your Amsterdam Tech email address', 'Email Address', 'email', 'Email'],
+    'session_type': ['Which session is this form for?', 'Session Type', 'session_type'],
+    'session_date': ['Session date', 'Session Date', 'session_date'],
+}
+REQUIRED_COLUMNS = ('email', 'session_type')
+
 # Map form responses to database field names
 SESSION_TYPE_MAP = {
     'workshop': 'workshops_attended',
@@ -30,6 +61,9 @@ SESSION_TYPE_MAP = {
     'stand up': 'standup_attended',
 }
 
+# Rolling windows (days) for the per-cohort engagement report
+ENGAGEMENT_WINDOWS = (7, 30, 90)
+
 
 def get_google_sheets_client():
     """Initialize Google Sheets client using service account credentials"""
@@ -52,6 +86,7 @@ def get_google_sheets_client():
 
     # Try environment variable as fallback
     if not creds_path:
+        load_env()
         creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
 
     if not creds_path or not os.path.exists(creds_path):
@@ -62,6 +97,9 @@ def get_google_sheets_client():
 
     print(f"Using credentials file: {os.path.basename(creds_path)}")
 
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     scopes = [
         'https://www.googleapis.com/auth/spreadsheets.readonly',
         'https://www.googleapis.com/auth/drive.readonly'
@@ -71,31 +109,198 @@ def get_google_sheets_client():
     return gspread.authorize(credentials)
 
 
-def fetch_attendance_responses(gc):
-    """Fetch all attendance form responses from Google Sheets"""
-    print_step("FETCHING DATA", "Reading attendance form responses from Google Sheets")
+def column_letter(index):
+    """Convert a 1-based column index to its A1 column letter (1 -> A, 27 -> AA)"""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
 
-    spreadsheet = gc.open_by_key(SPREADSHEET_ID)
 
-    # Find the worksheet by GID
-    worksheet = None
-    for ws in spreadsheet.worksheets():
-        if ws.id == SHEET_GID:
-            worksheet = ws
-            break
+class StaleSheetMetadata(Exception):
+    """Raised when the cached worksheet title or column layout no longer matches the sheet"""
+
+
+class AttendanceSheetReader:
+    """
+    Reads only the attendance columns we use from the form responses sheet
+    The worksheet title and the column letters of each needed field are resolved from
+    the header row once and cached in the pipeline state directory. Every fetch is then
+    a single batched request for those columns (plus their header cells, to detect a
+    changed layout).
+    """
 
-    if not worksheet:
-        # Fall back to first worksheet
-        worksheet = spreadsheet.sheet1
-        print(f"Warning: Could not find worksheet with GID {SHEET_GID}, using first sheet")
+    def __init__(self, gc):
+        self.gc = gc
+        self._spreadsheet = None
+        self.metadata = self._load_metadata()
+
+    def _load_metadata(self):
+        """Load cached sheet metadata if it belongs to the configured sheet"""
+        metadata = load_state(SHEET_METADATA_FILE)
+        if not metadata:
+            return None
+        if metadata.get('spreadsheet_id') != SPREADSHEET_ID or metadata.get('sheet_gid') != SHEET_GID:
+            return None
+        if metadata.get('fields') != list(COLUMN_HEADERS):
+            return None
+        return metadata
+
+    def _get_spreadsheet(self):
+        if self._spreadsheet is None:
+            self._spreadsheet = self.gc.open_by_key(SPREADSHEET_ID)
+        return self._spreadsheet
+
+    def _resolve_metadata(self):
+        """Find the worksheet by GID and the column letter of each needed field"""
+        print("Resolving attendance sheet layout...")
+        spreadsheet = self._get_spreadsheet()
+
+        worksheet = None
+        for ws in spreadsheet.worksheets():
+            if ws.id == SHEET_GID:
+                worksheet = ws
+                break
+
+        if not worksheet:
+            # Fall back to first worksheet
+            worksheet = spreadsheet.sheet1
+            print(f"Warning: Could not find worksheet with GID {SHEET_GID}, using first sheet")
+
+        header = [str(name).strip() for name in worksheet.row_values(1)]
+
+        columns = {}
+        for field, candidates in COLUMN_HEADERS.items():
+            for candidate in candidates:
+                if candidate in header:
+                    columns[field] = {
+                        'letter': column_letter(header.index(candidate) + 1),
+                        'header': candidate,
+                    }
+                    break
+
+        missing = [field for field in REQUIRED_COLUMNS if field not in columns]
+        if missing:
+            raise ValueError(f"Attendance sheet is missing required columns: {', '.join(missing)}")
+
+        self.metadata = {
+            'spreadsheet_id': SPREADSHEET_ID,
+            'sheet_gid': SHEET_GID,
+            'title': worksheet.title,
+            'fields': list(COLUMN_HEADERS),
+            'columns': columns,
+        }
+        save_state(SHEET_METADATA_FILE, self.metadata)
+        return self.metadata
+
+    def _fetch_columns(self, start_row):
+        """Fetch the needed columns from start_row down in one batched request"""
+        title = "'" + self.metadata['title'].replace("'", "''") + "'"
+        fields = list(self.metadata['columns'])
+        letters = [self.metadata['columns'][field]['letter'] for field in fields]
+
+        ranges = [f"{title}!{letter}1" for letter in letters]
+        ranges += [f"{title}!{letter}{start_row}:{letter}" for letter in letters]
+
+        response = self._get_spreadsheet().values_batch_get(ranges, params={'majorDimension': 'COLUMNS'})
+        value_ranges = response.get('valueRanges', [])
+
+        def column_values(value_range):
+            values = value_range.get('values') or [[]]
+            return values[0]
+
+        headers = [column_values(vr) for vr in value_ranges[:len(fields)]]
+        for field, header in zip(fields, headers):
+            expected = self.metadata['columns'][field]['header']
+            if not header or str(header[0]).strip() != expected:
+                raise StaleSheetMetadata(f"column for '{field}' no longer has header '{expected}'")
+
+        columns = [column_values(vr) for vr in value_ranges[len(fields):]]
+        row_count = max((len(values) for values in columns), default=0)
+
+        records = []
+        for i in range(row_count):
+            records.append({
+                field: values[i] if i < len(values) else ''
+                for field, values in zip(fields, columns)
+            })
+        return records
+
+    def fetch(self, start_row=FIRST_DATA_ROW):
+        """Fetch responses from start_row onwards, re-resolving the layout once if the cache is stale"""
+        import gspread
+
+        if not self.metadata:
+            self._resolve_metadata()
+
+        try:
+            return self._fetch_columns(start_row)
+        except (StaleSheetMetadata, gspread.exceptions.APIError) as e:
+            print(f"Cached sheet layout is out of date ({e}), resolving it again")
+            self._resolve_metadata()
+            return self._fetch_columns(start_row)
+
+
+def fetch_attendance_responses(reader, start_row=FIRST_DATA_ROW):
+    """Fetch attendance form responses from Google Sheets, starting at a sheet row"""
+    print_step("FETCHING DATA", "Reading attendance form responses from Google Sheets")
 
-    # Get all records (assumes first row is headers)
-    records = worksheet.get_all_records()
+    records = reader.fetch(start_row)
 
-    print(f"Found {len(records)} form responses")
+    print(f"Found {len(records)} form responses from row {start_row}")
     return records
 
 
+def iter_csv_records(file_path):
+    """Stream form responses from a CSV export, one record dict per row"""
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for record in csv.DictReader(f):
+            yield record
+
+
+def iter_xlsx_records(file_path):
+    """Stream form responses from the first sheet of an XLSX export, one record dict per row"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading XLSX exports requires openpyxl (pip install openpyxl)")
+
+    # read_only mode streams rows instead of loading the whole workbook into memory
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            return
+
+        header = [str(name).strip() if name is not None else '' for name in header]
+        for row in rows:
+            values = ['' if value is None else str(value) for value in row]
+            if not any(values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_export_records(file_path):
+    """Stream form responses from a CSV or XLSX export of the attendance form"""
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == '.csv':
+        return iter_csv_records(file_path)
+    if extension in ('.xlsx', '.xlsm'):
+        return iter_xlsx_records(file_path)
+
+    raise ValueError(f"Unsupported export format '{extension}' (expected .csv or .xlsx)")
+
+
+def get_record_timestamp(record):
+    """Get the form submission timestamp of a response (used to detect edited rows)"""
+    return str(record.get('Timestamp') or record.get('timestamp') or '')
+
+
 def parse_session_type(session_str):
     """Parse session type string to database field name"""
     if not session_str:
@@ -111,63 +316,135 @@ def parse_session_type(session_str):
     return None
 
 
+def extract_attendance_event(record):
+    """
+    Turn one form response into an attendance event
+    Returns: (email, field_name, session_date) or None if the response is unusable.
+    session_date falls back to the submission date and is None if neither parses.
+    """
+    # Handle different possible column names from Google Forms
+    email = (
+        record.get('Please enter your Amsterdam Tech email address') or
+        record.get('Email Address') or
+        record.get('email') or
+        record.get('Email') or
+        ''
+    ).strip().lower()
+
+    session_type_str = (
+        record.get('Which session is this form for?') or
+        record.get('Session Type') or
+        record.get('session_type') or
+        ''
+    )
+
+    if not email:
+        return None
+
+    field_name = parse_session_type(session_type_str)
+    if not field_name:
+        return None
+
+    session_date = (
+        parse_session_date(
+            record.get('Session date') or
+            record.get('Session Date') or
+            record.get('session_date')
+        ) or
+        parse_session_date(get_record_timestamp(record))
+    )
+
+    return email, field_name, session_date
+
+
+def report_undated(count):
+    """Warn about responses dropped for lack of a usable date (both ingest paths drop them)"""
+    if count:
+        print(f"Warning: Skipped {count} responses without a session date or timestamp "
+              f"(or not in the ATTENDANCE_DATE_FORMAT/ISO format)")
+
+
+def extract_attendance_events(records):
+    """
+    Collect dated attendance events for the event store
+    Returns: list of (email, session_date, field_name)
+    """
+    events = []
+    undated = 0
+
+    for record in records:
+        event = extract_attendance_event(record)
+        if not event:
+            continue
+
+        email, field_name, session_date = event
+        if not session_date:
+            undated += 1
+            continue
+
+        events.append((email, session_date, field_name))
+
+    report_undated(undated)
+    return events
+
+
 def aggregate_attendance(records):
     """
     Aggregate attendance counts per student email
+    Repeated submissions for the same (email, session date, session type) count once.
+    Responses without a usable date are dropped, as in the Google Sheets sync, so an export
+    gives the same totals whichever way it is ingested.
     Returns: dict of {email: {field_name: count}}
     """
     print_step("PROCESSING", "Aggregating attendance counts per student")
 
     # Structure: {email: {workshops_attended: count, standup_attended: count, mentoring_attended: count}}
     attendance = defaultdict(lambda: defaultdict(int))
+    seen = set()
 
     skipped = 0
+    undated = 0
+    duplicates = 0
     processed = 0
 
     for record in records:
-        # Handle different possible column names from Google Forms
-        email = (
-            record.get('Please enter your Amsterdam Tech email address') or
-            record.get('Email Address') or
-            record.get('email') or
-            record.get('Email') or
-            ''
-        ).strip().lower()
-
-        session_type_str = (
-            record.get('Which session is this form for?') or
-            record.get('Session Type') or
-            record.get('session_type') or
-            ''
-        )
-
-        if not email:
+        event = extract_attendance_event(record)
+        if not event:
             skipped += 1
             continue
 
-        field_name = parse_session_type(session_type_str)
-        if not field_name:
-            skipped += 1
+        email, field_name, session_date = event
+        if not session_date:
+            undated += 1
             continue
+        if event in seen:
+            duplicates += 1
+            continue
+        seen.add(event)
 
         attendance[email][field_name] += 1
         processed += 1
 
-    print(f"Processed {processed} valid responses, skipped {skipped}")
+    print(f"Processed {processed} valid responses, skipped {skipped}, ignored {duplicates} duplicates")
+    report_undated(undated)
     print(f"Found attendance data for {len(attendance)} unique students")
 
     return attendance
 
 
 def update_student_attendance(supabase, attendance_data):
-    """Update student attendance fields in Supabase"""
+    """
+    Update student attendance fields in Supabase
+    Returns: (number of students updated, ids of the students whose update failed)
+    """
     print_step("UPDATING DATABASE", "Syncing attendance counts to Supabase")
 
     # Fetch all students to map email -> id
     response = supabase.from_('students').select('id, email, workshops_attended, standup_attended, mentoring_attended').execute()
     students = {s['email'].lower(): s for s in response.data if s.get('email')}
 
-    updated = 0
+    records_to_update = []
+    unchanged = 0
     not_found = []
 
     for email, counts in attendance_data.items():
@@ -177,28 +454,24 @@ def update_student_attendance(supabase, attendance_data):
             not_found.append(email)
             continue
 
-        # Build update payload with new counts from the sheet
-        # This REPLACES the current values with counts from the form
-        update_data = {}
-
-        if 'workshops_attended' in counts:
-            update_data['workshops_attended'] = counts['workshops_attended']
+        # New counts from the sheet REPLACE the stored values; only send the
+        # fields that actually differ from what is already in the database
+        update_data = {
+            field: counts[field]
+            for field in ATTENDANCE_FIELDS
+            if field in counts and (student.get(field) or 0) != counts[field]
+        }
 
-        if 'standup_attended' in counts:
-            update_data['standup_attended'] = counts['standup_attended']
+        if not update_data:
+            unchanged += 1
+            continue
 
-        if 'mentoring_attended' in counts:
-            update_data['mentoring_attended'] = counts['mentoring_attended']
+        records_to_update.append({'id': student['id'], **update_data})
+        print(f"  Updating {email}: {update_data}")
 
-        if update_data:
-            try:
-                supabase.from_('students').update(update_data).eq('id', student['id']).execute()
-                updated += 1
-                print(f"  Updated {email}: {update_data}")
-            except Exception as e:
-                print(f"  Error updating {email}: {e}")
+    print(f"\n{len(records_to_update)} students changed, {unchanged} unchanged")
 
-    print(f"\nUpdated {updated} students")
+    updated, failed_ids = safe_bulk_update(supabase, 'students', records_to_update) if records_to_update else (0, [])
 
     if not_found:
         print(f"\nWarning: {len(not_found)} emails not found in students table:")
@@ -207,36 +480,219 @@ def update_student_attendance(supabase, attendance_data):
         if len(not_found) > 10:
             print(f"  ... and {len(not_found) - 10} more")
 
-    return updated
+    return updated, failed_ids
 
 
-def main():
-    """Main function to sync attendance from Google Sheets to Supabase"""
-    print_step("ATTENDANCE SYNC", "Starting attendance synchronization from Google Sheets")
+def load_sync_state():
+    """Load the incremental sync state, ignoring state recorded for another sheet"""
+    state = load_state(SYNC_STATE_FILE)
+    if not state:
+        return None
+    if state.get('spreadsheet_id') != SPREADSHEET_ID or state.get('sheet_gid') != SHEET_GID:
+        return None
+    return state
+
+
+def get_full_reconcile_reason(state):
+    """Return why a full reconcile is needed, or None if an incremental sync is safe"""
+    if not state:
+        return "no previous sync state"
+
+    if state.get('last_row', 0) < FIRST_DATA_ROW:
+        return "no rows processed yet"
 
     try:
-        # Initialize clients
-        gc = get_google_sheets_client()
-        supabase = get_supabase_client(service_role=True)
+        last_full_sync = datetime.fromisoformat(state['last_full_sync'])
+    except (KeyError, TypeError, ValueError):
+        return "unknown last full sync"
 
-        # Fetch form responses
-        records = fetch_attendance_responses(gc)
+    if datetime.now() - last_full_sync >= timedelta(days=FULL_RECONCILE_DAYS):
+        return f"last full sync is older than {FULL_RECONCILE_DAYS} days"
 
-        if not records:
-            print("No attendance records found in the spreadsheet")
-            return
+    return None
 
-        # Aggregate by student
-        attendance_data = aggregate_attendance(records)
 
-        if not attendance_data:
-            print("No valid attendance data to process")
-            return
+def collect_attendance(reader, store, force_full=False):
+    """
+    Collect the attendance counts that need to be written to the database
+    New events are added to the event store; counts are read back from it, so
+    duplicate submissions are only counted once.
+    Returns: (attendance_data, new_state)
+
+    Incremental mode re-reads the high-water mark row together with the new rows.
+    If that row no longer matches (rows were edited or deleted) it falls back to a
+    full reconcile, which rebuilds the event store from the whole sheet.
+    """
+    state = None if force_full else load_sync_state()
+    reason = "requested with --full-sync" if force_full else get_full_reconcile_reason(state)
+
+    if not reason and not len(store):
+        reason = "event store is empty"
+
+    if not reason:
+        last_row = state['last_row']
+        records = fetch_attendance_responses(reader, start_row=last_row)
+
+        if not records or get_record_timestamp(records[0]) != state.get('last_timestamp'):
+            reason = f"row {last_row} changed since the last sync"
+        else:
+            new_records = records[1:]
+            if not new_records:
+                print("No new form responses since the last sync")
+                return {}, state
+
+            print_step("PROCESSING", "Adding new attendance events to the event store")
+            added, touched = store.append(extract_attendance_events(new_records))
+            print(f"Added {added} new attendance events from {len(new_records)} responses")
+
+            state['last_row'] = last_row + len(new_records)
+            state['last_timestamp'] = get_record_timestamp(new_records[-1])
+
+            # Only students with new events need to be written
+            return store.totals(emails=touched), state
+
+    print(f"Running full attendance reconcile ({reason})")
+    records = fetch_attendance_responses(reader)
+
+    print_step("PROCESSING", "Rebuilding the attendance event store")
+    store.clear()
+    added, _ = store.append(extract_attendance_events(records))
+    attendance_data = store.totals()
+    print(f"Stored {added} unique attendance events for {len(attendance_data)} students")
+
+    state = {
+        'spreadsheet_id': SPREADSHEET_ID,
+        'sheet_gid': SHEET_GID,
+        'last_row': FIRST_DATA_ROW - 1 + len(records),
+        'last_timestamp': get_record_timestamp(records[-1]) if records else '',
+        'last_full_sync': datetime.now().isoformat(),
+    }
+    return attendance_data, state
+
 
+def get_email_cohort_map(supabase):
+    """Map student email -> cohort name"""
+    cohorts_response = supabase.from_('cohorts').select('id, name').execute()
+    cohort_names = {c['id']: c['name'] for c in cohorts_response.data}
+
+    response = supabase.from_('students').select('email, cohort_id').execute()
+    return {
+        s['email'].lower(): cohort_names.get(s.get('cohort_id'), 'No cohort')
+        for s in response.data if s.get('email')
+    }
+
+
+def print_engagement_report(store, supabase, windows=ENGAGEMENT_WINDOWS):
+    """Print rolling-window attendance counts per cohort from the event store"""
+    print_step("ENGAGEMENT", f"Attendance per cohort over the last {', '.join(str(w) for w in windows)} days")
+
+    if not len(store):
+        print("Event store is empty, run a sync first")
+        return
+
+    counts = store.cohort_window_counts(get_email_cohort_map(supabase), windows=windows)
+
+    print(f"{'Cohort':<25} {'Window':<8} {'Workshops':<11} {'Standups':<10} {'Mentoring':<10}")
+    print("-" * 68)
+    for cohort, by_window in sorted(counts.items(), key=lambda item: str(item[0])):
+        for window in windows:
+            c = by_window[window]
+            print(f"{str(cohort):<25} {f'{window}d':<8} {c['workshops_attended']:<11} "
+                  f"{c['standup_attended']:<10} {c['mentoring_attended']:<10}")
+
+
+def print_attendance_summary(attendance_data):
+    """Print totals per attendance field (used for dry runs)"""
+    totals = defaultdict(int)
+    for counts in attendance_data.values():
+        for field_name, count in counts.items():
+            totals[field_name] += count
+
+    print(f"Students with attendance: {len(attendance_data)}")
+    for field_name in ATTENDANCE_FIELDS:
+        print(f"  {field_name}: {totals[field_name]}")
+
+
+def sync_attendance(full_sync=False, file_path=None, dry_run=False, engagement=False, supabase=None):
+    """
+    Collect attendance (Google Sheets or an export file) and write the totals to Supabase
+    Returns: False if some students could not be updated (the sync state is then left as it
+    was, so the next run retries them), True otherwise
+    """
+    state = None
+    store = None
+
+    if file_path:
+        # Offline import: always a full count, the sync high-water mark is left alone
+        attendance_data = aggregate_attendance(iter_export_records(file_path))
+    else:
+        # Fetch form responses and aggregate by student
+        gc = get_google_sheets_client()
+        reader = AttendanceSheetReader(gc)
+        store = AttendanceEventStore()
+        attendance_data, state = collect_attendance(reader, store, force_full=full_sync)
+
+    if dry_run:
+        print_attendance_summary(attendance_data)
+        print_step("DRY RUN", "No changes written to the database")
+        return True
+
+    supabase = supabase or get_supabase_client(service_role=True)
+    updated, failed_ids = 0, []
+
+    if attendance_data:
         # Update database
-        updated = update_student_attendance(supabase, attendance_data)
+        updated, failed_ids = update_student_attendance(supabase, attendance_data)
+    else:
+        print("No valid attendance data to process")
+
+    if failed_ids:
+        # An incremental run only rewrites students with new events, so keeping the old
+        # high-water mark and event store makes the next run send these students again
+        print(f"\n❌ {len(failed_ids)} students could not be updated, sync state not saved")
+        return False
+
+    # Only advance the high-water mark and event store once the database has been updated
+    if state:
+        store.save()
+        save_state(SYNC_STATE_FILE, state)
+
+    if engagement and store is not None:
+        print_engagement_report(store, supabase)
+
+    print_step("COMPLETE", f"Successfully updated attendance for {updated} students")
+    return True
 
-        print_step("COMPLETE", f"Successfully updated attendance for {updated} students")
+
+def main():
+    """Main function to sync attendance from Google Sheets to Supabase"""
+    parser = argparse.ArgumentParser(description='Sync attendance from Google Sheets to Supabase')
+    parser.add_argument('--full-sync', action='store_true',
+                        help='Re-read the whole sheet instead of only the new responses')
+    parser.add_argument('--file', metavar='PATH',
+                        help='Import from a CSV/XLSX export of the form instead of Google Sheets')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Aggregate attendance without writing to the database')
+    parser.add_argument('--engagement', action='store_true',
+                        help='Print rolling-window attendance per cohort from the event store')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.engagement and args.file:
+        parser.error("--engagement reads the event store built by the Google Sheets sync, it can't be used with --file")
+
+    if args.file:
+        print_step("ATTENDANCE IMPORT", f"Importing attendance from {os.path.basename(args.file)}")
+        if not os.path.exists(args.file):
+            print(f"\n❌ Export file not found: {args.file}")
+            return
+    else:
+        print_step("ATTENDANCE SYNC", "Starting attendance synchronization from Google Sheets")
+
+    try:
+        if not sync_attendance(full_sync=args.full_sync, file_path=args.file, dry_run=args.dry_run,
+                               engagement=args.engagement):
+            sys.exit(1)
 
     except FileNotFoundError as e:
         print(f"\n❌ Configuration Error: {e}")
@@ -252,4 +708,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    profile_main('update_attendance', main)
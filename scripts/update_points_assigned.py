@@ -1,10 +1,13 @@
 """
 Points Assignment Management
 Calculates and updates points_assigned for students based on attendance
-Run with: python update_points_assigned.py
+Run with: python update_points_assigned.py [--profile]
 """
 
+import argparse
+
 from utils import get_supabase_client, print_step, safe_print
+from profiling import add_profile_arguments, profile_main
 
 class PointsAssignmentManager:
     """Handles calculation and updating of points_assigned based on attendance"""
@@ -174,6 +177,10 @@ class PointsAssignmentManager:
 
 def main():
     """Main function to run points assignment update"""
+    parser = argparse.ArgumentParser(description='Recalculate points_assigned from attendance')
+    add_profile_arguments(parser)
+    parser.parse_args()
+
     try:
         # Create Supabase client with service role for admin operations
         supabase_client = get_supabase_client(service_role=True)
@@ -199,4 +206,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    exit(main())
+    exit(profile_main('update_points_assigned', main))
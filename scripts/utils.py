@@ -6,12 +6,27 @@ Contains common functions used across multiple scripts to avoid code duplication
 import os
 import re
 import json
+import functools
+import threading
 from datetime import datetime, timedelta
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-# Load environment variables once
-load_dotenv()
+from metrics import instrument_supabase_client, install_exit_report
+
+# Report this process's metrics to main.py when it runs us as a stage
+install_exit_report()
+
+_env_loaded = False
+
+def load_env():
+    """
+    Load the .env file into the environment (once, on first use)
+    Called wherever configuration is read, so importing utils stays cheap.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
 
 class SupabaseClient:
     """Singleton-like class to manage Supabase connections"""
@@ -25,6 +40,10 @@ class SupabaseClient:
     
     def _initialize(self):
         """Initialize Supabase client with environment variables"""
+        # The supabase client stack is the slowest import; only load it when a client is needed
+        from supabase import create_client
+        
+        load_env()
         self.url = os.getenv('SUPABASE_URL')
         self.key = os.getenv('SUPABASE_KEY')
         self.role_key = os.getenv('SUPABASE_ROLE_KEY')
@@ -39,6 +58,10 @@ class SupabaseClient:
             self.service_client = create_client(self.url, self.role_key)
         else:
             self.service_client = self.client
+        
+        # Count and time every request for the metrics report
+        instrument_supabase_client(self.client)
+        instrument_supabase_client(self.service_client)
     
     def get_client(self, service_role=False):
         """Get Supabase client (regular or service role)"""
@@ -85,111 +108,119 @@ def map_season_name_to_db(season_name):
     
     return mappings.get(season_name, season_name)
 
-def parse_relative_time_to_timestamp(relative_time_str):
+# Month names as strptime's %B/%b accept them (English, any case)
+_MONTHS = {
+    name: number
+    for number, full in enumerate(('january', 'february', 'march', 'april', 'may', 'june', 'july',
+                                   'august', 'september', 'october', 'november', 'december'), 1)
+    for name in (full, full[:3])
+}
+
+# Absolute forms: "February 19, 2025  9:17pm", "Feb 19, 2025 21:17", "2025-02-19 21:17:00", "2025-02-19"
+_ABSOLUTE_TIME = re.compile(
+    r'(?P<month>[a-z]+)\s+(?P<day>\d{1,2}),\s+(?P<year>\d{4})\s+(?P<hour>\d{1,2}):(?P<minute>\d{1,2})\s*(?P<ampm>[ap]m)?'
+    r'|(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})'
+    r'(?:[t\s]+(?P<iso_hour>\d{1,2}):(?P<iso_minute>\d{1,2}):(?P<iso_second>\d{1,2}))?'
+)
+# Relative forms: "3 days ago", "a month ago", "an hour ago", "5 minutes ago"
+_RELATIVE_TIME = re.compile(r'(?:(\d+)\s*|\b(?:a|an)\s+)(minute|hour|day|month|year)s?\s*ago')
+# Months and years are approximated as 30 and 365 days
+_RELATIVE_UNITS = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'month': timedelta(days=30),
+    'year': timedelta(days=365),
+}
+
+@functools.lru_cache(maxsize=4096)
+def _tokenize_time(time_str):
+    """
+    Parse a stripped time string once (students share many identical strings)
+    Returns: ('absolute', iso string), ('relative', timedelta) or None if unparseable.
+    Nothing here depends on the current time, so results are safe to cache.
+    """
+    lowered = time_str.lower()
+    match = _ABSOLUTE_TIME.fullmatch(lowered)
+    if match:
+        try:
+            if match.group('month'):
+                month = _MONTHS.get(match.group('month'))
+                hour = int(match.group('hour'))
+                if match.group('ampm'):
+                    if not 1 <= hour <= 12:
+                        raise ValueError(f"hour {hour} with am/pm")
+                    hour = hour % 12 + (12 if match.group('ampm') == 'pm' else 0)
+                if month:
+                    timestamp = datetime(int(match.group('year')), month, int(match.group('day')),
+                                         hour, int(match.group('minute')))
+                    return 'absolute', timestamp.isoformat()
+            else:
+                timestamp = datetime(int(match.group('iso_year')), int(match.group('iso_month')),
+                                     int(match.group('iso_day')), int(match.group('iso_hour') or 0),
+                                     int(match.group('iso_minute') or 0), int(match.group('iso_second') or 0))
+                return 'absolute', timestamp.isoformat()
+        except ValueError:
+            # Out-of-range dates fall through to the relative forms, then to "now"
+            pass
+
+    match = _RELATIVE_TIME.search(lowered)
+    if match:
+        return 'relative', _RELATIVE_UNITS[match.group(2)] * int(match.group(1) or 1)
+    return None
+
+def parse_relative_time_to_timestamp(relative_time_str, now=None):
     """
     Convert time strings to timestamps. Handles both:
     - Relative times: '3 days ago', 'a month ago', '30 days ago'
     - Absolute dates: 'february 19, 2025  9:17pm', 'October 24, 2025 11:15am'
+    now anchors relative times (default: the current time). Unparseable strings give now.
     """
     if not relative_time_str or relative_time_str.strip() == "":
         return None
 
     relative_time_str = relative_time_str.strip()
-    now = datetime.now()
-
-    try:
-        # First, try to parse as absolute date/time
-        # Common formats from Qwasar: "february 19, 2025  9:17pm", "October 24, 2025 11:15am"
-        absolute_formats = [
-            "%B %d, %Y %I:%M%p",      # February 19, 2025 9:17pm
-            "%B  %d, %Y  %I:%M%p",    # February  19, 2025  9:17pm (extra spaces)
-            "%B %d, %Y  %I:%M%p",     # February 19, 2025  9:17pm (space before time)
-            "%B  %d, %Y %I:%M%p",     # February  19, 2025 9:17pm (space before day)
-            "%b %d, %Y %I:%M%p",      # Feb 19, 2025 9:17pm (abbreviated month)
-            "%B %d, %Y %H:%M",        # February 19, 2025 21:17 (24-hour format)
-            "%Y-%m-%d %H:%M:%S",      # 2025-02-19 21:17:00
-            "%Y-%m-%d",               # 2025-02-19
-        ]
-
-        for fmt in absolute_formats:
-            try:
-                timestamp = datetime.strptime(relative_time_str, fmt)
-                return timestamp.isoformat()
-            except ValueError:
-                continue
+    now = now or datetime.now()
+    token = _tokenize_time(relative_time_str)
 
-        # If absolute parsing fails, try relative time parsing
-        relative_time_lower = relative_time_str.lower()
-
-        # Handle "X days ago"
-        if "days ago" in relative_time_lower:
-            days_match = re.search(r'(\d+)\s*days?\s*ago', relative_time_lower)
-            if days_match:
-                days = int(days_match.group(1))
-                timestamp = now - timedelta(days=days)
-                return timestamp.isoformat()
-
-        # Handle "a day ago"
-        if "a day ago" in relative_time_lower or "1 day ago" in relative_time_lower:
-            timestamp = now - timedelta(days=1)
-            return timestamp.isoformat()
-
-        # Handle "X months ago"
-        if "months ago" in relative_time_lower:
-            months_match = re.search(r'(\d+)\s*months?\s*ago', relative_time_lower)
-            if months_match:
-                months = int(months_match.group(1))
-                # Approximate: 1 month = 30 days
-                timestamp = now - timedelta(days=months * 30)
-                return timestamp.isoformat()
-
-        # Handle "a month ago"
-        if "a month ago" in relative_time_lower or "1 month ago" in relative_time_lower:
-            timestamp = now - timedelta(days=30)
-            return timestamp.isoformat()
-
-        # Handle "X years ago"
-        if "years ago" in relative_time_lower:
-            years_match = re.search(r'(\d+)\s*years?\s*ago', relative_time_lower)
-            if years_match:
-                years = int(years_match.group(1))
-                # Approximate: 1 year = 365 days
-                timestamp = now - timedelta(days=years * 365)
-                return timestamp.isoformat()
-
-        # Handle "a year ago"
-        if "a year ago" in relative_time_lower or "1 year ago" in relative_time_lower:
-            timestamp = now - timedelta(days=365)
-            return timestamp.isoformat()
-
-        # Handle "X hours ago"
-        if "hours ago" in relative_time_lower:
-            hours_match = re.search(r'(\d+)\s*hours?\s*ago', relative_time_lower)
-            if hours_match:
-                hours = int(hours_match.group(1))
-                timestamp = now - timedelta(hours=hours)
-                return timestamp.isoformat()
-
-        # Handle "an hour ago"
-        if "an hour ago" in relative_time_lower or "1 hour ago" in relative_time_lower:
-            timestamp = now - timedelta(hours=1)
-            return timestamp.isoformat()
-
-        # Handle "X minutes ago"
-        if "minutes ago" in relative_time_lower:
-            minutes_match = re.search(r'(\d+)\s*minutes?\s*ago', relative_time_lower)
-            if minutes_match:
-                minutes = int(minutes_match.group(1))
-                timestamp = now - timedelta(minutes=minutes)
-                return timestamp.isoformat()
-
-        # If none of the patterns match, return None or current time
+    if token is None:
         print(f"Warning: Could not parse time string '{relative_time_str}'. Using current time.")
         return now.isoformat()
+    kind, value = token
+    return value if kind == 'absolute' else (now - value).isoformat()
 
-    except Exception as e:
-        print(f"Error parsing time string '{relative_time_str}': {e}")
-        return None
+def parse_timestamps(time_strings, now=None):
+    """
+    Convert a whole column of time strings (e.g. every scraped last_login) at once
+    All relative times share one "now", each distinct string is converted once and
+    unparseable strings are reported in a single warning.
+    Returns: list of timestamps (or None) in input order
+    """
+    now = now or datetime.now()
+    converted = {}
+    unparseable = []
+    results = []
+
+    for value in time_strings:
+        if value not in converted:
+            stripped = value.strip() if isinstance(value, str) else ''
+            if not stripped:
+                converted[value] = None
+            else:
+                token = _tokenize_time(stripped)
+                if token is None:
+                    unparseable.append(stripped)
+                    converted[value] = now.isoformat()
+                else:
+                    kind, parsed = token
+                    converted[value] = parsed if kind == 'absolute' else (now - parsed).isoformat()
+        results.append(converted[value])
+
+    if unparseable:
+        examples = ', '.join(f"'{s}'" for s in unparseable[:5])
+        print(f"Warning: Could not parse {len(unparseable)} distinct time string(s) ({examples}"
+              f"{', ...' if len(unparseable) > 5 else ''}). Using current time.")
+    return results
 
 def load_scraped_data(file_path=None):
     """Load scraped data from JSON file"""
@@ -245,6 +276,121 @@ def get_season_id_map(supabase_client):
         print(f"Error fetching seasons: {e}")
         return {}
 
+def get_cohort_season_schedule(supabase_client):
+    """Get mapping of (program_id, cohort_id) to that cohort's program_cohort_seasons rows"""
+    try:
+        rows = fetch_all_rows(supabase_client, 'program_cohort_seasons',
+                              'id, program_id, cohort_id, season_id, start_date, end_date')
+    except Exception as e:
+        print(f"Error fetching cohort season schedule: {e}")
+        return {}
+    schedule = {}
+    for row in rows:
+        schedule.setdefault((row['program_id'], row['cohort_id']), []).append(row)
+    return schedule
+
+def get_season_resolver(supabase_client):
+    """Build a SeasonResolver from the seasons table"""
+    try:
+        response = supabase_client.from_('seasons').select('id, name, program_id').execute()
+        return SeasonResolver(response.data)
+    except Exception as e:
+        print(f"Error fetching seasons by program: {e}")
+        return SeasonResolver([])
+
+class SeasonResolver:
+    """
+    Resolves scraped season labels (e.g. 'Season 03 Software Engineer Golang') to season ids
+    Built once from the seasons table. Each distinct label is normalized the first time it is
+    seen and kept in a bounded cache as {program_id: season_id}, so a lookup is one dict access.
+    Labels that match no season in the student's program are counted and reported together.
+    """
+
+    def __init__(self, seasons, max_labels=1024):
+        self.seasons_by_program = {}
+        for row in seasons:
+            self.seasons_by_program.setdefault(row['program_id'], {})[row['name']] = row['id']
+        self._by_name = {}
+        for program_id, program_seasons in self.seasons_by_program.items():
+            for name, season_id in program_seasons.items():
+                self._by_name.setdefault(name, {})[program_id] = season_id
+        self.candidates = functools.lru_cache(maxsize=max_labels)(self._candidates)
+        self.unknown = {}
+
+    def _candidates(self, label):
+        """{program_id: season_id} for every program that has this season"""
+        return self._by_name.get(map_season_name_to_db(label), {}) if label else {}
+
+    def has_program(self, program_id):
+        return program_id in self.seasons_by_program
+
+    def season_id(self, label, program_id):
+        """The season id for a scraped label in the student's program, or None (counted as unknown)"""
+        season_id = self.candidates(label).get(program_id)
+        if season_id is None:
+            key = (label, program_id)
+            self.unknown[key] = self.unknown.get(key, 0) + 1
+        return season_id
+
+    def report_unknown(self, context):
+        """Print one warning for the labels that matched no season since the last report"""
+        if not self.unknown:
+            return
+        ranked = sorted(self.unknown.items(), key=lambda item: -item[1])
+        details = ', '.join(f"'{label}' in program {program_id} ({count}x)" for (label, program_id), count in ranked[:10])
+        more = f" and {len(ranked) - 10} more" if len(ranked) > 10 else ''
+        print(f"Warning: {context}: {len(ranked)} season label(s) not found in the student's program, skipped: "
+              f"{details}{more}")
+        self.unknown.clear()
+
+class LookupCache:
+    """
+    Per-process cache of lookup maps (usernames, seasons, projects...)
+    Stages that run in the same process share one instance so each map is fetched once.
+    """
+
+    def __init__(self, supabase_client):
+        self.supabase = supabase_client
+        self._values = {}
+        # Stages may run in parallel threads
+        self._lock = threading.Lock()
+
+    def get(self, name, loader):
+        """Return the cached map, calling loader(supabase_client) the first time"""
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = loader(self.supabase)
+            return self._values[name]
+
+    def invalidate(self, *names):
+        """Drop cached maps (all of them when no names are given)"""
+        with self._lock:
+            if not names:
+                self._values.clear()
+            for name in names:
+                self._values.pop(name, None)
+
+def fetch_all_rows(supabase_client, table_name, columns='*', page_size=1000, order_by='id', filters=None):
+    """
+    Fetch every row of a table, paging past the API's per-request row limit
+    filters is an optional function that adds conditions to the query (e.g. lambda q: q.eq(...))
+    """
+    rows = []
+    start = 0
+    while True:
+        query = supabase_client.from_(table_name).select(columns)
+        if filters:
+            query = filters(query)
+        if order_by:
+            # A stable order keeps pages from overlapping
+            query = query.order(order_by)
+        response = query.range(start, start + page_size - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
 def safe_upsert(supabase_client, table_name, records, on_conflict=None):
     """Safely perform upsert operation with error handling"""
     if not records:
@@ -302,6 +448,81 @@ def safe_update(supabase_client, table_name, records, id_field='id'):
         print(f"Error during update operation on {table_name}: {e}")
         return False
 
+def safe_bulk_update(supabase_client, table_name, records, id_field='id', chunk_size=200):
+    """
+    Update many records, one request per distinct payload (per chunk of ids)
+    Records that set the same values are grouped and sent as one UPDATE ... WHERE id IN (...),
+    so this only saves requests when many records share their new values (e.g. a status).
+    Records with values of their own (e.g. per-student totals) still cost one request each.
+    Returns: (updated count, ids of the records whose update failed)
+    """
+    if not records:
+        print(f"No records to update in {table_name}")
+        return 0, []
+
+    groups = {}
+    for record in records:
+        if id_field not in record:
+            print(f"Warning: Record missing {id_field} field, skipping")
+            continue
+        update_data = {k: v for k, v in record.items() if k != id_field}
+        if not update_data:
+            continue
+        key = json.dumps(update_data, sort_keys=True, default=str)
+        groups.setdefault(key, (update_data, []))[1].append(record[id_field])
+
+    updated_count = 0
+    failed_ids = []
+    request_count = 0
+
+    for update_data, ids in groups.values():
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            request_count += 1
+            try:
+                supabase_client.from_(table_name).update(update_data).in_(id_field, chunk).execute()
+                updated_count += len(chunk)
+            except Exception as e:
+                print(f"Error updating {len(chunk)} records in {table_name}: {e}")
+                failed_ids.extend(chunk)
+
+    print(f"Successfully updated {updated_count} records in {table_name} ({request_count} requests)")
+    if failed_ids:
+        print(f"Failed to update {len(failed_ids)} records")
+
+    return updated_count, failed_ids
+
+def get_state_dir():
+    """Get the directory used for local pipeline state (created on first use)"""
+    load_env()
+    state_dir = os.getenv('PIPELINE_STATE_DIR')
+    if not state_dir:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        state_dir = os.path.join(script_dir, '.state')
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+def load_state(name, default=None):
+    """Load a JSON state file from the pipeline state directory"""
+    path = os.path.join(get_state_dir(), name)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        print(f"Warning: State file '{path}' is corrupt, ignoring it")
+        return default
+
+def save_state(name, data):
+    """Atomically write a JSON state file to the pipeline state directory"""
+    path = os.path.join(get_state_dir(), name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
 def safe_print(message):
     """Print message with fallback for Windows console encoding issues"""
     try:
@@ -0,0 +1,17 @@
+-- Daily per-cohort progress snapshots written by scripts/analytics.py (--series, --all).
+-- Daily rows older than 90 days are folded into one weekly row per cohort.
+create table if not exists cohort_progress_snapshots (
+  id bigint generated always as identity primary key,
+  snapshot_date date not null,
+  granularity text not null check (granularity in ('daily', 'weekly')),
+  program_id bigint references programs(id),
+  cohort_id bigint references cohorts(id),
+  total_students int not null,
+  on_track int not null,
+  at_risk int not null,
+  monitor int not null,
+  avg_progress numeric,
+  -- Upsert target of SnapshotSeriesStore (on_conflict)
+  constraint cohort_progress_snapshots_key
+    unique nulls not distinct (snapshot_date, granularity, program_id, cohort_id)
+);
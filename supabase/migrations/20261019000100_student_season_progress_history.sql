@@ -0,0 +1,17 @@
+-- Append-only season progress history written by scripts/data_processor.py (--progress)
+-- and read by scripts/progress_velocity.py. One row per change of a student's percentage.
+create table if not exists student_season_progress_history (
+  id bigint generated always as identity primary key,
+  student_id uuid not null references students(id),
+  season_id bigint not null references seasons(id),
+  progress_percentage numeric not null,
+  -- Value before the change (null for the first value of a season)
+  previous_percentage numeric,
+  recorded_at timestamptz not null default now()
+);
+
+-- Tables created from the earlier README definition lack the previous value
+alter table student_season_progress_history add column if not exists previous_percentage numeric;
+
+create index if not exists student_season_progress_history_recorded_at_idx
+  on student_season_progress_history (recorded_at);